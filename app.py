@@ -1,24 +1,47 @@
-from flask import Flask, render_template_string, request, jsonify
-import threading
-import time
+from flask import Flask, Response, render_template_string, request, jsonify
+import functools
+import json
+import uuid
 from datetime import datetime
 import pandas as pd
 import os
 
 # Import our trading modules
+from data.cache import QuoteCache
 from data.providers import YFinanceProvider
+from data.ringbuffer import OHLCVRingBuffer
 from strategy.sma_cross import MovingAverageCross
 from risk.manager import RiskManager, RiskConfig
 from brokers.paper import PaperBroker
-from backtest.engine import Backtester
+from core.types import Order, Side
+from backtest.jobs import JobQueue, QueueFull, run_backtest_job
+from charts.report import render_png
+from core import instrument
+from live.events import EventLog, sse
+from live.manager import BotManager, PricePoller, TooManyBots
 
 app = Flask(__name__)
 
-# Bot state variables
-trading_bot = None
-bot_status = "stopped"
-bot_thread = None
-trading_history = []
+# Latest quotes for the bots and /quotes: fresh ones (QUOTE_TTL seconds) come from memory and
+# concurrent requests for a symbol share one fetch
+quotes = QuoteCache(YFinanceProvider(), ttl=float(os.environ.get("QUOTE_TTL", 2)))
+# Trading bots by ID, at most MAX_BOTS (stopped ones are dropped to make room). One poller
+# thread fetches every running bot's symbol in a single batched quote request per POLL_SECS
+# and fans the prices out to the bots.
+MAX_BOTS = int(os.environ.get("MAX_BOTS", 50))
+bots = BotManager(PricePoller(quotes, float(os.environ.get("POLL_SECS", 5))), MAX_BOTS)
+# Fills, position and status changes pushed to the dashboard over /events
+bot_events = EventLog()
+# Backtests run off the request thread; identical in-flight requests share one job
+def _count_result_cache(job):
+    # Workers memoize results (see backtest.resultcache); tally their hits here for /metrics
+    result = job.future.result() if job.status == "done" else None
+    if isinstance(result, dict):
+        instrument.CACHE.inc(cache="backtest", result="hit" if result.get("cached") else "miss")
+
+backtest_jobs = JobQueue(max_workers=int(os.environ.get("BACKTEST_WORKERS", 2)),
+                         max_pending=int(os.environ.get("BACKTEST_MAX_PENDING", 32)),
+                         on_done=_count_result_cache)
 
 # Web page template
 HTML_TEMPLATE = """
@@ -57,12 +80,20 @@ HTML_TEMPLATE = """
             <p>Automated trading with Moving Average Crossover Strategy</p>
         </div>
         
-        <div class="status {{ bot_status }}">
-            <strong>Status:</strong> {{ bot_status.upper() }}
+        <div id="bots">
+            {% for bot in bots %}
+            <div class="status {{ bot.status }}" id="bot-{{ bot.bot_id }}">
+                <strong>{{ bot.symbol }}</strong> <span>{{ bot.status.upper() }}</span>
+                <span>{% if bot.position.qty %} | Position: {{ bot.position.qty }} @ ${{ "%.2f"|format(bot.position.avg_price) }}{% endif %}</span>
+                <button class="btn-stop" data-bot="{{ bot.bot_id }}">⏹️ Stop</button>
+            </div>
+            {% else %}
+            <p id="no-bots">No bots running.</p>
+            {% endfor %}
         </div>
         
         <div class="controls">
-            <form method="POST" action="/start" style="display: inline;">
+            <form method="POST" action="/bots" id="bot-form" style="display: inline;">
                 <div class="form-group">
                     <label>Symbol:</label>
                     <input type="text" name="symbol" value="AAPL" required>
@@ -73,14 +104,10 @@ HTML_TEMPLATE = """
                 </div>
                 <button type="submit" class="btn-start">🚀 Start Trading</button>
             </form>
-            
-            <form method="POST" action="/stop" style="display: inline;">
-                <button type="submit" class="btn-stop">⏹️ Stop Trading</button>
-            </form>
         </div>
         
         <div class="controls">
-            <form method="POST" action="/backtest">
+            <form method="POST" action="/backtest" id="backtest-form">
                 <div class="form-group">
                     <label>Symbol:</label>
                     <input type="text" name="symbol" value="AAPL" required>
@@ -94,22 +121,25 @@ HTML_TEMPLATE = """
                     <input type="date" name="end" value="2024-12-31" required>
                 </div>
                 <button type="submit" class="btn-backtest">📊 Run Backtest</button>
+                <span id="backtest-status"></span>
             </form>
         </div>
         
-        {% if backtest_results %}
-        <div class="metrics">
+        <div id="backtest-charts"></div>
+        <div class="metrics" id="backtest-metrics">
+            {% if backtest_results %}
             {% for key, value in backtest_results.items() %}
             <div class="metric">
                 <div class="metric-value">{{ "%.4f"|format(value) if value is number else value }}</div>
                 <div>{{ key }}</div>
             </div>
             {% endfor %}
+            {% endif %}
         </div>
-        {% endif %}
         
         <div class="history">
             <h3>📈 Trading History</h3>
+            <div id="trades">
             {% if trading_history %}
                 {% for trade in trading_history[-10:] %}
                 <div class="trade">
@@ -119,172 +149,378 @@ HTML_TEMPLATE = """
             {% else %}
                 <p>No trading activity yet.</p>
             {% endif %}
+            </div>
         </div>
     </div>
     
     <script>
-        // Auto-refresh every 5 seconds if bot is running
-        {% if bot_status == 'running' %}
-        setTimeout(() => location.reload(), 5000);
-        {% endif %}
+        // Queue the backtest, then long-poll its job until it finishes
+        document.getElementById('backtest-form').addEventListener('submit', async (e) => {
+            e.preventDefault();
+            const status = document.getElementById('backtest-status');
+            const r = await (await fetch('/backtest', {method: 'POST', body: new FormData(e.target)})).json();
+            if (r.status !== 'success') { status.textContent = r.message; return; }
+            let job = {status: 'queued'};
+            while (job.status === 'queued' || job.status === 'running') {
+                status.textContent = 'Backtest ' + job.status + '...';
+                job = await (await fetch(r.status_url + '?wait=25')).json();
+            }
+            if (job.status !== 'done') { status.textContent = 'Backtest failed: ' + job.error; return; }
+            status.textContent = '';
+            const box = document.getElementById('backtest-metrics');
+            box.innerHTML = '';
+            for (const [k, v] of Object.entries(job.result.metrics)) {
+                const m = document.createElement('div'); m.className = 'metric';
+                m.innerHTML = '<div class="metric-value"></div><div></div>';
+                m.children[0].textContent = typeof v === 'number' ? v.toFixed(4) : v;
+                m.children[1].textContent = k;
+                box.appendChild(m);
+            }
+            document.getElementById('backtest-charts').innerHTML = ['equity', 'drawdown'].map(k =>
+                `<img src="${r.status_url}/chart/${k}.png" alt="${k}" style="max-width: 49%;">`).join(' ');
+        });
+
+        // Start a bot without leaving the page; each bot row has its own stop button
+        document.getElementById('bot-form').addEventListener('submit', async (e) => {
+            e.preventDefault();
+            const r = await (await fetch('/bots', {method: 'POST', body: new FormData(e.target)})).json();
+            if (r.status !== 'success') alert(r.message);
+        });
+        document.getElementById('bots').addEventListener('click', async (e) => {
+            const id = e.target.dataset.bot;
+            if (id) await fetch(`/bots/${id}/stop`, {method: 'POST'});
+        });
+
+        // Live updates: the server pushes only new fills and position/status changes.
+        // EventSource resends the last event id on reconnect, so nothing is missed or repeated.
+        function botRow(id, symbol) {
+            let el = document.getElementById('bot-' + id);
+            if (!el) {
+                const none = document.getElementById('no-bots'); if (none) none.remove();
+                el = document.createElement('div'); el.id = 'bot-' + id;
+                el.innerHTML = '<strong></strong> <span></span> <span></span> <button class="btn-stop">⏹️ Stop</button>';
+                el.children[0].textContent = symbol; el.children[3].dataset.bot = id;
+                document.getElementById('bots').appendChild(el);
+            }
+            return el;
+        }
+        function setStatus(s) {
+            const el = botRow(s.bot, s.symbol);
+            el.className = 'status ' + s.status;
+            el.children[1].textContent = s.status.toUpperCase();
+        }
+        function setPosition(p) {
+            botRow(p.bot, p.symbol).children[2].textContent =
+                p.qty ? ` | Position: ${p.qty} @ $${p.avg_price.toFixed(2)}` : '';
+        }
+        function addTrade(t) {
+            const box = document.getElementById('trades');
+            if (!box.querySelector('.trade')) box.innerHTML = '';
+            const d = document.createElement('div'); d.className = 'trade';
+            d.innerHTML = '<strong></strong><span></span>';
+            d.children[0].textContent = t.timestamp;
+            d.children[1].textContent = ` - ${t.action} ${t.quantity} ${t.symbol} @ $${t.price.toFixed(2)}`;
+            box.appendChild(d);
+            while (box.children.length > 10) box.removeChild(box.firstChild);
+        }
+        const events = new EventSource('/events?since={{ events_cursor }}');
+        events.addEventListener('status', e => setStatus(JSON.parse(e.data)));
+        events.addEventListener('position', e => setPosition(JSON.parse(e.data)));
+        events.addEventListener('fill', e => addTrade(JSON.parse(e.data)));
+        events.addEventListener('snapshot', e => {
+            const s = JSON.parse(e.data);
+            document.getElementById('bots').innerHTML = s.bots.length ? '' : '<p id="no-bots">No bots running.</p>';
+            s.bots.forEach(b => { setStatus({bot: b.bot_id, ...b}); setPosition({bot: b.bot_id, ...b.position}); });
+            document.getElementById('trades').innerHTML = s.trades.length ? '' : '<p>No trading activity yet.</p>';
+            s.trades.forEach(addTrade);
+        });
     </script>
 </body>
 </html>
 """
 
 class TradingBot:
-    def __init__(self, symbol, poll_secs):
+    """Moving-average paper trader for one symbol, fed ticks by the shared price poller."""
+    def __init__(self, bot_id, symbol, poll_secs):
+        self.id = bot_id
         self.symbol = symbol
         self.poll_secs = poll_secs
         self.running = False
-        self.data_provider = YFinanceProvider()
+        self.status = "stopped"
         self.strategy = MovingAverageCross(20, 50)
         self.risk_manager = RiskManager(RiskConfig())
         self.broker = PaperBroker()
         self.position = self.broker.position(symbol)
-        self.history = pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
+        self.history = OHLCVRingBuffer(5000)
+        self.trades = []
+        self.last_tick = None
+        self._published = (0, 0.0)
+    
+    def publish_position(self):
+        state = (self.position.qty, self.position.avg_price)
+        if state != self._published:
+            self._published = state
+            bot_events.publish("position", {"bot": self.id, **_position_dict(self.position)})
+    
+    def set_status(self, status):
+        self.status = status
+        bot_events.publish("status", {"bot": self.id, "status": status, "symbol": self.symbol})
+    
+    def start(self):
+        self.running = True
+        self.set_status("running")
+    
+    def stop(self):
+        self.running = False
+        self.set_status("stopped")
         
     def update_history(self, price, ts):
-        row = pd.DataFrame({
-            "open": [price], "high": [price], "low": [price], 
-            "close": [price], "volume": [float("nan")]
-        }, index=[pd.to_datetime(ts)])
-        self.history = pd.concat([self.history, row]).tail(5000)
-        
-    def run(self):
-        global trading_history, bot_status
-        bot_status = "running"
-        
-        while self.running:
-            try:
-                # Fetch current price
-                tick = self.data_provider.latest(self.symbol)
-                price = float(tick["price"])
-                ts = tick["ts"]
-                
-                # Add to price history
-                self.update_history(price, ts)
-                
-                # Check for trading signals
-                if len(self.history) > 50:  # Wait for enough data
-                    sig = self.strategy.generate_signals(self.history)
-                    current = int(sig.iloc[-1]) if len(sig) else 0
-                    
-                    # Execute trades
-                    if current > 0 and self.position.qty <= 0:
-                        # Place buy order
-                        qty = max(1, self.risk_manager.position_size(10000.0, price, 0.02))
-                        fill = self.broker.submit(
-                            type('Order', (), {
-                                'symbol': self.symbol, 'side': type('Side', (), {'BUY': 'BUY'})().BUY,
-                                'qty': qty, 'price': None, 'ts': ts, 'tag': 'web-entry'
-                            })(),
-                            ref_price=price
-                        )
-                        
-                        trading_history.append(type('Trade', (), {
-                            'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S'),
-                            'action': 'BUY',
-                            'quantity': qty,
-                            'symbol': self.symbol,
-                            'price': price
-                        })())
-                        
-                        print(f"[Web] BUY {qty} {self.symbol} @ {price}")
-                        
-                    elif current < 0 and self.position.qty > 0:
-                        # Place sell order
-                        qty = abs(self.position.qty)
-                        fill = self.broker.submit(
-                            type('Order', (), {
-                                'symbol': self.symbol, 'side': type('Side', (), {'SELL': 'SELL'})().SELL,
-                                'qty': qty, 'price': None, 'ts': ts, 'tag': 'web-exit'
-                            })(),
-                            ref_price=price
-                        )
-                        
-                        trading_history.append(type('Trade', (), {
-                            'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S'),
-                            'action': 'SELL',
-                            'quantity': qty,
-                            'symbol': self.symbol,
-                            'price': price
-                        })())
-                        
-                        print(f"[Web] SELL {qty} {self.symbol} @ {price}")
-                
-                self.position = self.broker.position(self.symbol)
-                time.sleep(self.poll_secs)
-                
-            except Exception as e:
-                print(f"Error in trading bot: {e}")
-                time.sleep(self.poll_secs)
+        self.history.append_price(ts, price)
+    
+    def _trade(self, side, qty, price, ts, tag):
+        self.broker.submit(Order(self.symbol, side, qty, None, ts, tag=tag), ref_price=price)
+        trade = {"timestamp": ts.strftime('%Y-%m-%d %H:%M:%S'), "action": side.value,
+                 "quantity": qty, "symbol": self.symbol, "price": price}
+        self.trades.append(trade)
+        del self.trades[:-100]
+        bot_events.publish("fill", {"bot": self.id, **trade})
+        print(f"[Web] {side.value} {qty} {self.symbol} @ {price}")
         
-        bot_status = "stopped"
+    def on_tick(self, tick):
+        # The poller may run faster than this bot's interval; skip ticks until it is due
+        ts = tick["ts"]
+        if not self.running or (self.last_tick is not None and (ts - self.last_tick).total_seconds() < self.poll_secs):
+            return
+        self.last_tick = ts
+        try:
+            price = float(tick["price"])
+            instrument.TICKS.inc(symbol=self.symbol)
+            
+            # Add to price history
+            self.update_history(price, ts)
+            current = self.strategy.on_tick(price)
+            
+            # Check for trading signals
+            if len(self.history) > 50:  # Wait for enough data
+                if current > 0 and self.position.qty <= 0:
+                    qty = max(1, self.risk_manager.position_size(10000.0, price, 0.02))
+                    self._trade(Side.BUY, qty, price, ts, "web-entry")
+                elif current < 0 and self.position.qty > 0:
+                    self._trade(Side.SELL, abs(self.position.qty), price, ts, "web-exit")
+            
+            self.position = self.broker.position(self.symbol)
+            self.publish_position()
+            
+        except Exception as e:
+            print(f"Error in trading bot {self.id}: {e}")
+    
+    def to_dict(self):
+        return {"bot_id": self.id, "symbol": self.symbol, "status": self.status, "poll_secs": self.poll_secs,
+                "position": _position_dict(self.position), "trades": len(self.trades),
+                "last_tick": self.last_tick.isoformat() if self.last_tick else None}
+
+def _position_dict(pos):
+    return {"symbol": pos.symbol, "qty": pos.qty, "avg_price": pos.avg_price}
+
+def _recent_trades(n=10):
+    return sorted((t for b in list(bots.bots.values()) for t in b.trades[-n:]), key=lambda t: t["timestamp"])[-n:]
+
+def _snapshot() -> dict:
+    """Full dashboard state, for new clients and ones whose cursor fell out of the event buffer."""
+    return {"bots": [b.to_dict() for b in list(bots.bots.values())], "trades": _recent_trades()}
 
 @app.route('/')
 def home():
-    global bot_status, trading_history, backtest_results
+    latest = backtest_jobs.latest()
     return render_template_string(HTML_TEMPLATE, 
-                                bot_status=bot_status, 
-                                trading_history=trading_history,
-                                backtest_results=getattr(app, 'backtest_results', None))
+                                bots=[b.to_dict() for b in list(bots.bots.values())],
+                                trading_history=_recent_trades(),
+                                events_cursor=bot_events.last_id,
+                                backtest_results=latest.future.result()["metrics"] if latest else None)
 
-@app.route('/start', methods=['POST'])
-def start_bot():
-    global trading_bot, bot_thread, bot_status
-    
-    if bot_status == "running":
-        return jsonify({"status": "error", "message": "Bot is already running"})
-    
+@app.route('/bots', methods=['POST'])
+def create_bot():
     symbol = request.form.get('symbol', 'AAPL').upper()
-    poll_secs = int(request.form.get('poll_secs', 5))
-    
-    trading_bot = TradingBot(symbol, poll_secs)
-    trading_bot.running = True
-    bot_thread = threading.Thread(target=trading_bot.run)
-    bot_thread.daemon = True
-    bot_thread.start()
+    try:
+        poll_secs = int(request.form.get('poll_secs', 5))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Bad parameters: {e}"}), 400
     
-    return jsonify({"status": "success", "message": f"Started trading {symbol}"})
+    bot_id = uuid.uuid4().hex[:8]
+    try:
+        bots.add(TradingBot(bot_id, symbol, poll_secs), bot_id)
+        bots.start(bot_id)
+    except TooManyBots as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    return jsonify({"status": "success", "message": f"Started trading {symbol}", "bot_id": bot_id,
+                    "status_url": f"/bots/{bot_id}"}), 201
 
-@app.route('/stop', methods=['POST'])
-def stop_bot():
-    global trading_bot, bot_status
-    
-    if trading_bot:
-        trading_bot.running = False
-        bot_status = "stopped"
-        return jsonify({"status": "success", "message": "Stopped trading bot"})
-    
-    return jsonify({"status": "error", "message": "No bot running"})
+@app.route('/bots')
+def list_bots():
+    return jsonify({**bots.status(), "quotes": quotes.stats()})
+
+@app.route('/quotes')
+def latest_quotes():
+    symbols = [s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()]
+    if not symbols:
+        return jsonify({"status": "error", "message": "Pass ?symbols=AAPL,MSFT"}), 400
+    try:
+        got = quotes.latest_many(symbols)
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Quote fetch failed: {e}"}), 502
+    return jsonify({s: {"price": t["price"], "ts": t["ts"].isoformat()} for s, t in got.items()})
+
+@app.route('/bots/<bot_id>')
+def bot_detail(bot_id):
+    bot = bots.get(bot_id)
+    if bot is None:
+        return jsonify({"status": "error", "message": "Unknown bot"}), 404
+    return jsonify({**bot.to_dict(), "recent_trades": bot.trades[-10:]})
+
+@app.route('/bots/<bot_id>/start', methods=['POST'])
+def start_bot(bot_id):
+    if bots.get(bot_id) is None:
+        return jsonify({"status": "error", "message": "Unknown bot"}), 404
+    try:
+        bots.start(bot_id)
+    except TooManyBots as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    return jsonify({"status": "success", "bot": bots.get(bot_id).to_dict()})
+
+@app.route('/bots/<bot_id>/stop', methods=['POST'])
+def stop_bot(bot_id):
+    if bots.get(bot_id) is None:
+        return jsonify({"status": "error", "message": "Unknown bot"}), 404
+    bots.stop(bot_id)
+    return jsonify({"status": "success", "bot": bots.get(bot_id).to_dict()})
+
+@app.route('/bots/<bot_id>', methods=['DELETE'])
+def delete_bot(bot_id):
+    if bots.get(bot_id) is None:
+        return jsonify({"status": "error", "message": "Unknown bot"}), 404
+    bots.remove(bot_id)
+    return jsonify({"status": "success", "message": f"Removed bot {bot_id}"})
 
 @app.route('/backtest', methods=['POST'])
 def run_backtest():
-    global backtest_results
-    
     symbol = request.form.get('symbol', 'AAPL').upper()
     start_date = request.form.get('start', '2022-01-01')
     end_date = request.form.get('end', '2024-12-31')
     
     try:
-        provider = YFinanceProvider()
-        df = provider.history(symbol, start_date, end_date)
-        strat = MovingAverageCross(20, 50)
-        risk = RiskManager(RiskConfig())
-        broker = PaperBroker()
-        bt = Backtester(df, strat, 100000, broker, risk)
-        res = bt.run(symbol)
-        
-        app.backtest_results = res.metrics
-        return jsonify({"status": "success", "message": "Backtest completed", "results": res.metrics})
-        
-    except Exception as e:
-        return jsonify({"status": "error", "message": f"Backtest failed: {str(e)}"})
+        fast = int(request.form.get('fast', 20))
+        slow = int(request.form.get('slow', 50))
+        job_id = backtest_jobs.submit(run_backtest_job, symbol, start_date, end_date, fast, slow)
+    except QueueFull as e:
+        return jsonify({"status": "error", "message": f"Backtest queue is full ({e})"}), 503
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Bad parameters: {e}"}), 400
+    
+    return jsonify({"status": "success", "message": "Backtest queued", "job_id": job_id,
+                    "status_url": f"/backtest/{job_id}", "stream_url": f"/backtest/{job_id}/stream"}), 202
+
+@app.route('/backtest/<job_id>')
+def backtest_status(job_id):
+    # ?wait=N long-polls for up to N seconds before answering
+    try:
+        wait = min(float(request.args.get('wait', 0)), 60.0)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Bad parameters: {e}"}), 400
+    job = backtest_jobs.wait(job_id, wait) if wait > 0 else backtest_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/backtest/<job_id>/stream')
+def backtest_stream(job_id):
+    if backtest_jobs.get(job_id) is None:
+        return jsonify({"status": "error", "message": "Unknown job"}), 404
+    
+    def events():
+        last = None
+        while True:
+            job = backtest_jobs.wait(job_id, 15)
+            state = job.to_dict()
+            if state["status"] != last:
+                last = state["status"]
+                yield f"event: status\ndata: {json.dumps(state)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if job.finished is not None:
+                return
+    
+    return Response(events(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@functools.lru_cache(maxsize=64)
+def _chart_png(job_id, kind):
+    points = backtest_jobs.get(job_id).future.result()["curves"][kind]
+    s = pd.Series([v for _, v in points], index=pd.to_datetime([t for t, _ in points], unit="ms", utc=True))
+    return render_png(s, "Equity Curve" if kind == "equity" else "Drawdown", fill=kind == "drawdown")
+
+@app.route('/backtest/<job_id>/chart/<kind>.png')
+def backtest_chart(job_id, kind):
+    job = backtest_jobs.get(job_id)
+    if job is None or kind not in ("equity", "drawdown"):
+        return jsonify({"status": "error", "message": "Unknown job or chart"}), 404
+    if job.status != "done":
+        return jsonify({"status": "error", "message": f"Backtest is {job.status}"}), 409
+    try:
+        png = _chart_png(job_id, kind)
+    except ModuleNotFoundError:
+        return jsonify({"status": "error", "message": "matplotlib is not installed"}), 501
+    return Response(png, mimetype="image/png", headers={"Cache-Control": "max-age=3600"})
+
+@app.route('/backtest/jobs')
+def backtest_queue_stats():
+    return jsonify(backtest_jobs.stats())
+
+@app.route('/events')
+def events():
+    """Server-sent dashboard updates. The cursor comes from Last-Event-ID (set by
+    EventSource on reconnect) or ?since=; ?poll=1 long-polls and returns JSON instead.
+    """
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        cursor = int(cursor) if cursor not in (None, '') else None
+    except ValueError:
+        cursor = None   # not one of our ids: resync from a snapshot
+    
+    if request.args.get('poll'):
+        batch = bot_events.wait(cursor, 25) if cursor is not None else None
+        if batch is None:
+            return jsonify({"cursor": bot_events.last_id, "snapshot": _snapshot(), "events": []})
+        return jsonify({"cursor": batch[-1][0] if batch else cursor,
+                        "events": [{"id": i, "type": t, "data": d} for i, t, d in batch]})
+    
+    def stream(cursor):
+        if cursor is None or bot_events.since(cursor) is None:
+            cursor = bot_events.last_id
+            yield sse(cursor, "snapshot", _snapshot())
+        while True:
+            batch = bot_events.wait(cursor, 15)
+            if batch is None:
+                # Fell behind the buffer; resync from a fresh snapshot
+                cursor = bot_events.last_id
+                yield sse(cursor, "snapshot", _snapshot())
+                continue
+            if not batch:
+                yield ": keep-alive\n\n"
+            for i, t, d in batch:
+                cursor = i
+                yield sse(i, t, d)
+    
+    return Response(stream(cursor), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/metrics')
+def metrics():
+    return Response(instrument.REGISTRY.render(), mimetype="text/plain; version=0.0.4")
 
 @app.route('/health')
 def health():
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
 if __name__ == '__main__':
+    # The web app reports to /metrics unless started with INSTRUMENT=0; importing it changes nothing
+    instrument.enable(os.environ.get("INSTRUMENT", "1") != "0")
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8080)))
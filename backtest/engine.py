@@ -1,6 +1,10 @@
 from __future__ import annotations
 from datetime import datetime
+import numpy as np
 import pandas as pd
+from backtest.exits import BOTH_RULES, ExitResolver, settle
+from core.instrument import BARS, STAGE_SECONDS
+from core.tradelog import TradeLog
 from core.types import Order, Side
 from risk.metrics import Risk
 
@@ -10,40 +14,85 @@ class BacktestResult:
         self.equity_curve = equity_curve
         self.metrics = metrics
 
+def _as_series(obj) -> pd.Series:
+    # yfinance returns (field, ticker) columns, so df["close"] can be a one-column frame
+    return obj.iloc[:, 0] if isinstance(obj, pd.DataFrame) else obj
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """For every bar, index of the first bar at or after it where mask is set (len(mask) if none)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
 class Backtester:
-    def __init__(self, data: pd.DataFrame, strategy, initial_cash: float, broker, risk_manager):
-        self.df = data.sort_index().copy()
+    """Single-symbol, long-only backtest. exits="close" checks stops and takes against
+    each bar's close and fills there; exits="intrabar" checks them against the bar's
+    low/high, fills at the level (or the open on a gap) and settles bars that touch
+    both levels by `both` ("stop", "take" or "open", see backtest.exits.settle).
+    """
+    def __init__(self, data: pd.DataFrame, strategy, initial_cash: float, broker, risk_manager,
+                 exits: str = "close", both: str = "stop"):
+        if exits not in ("close", "intrabar"):
+            raise ValueError(f"Unknown exits {exits!r}, expected 'close' or 'intrabar'")
+        if both not in BOTH_RULES:
+            raise ValueError(f"Unknown both-touch rule {both!r}, expected one of {BOTH_RULES}")
+        self.exits = exits
+        self.both = both
+        # The engine never writes to df, so sorted input (e.g. BarStore frames) is used as is, without a copy
+        self.df = data if data.index.is_monotonic_increasing else data.sort_index()
         self.strategy = strategy
         self.cash = float(initial_cash)
         self.broker = broker
         self.risk = risk_manager
 
-    def run(self, symbol: str, benchmark: pd.Series | None = None) -> BacktestResult:
-        px = self.df["close"].astype(float)
-        sig = self.strategy.generate_signals(self.df)
+    def run(self, symbol: str, benchmark: pd.Series | None = None, mode: str = "loop") -> BacktestResult:
+        """Run the strategy over the data.
+        mode="loop" walks bar by bar and is the reference engine; mode="vectorized"
+        works on NumPy arrays and jumps between trades, producing the same result.
+        """
+        if mode not in ("loop", "vectorized"):
+            raise ValueError(f"Unknown mode {mode!r}, expected 'loop' or 'vectorized'")
+        with STAGE_SECONDS.time(stage=f"backtest_{mode}"):
+            trades, eq = self._run_loop(symbol) if mode == "loop" else self._run_vectorized(symbol)
+        BARS.inc(len(self.df), mode=mode)
+        return BacktestResult(trades, eq, self._metrics(eq, benchmark))
+
+    def _bars(self, index) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Open, high and low that stops and takes are checked against, aligned to index."""
+        if self.exits == "close":
+            px = _as_series(self.df["close"]).reindex(index).to_numpy(dtype=float)
+            return px, px, px
+        missing = [c for c in ("open", "high", "low") if c not in self.df]
+        if missing:
+            raise ValueError(f"exits='intrabar' needs {missing} columns")
+        return tuple(_as_series(self.df[c]).reindex(index).to_numpy(dtype=float) for c in ("open", "high", "low"))
+
+    def _run_loop(self, symbol: str):
+        px = _as_series(self.df["close"]).astype(float)
+        sig = _as_series(self.strategy.generate_signals(self.df))
         ret = px.pct_change()
         roll_vol = ret.rolling(20).std().bfill()
         pos = self.broker.position(symbol)
         equity_curve = []
-        trades = []
+        trades = TradeLog()
         stop = take = None
+        op, hi, lo = self._bars(sig.index)
 
-        for ts in sig.index:
-            s = int(sig.loc[ts].iloc[0])
-            price = float(px.loc[ts].iloc[0])
+        for i, ts in enumerate(sig.index):
+            s = int(sig.loc[ts])
+            price = float(px.loc[ts])
             # Check stop loss / take profit
-            if pos.qty != 0 and stop is not None and take is not None:
-                if (price <= stop and pos.qty > 0) or (price >= take and pos.qty > 0):
-                    qty = abs(pos.qty)
-                    o = Order(symbol, Side.SELL, qty, price, ts, tag="exit")
-                    fill = self.broker.submit(o, ref_price=price)
-                    self.cash += fill.order.qty * fill.fill_price - fill.commission
-                    trades.append(fill)
-                    pos = self.broker.position(symbol)
-                    stop = take = None
+            if pos.qty > 0 and stop is not None and take is not None and (lo[i] <= stop or hi[i] >= take):
+                exit_px = float(settle(op[i], lo[i] <= stop, hi[i] >= take, stop, take, self.both)[1])
+                o = Order(symbol, Side.SELL, abs(pos.qty), exit_px, ts, tag="exit")
+                fill = self.broker.submit(o, ref_price=exit_px)
+                self.cash += fill.order.qty * fill.fill_price - fill.commission
+                trades.append(fill)
+                pos = self.broker.position(symbol)
+                stop = take = None
 
             if s > 0 and pos.qty <= 0:
-                qty = self.risk.position_size(self.cash + pos.qty*price, price, float(roll_vol.loc[ts].iloc[0]))
+                qty = self.risk.position_size(self.cash + pos.qty*price, price, float(roll_vol.loc[ts]))
                 if qty > 0:
                     o = Order(symbol, Side.BUY, qty, price, ts, tag="entry")
                     fill = self.broker.submit(o, ref_price=price)
@@ -62,17 +111,79 @@ class Backtester:
 
             equity_curve.append((ts, self.cash + pos.qty*price))
 
-        eq = pd.Series(dict(equity_curve)).sort_index()
-        rets = Risk.daily_returns(eq)
-        metrics = {
-            "CAGR": (eq.iloc[-1] / eq.iloc[0]) ** (252/max(len(rets),1)) - 1 if len(eq) > 1 else float("nan"),
-            "Sharpe": Risk.sharpe(rets),
-            "Sortino": Risk.sortino(rets),
-            "Volatility": Risk.volatility(rets),
-            "MaxDrawdown": Risk.max_drawdown(eq),
-            "Calmar": Risk.calmar(eq),
-            "VaR_95": Risk.historical_var(rets, 0.95),
-        }
+        eq = pd.Series(dict(equity_curve), dtype=float).sort_index()
+        return trades, eq
+
+    def _run_vectorized(self, symbol: str):
+        sig = _as_series(self.strategy.generate_signals(self.df))
+        index = sig.index
+        px_s = _as_series(self.df["close"]).astype(float)
+        roll_vol = px_s.pct_change().rolling(20).std().bfill()
+        px = px_s.reindex(index).to_numpy(dtype=float)
+        vol = roll_vol.reindex(index).to_numpy(dtype=float)
+        s = sig.to_numpy().astype(int)
+        n = len(index)
+        next_buy = _next_true(s > 0)
+        next_sell = _next_true(s < 0)
+        resolver = ExitResolver(*self._bars(index))
+
+        pos = self.broker.position(symbol)
+        trades = TradeLog()
+        # State after each trade: (bar, cash, qty); equity between trades is cash + qty*price
+        ev_bar, ev_cash, ev_qty = [], [], []
+        cash0, qty0 = self.cash, pos.qty
+        stop = take = None
+
+        def _trade(side, qty, j, tag, price=None):
+            price = float(px[j]) if price is None else price
+            o = Order(symbol, side, qty, price, index[j], tag=tag)
+            fill = self.broker.submit(o, ref_price=price)
+            if side == Side.BUY:
+                self.cash -= fill.order.qty * fill.fill_price + fill.commission
+            else:
+                self.cash += fill.order.qty * fill.fill_price - fill.commission
+            trades.append(fill)
+            ev_bar.append(j); ev_cash.append(self.cash); ev_qty.append(self.broker.position(symbol).qty)
+            return fill
+
+        i = 0
+        while i < n:
+            if pos.qty > 0:
+                # Exit on the first bar with a sell signal or a stop/take touch, whichever comes first
+                j = int(next_sell[i]); tag = "flip/flat"; exit_px = None
+                if stop is not None and take is not None:
+                    bar, reason, price = resolver.first(i, stop, take, j, self.both)
+                    if reason:
+                        j, tag, exit_px = bar, "exit", price
+                if j >= n:
+                    break
+                _trade(Side.SELL, abs(pos.qty), j, tag, exit_px)
+                pos = self.broker.position(symbol)
+                stop = take = None
+                # A stop exit is checked before signals, so the same bar may re-enter
+                i = j if tag == "exit" else j + 1
+            else:
+                j = int(next_buy[i])
+                if j >= n:
+                    break
+                price = float(px[j])
+                qty = self.risk.position_size(self.cash + pos.qty*price, price, float(vol[j]))
+                if qty > 0:
+                    fill = _trade(Side.BUY, qty, j, "entry")
+                    pos = self.broker.position(symbol)
+                    stop, take = self.risk.stop_levels(fill.fill_price)
+                i = j + 1
+
+        # Forward-fill the post-trade state onto every bar
+        state = np.searchsorted(np.asarray(ev_bar, dtype=np.int64), np.arange(n), side="right")
+        cash = np.concatenate(([cash0], ev_cash))[state]
+        qty = np.concatenate(([qty0], ev_qty))[state]
+        eq = pd.Series(cash + qty*px, index=index, dtype=float).sort_index()
+        return trades, eq
+
+    @staticmethod
+    def _metrics(eq: pd.Series, benchmark: pd.Series | None = None) -> dict:
+        metrics = Risk.summary(eq)
         if benchmark is not None:
-            metrics["Beta"] = Risk.beta(rets, benchmark.pct_change().dropna())
-        return BacktestResult(trades, eq, metrics)
\ No newline at end of file
+            metrics["Beta"] = Risk.beta(Risk.daily_returns(eq), benchmark.pct_change().dropna())
+        return metrics
@@ -0,0 +1,56 @@
+from __future__ import annotations
+import numpy as np
+
+# Exit reasons returned by ExitResolver.first
+NONE, STOP, TAKE = 0, 1, 2
+BOTH_RULES = ("stop", "take", "open")
+
+def settle(open_, stop_hit, take_hit, stop, take, both: str = "stop"):
+    """Reason and fill price of a long exit on a bar that touched its stop and/or take.
+    A bar that touches both exits by `both`: "stop" assumes the worst, "take" the best,
+    "open" whichever level is nearer the bar's open. A bar that gaps through a level
+    fills at the open. Works element-wise on arrays and on scalars.
+    """
+    stop_hit, take_hit = np.asarray(stop_hit, dtype=bool), np.asarray(take_hit, dtype=bool)
+    if both == "stop":
+        first_stop = stop_hit
+    elif both == "take":
+        first_stop = stop_hit & ~take_hit
+    elif both == "open":
+        first_stop = stop_hit & (~take_hit | (open_ - stop <= take - open_))
+    else:
+        raise ValueError(f"Unknown both-touch rule {both!r}, expected one of {BOTH_RULES}")
+    reason = np.where(first_stop, STOP, np.where(take_hit, TAKE, NONE))
+    price = np.where(first_stop, np.fmin(open_, stop), np.where(take_hit, np.fmax(open_, take), np.nan))
+    return reason, price
+
+class ExitResolver:
+    """First-touch stop-loss / take-profit exits for long trades from intrabar highs and lows.
+    first() scans ahead from the entry in doubling windows (starting at `block` bars),
+    so a trade costs about as much as the bars it is held. For close-only data pass
+    the close as all three.
+    """
+    def __init__(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, block: int = 64):
+        self.open = np.asarray(open_, dtype=float)
+        self.high = np.asarray(high, dtype=float)
+        self.low = np.asarray(low, dtype=float)
+        self.n = len(self.low)
+        self.block = block
+
+    def first(self, start: int, stop: float, take: float, end: int | None = None,
+              both: str = "stop") -> tuple[int, int, float]:
+        """For a trade watched from bar `start` to `end` (inclusive), the first bar where
+        low <= stop or high >= take, as (bar, reason, price). Returns (n, NONE, nan) if
+        neither level is touched; a NaN stop or take is never touched.
+        """
+        end = self.n - 1 if end is None else min(end, self.n - 1)
+        lo, w = start, self.block
+        while lo <= end:
+            hi = min(lo + w, end + 1)
+            hit = (self.low[lo:hi] <= stop) | (self.high[lo:hi] >= take)
+            if hit.any():
+                j = lo + int(hit.argmax())
+                reason, price = settle(self.open[j], self.low[j] <= stop, self.high[j] >= take, stop, take, both)
+                return j, int(reason), float(price)
+            lo, w = hi, w * 2
+        return self.n, NONE, float("nan")
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import itertools, os, threading, time, uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# One provider and result cache per worker process, reused across jobs. Set
+# BACKTEST_CACHE_DIR to share results between workers and restarts on disk, and
+# OHLCV_STORE_DIR to read bars from a BarStore (filled by `cli ... --store`) that
+# all workers map instead of each holding its own copy.
+_PROVIDER = None
+_STORE = None
+_RESULTS = None
+CHART_POINTS = 1000
+
+def run_backtest_job(symbol: str, start: str, end: str, fast: int = 20, slow: int = 50,
+                     initial_cash: float = 100000.0) -> dict:
+    """The /backtest job body, run in a worker process. Returns plain JSON-able data."""
+    global _PROVIDER, _RESULTS, _STORE
+    from backtest.engine import Backtester
+    from backtest.resultcache import ResultCache
+    from brokers.paper import PaperBroker
+    from charts.report import curves
+    from data.barstore import BarStore, BarStoreProvider
+    from data.cache import CachingProvider
+    from data.providers import YFinanceProvider
+    from risk.manager import RiskManager, RiskConfig
+    from strategy.sma_cross import MovingAverageCross
+    if _PROVIDER is None:
+        _PROVIDER = CachingProvider(YFinanceProvider())
+        _RESULTS = ResultCache(cache_dir=os.getenv("BACKTEST_CACHE_DIR"))
+        # Read-only here: several workers must not append to the same series
+        _STORE = BarStoreProvider(BarStore()) if os.getenv("OHLCV_STORE_DIR") else None
+    try:
+        df = _STORE.history(symbol, start, end) if _STORE is not None else None
+    except RuntimeError:
+        df = None   # the store does not cover the whole range
+    if df is None:
+        df = _PROVIDER.history(symbol, start, end)
+    bt = Backtester(df, MovingAverageCross(fast, slow), initial_cash, PaperBroker(), RiskManager(RiskConfig()))
+    hits = _RESULTS.hits
+    res = _RESULTS.run(bt, symbol)
+    # Chart-ready curves, downsampled so the job result stays small: [[epoch ms, value], ...]
+    eq, dd = curves(res.equity_curve, CHART_POINTS)
+    as_points = lambda s: [[int(t.value // 1_000_000), float(v)] for t, v in s.items()]
+    return {"metrics": {k: float(v) for k, v in res.metrics.items()}, "trades": len(res.trades),
+            "cached": _RESULTS.hits > hits, "curves": {"equity": as_points(eq), "drawdown": as_points(dd)}}
+
+class QueueFull(RuntimeError):
+    pass
+
+class Job:
+    __slots__ = ("id", "key", "future", "submitted", "finished", "seq")
+    def __init__(self, id: str, key, future, seq: int):
+        self.id, self.key, self.future, self.seq = id, key, future, seq
+        self.submitted = time.time()
+        self.finished = None
+
+    @property
+    def status(self) -> str:
+        f = self.future
+        if not f.done():
+            return "running" if f.running() else "queued"
+        return "failed" if f.cancelled() or f.exception() is not None else "done"
+
+    def to_dict(self) -> dict:
+        out = {"job_id": self.id, "status": self.status, "submitted": self.submitted, "finished": self.finished}
+        if out["status"] == "done":
+            out["result"] = self.future.result()
+        elif out["status"] == "failed":
+            out["error"] = "cancelled" if self.future.cancelled() else str(self.future.exception())
+        return out
+
+class JobQueue:
+    """Runs jobs on a bounded process pool and hands back an ID straight away.
+    At most `max_workers` jobs run at once and `max_pending` may be waiting or
+    running; beyond that submit() raises QueueFull. Submitting a key that is
+    already queued or running returns the existing job instead of a new one.
+    The last `keep` finished jobs stay available for polling.
+    """
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, keep: int = 256, executor=None, on_done=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.keep = keep
+        self.on_done = on_done          # called with each Job as it finishes, off the lock
+        self._executor = executor       # created on first submit, so importing never forks
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.inflight: dict = {}        # key -> job id
+        self.deduped = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers)
+        return self._executor
+
+    def submit(self, fn, *args, key=None) -> str:
+        key = (getattr(fn, "__qualname__", repr(fn)), args) if key is None else key
+        with self._lock:
+            jid = self.inflight.get(key)
+            if jid is not None:
+                self.deduped += 1
+                return jid
+            if len(self.inflight) >= self.max_pending:
+                raise QueueFull(f"{len(self.inflight)} jobs already pending")
+            job = Job(uuid.uuid4().hex[:12], key, self._pool().submit(fn, *args), next(self._seq))
+            self.jobs[job.id] = job
+            self.inflight[key] = job.id
+        job.future.add_done_callback(lambda _f, job=job: self._finish(job))
+        return job.id
+
+    def _finish(self, job: Job):
+        with self._lock:
+            job.finished = time.time()
+            self.inflight.pop(job.key, None)
+            # Drop the oldest finished jobs beyond `keep`
+            done = [j for j in self.jobs.values() if j.finished is not None]
+            for j in done[:max(0, len(done) - self.keep)]:
+                del self.jobs[j.id]
+            self._done.notify_all()
+        if self.on_done is not None:
+            self.on_done(job)
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Job | None:
+        """Block until the job finishes or `timeout` passes; returns the job either way."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._done:
+            job = self.jobs.get(job_id)
+            while job is not None and job.finished is None:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    break
+                self._done.wait(left)
+        return job
+
+    def latest(self) -> Job | None:
+        """Most recently submitted job that finished successfully."""
+        done = [j for j in list(self.jobs.values()) if j.finished is not None and j.status == "done"]
+        return max(done, key=lambda j: j.seq) if done else None
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for j in list(self.jobs.values()):
+            counts[j.status] = counts.get(j.status, 0) + 1
+        return {"workers": self.max_workers, "max_pending": self.max_pending, "pending": len(self.inflight),
+                "deduped": self.deduped, **counts}
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from core.tradelog import TradeLog
+from core.types import Order, Side
+from backtest.engine import BacktestResult, Backtester
+
+FIELDS = ["open","high","low","close","volume"]
+
+class PortfolioResult(BacktestResult):
+    def __init__(self, trades, equity_curve: pd.Series, metrics: dict, attribution: pd.DataFrame, positions: pd.DataFrame):
+        super().__init__(trades, equity_curve, metrics)
+        # Per-symbol P&L (cash flows + marked position value) and share counts, bars x symbols
+        self.attribution = attribution
+        self.positions = positions
+
+def make_panel(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Align per-symbol OHLCV frames on the union of their timestamps.
+    Columns are a (field, symbol) MultiIndex, the layout yfinance returns for
+    a multi-ticker download, so panel["close"] is a bars x symbols frame.
+    """
+    cols = {}
+    for sym, df in frames.items():
+        for f in FIELDS:
+            col = df[f]
+            cols[(f, sym)] = (col.iloc[:, 0] if isinstance(col, pd.DataFrame) else col).astype(float)
+    panel = pd.DataFrame(cols).sort_index()
+    panel.columns = pd.MultiIndex.from_tuples(panel.columns, names=["field","symbol"])
+    return panel
+
+class PortfolioBacktester:
+    """Trades one strategy across many symbols from a single cash balance.
+    Signals and volatility are computed for all symbols at once; the bar loop
+    works on length-N arrays, so cost grows linearly with the symbol count.
+    Each entry is sized by the risk manager on an equal 1/N share of equity.
+    """
+    def __init__(self, data: pd.DataFrame | dict[str, pd.DataFrame], strategy, initial_cash: float, broker, risk_manager):
+        self.panel = make_panel(data) if isinstance(data, dict) else data.sort_index()
+        self.symbols = list(self.panel["close"].columns)
+        self.strategy = strategy
+        self.cash = float(initial_cash)
+        self.broker = broker
+        self.risk = risk_manager
+
+    def run(self, benchmark: pd.Series | None = None) -> PortfolioResult:
+        close = self.panel["close"].astype(float)
+        index = close.index
+        px = close.to_numpy()
+        mark = close.ffill().to_numpy()
+        sig = self.strategy.generate_signals(self.panel).reindex(index).fillna(0).to_numpy().astype(int)
+        vol = close.pct_change().rolling(20).std().bfill().to_numpy()
+        T, N = px.shape
+
+        qty = np.array([self.broker.position(s).qty for s in self.symbols], dtype=np.int64)
+        flows = np.zeros(N)
+        stop = np.full(N, np.nan); take = np.full(N, np.nan)
+        equity = np.empty(T)
+        attribution = np.empty((T, N)); positions = np.empty((T, N), dtype=np.int64)
+        trades = TradeLog()
+
+        def _trade(j, side, q, price, ts, tag):
+            o = Order(self.symbols[j], side, int(q), float(price), ts, tag=tag)
+            fill = self.broker.submit(o, ref_price=float(price))
+            gross = fill.order.qty * fill.fill_price
+            flow = (gross if side == Side.SELL else -gross) - fill.commission
+            self.cash += flow; flows[j] += flow
+            qty[j] = self.broker.position(self.symbols[j]).qty
+            trades.append(fill)
+            return fill
+
+        for t in range(T):
+            p = px[t]; ts = index[t]
+            valid = ~np.isnan(p)
+            # Stop loss / take profit first, as in the single-symbol engine
+            with np.errstate(invalid="ignore"):
+                hit = (qty > 0) & valid & ((p <= stop) | (p >= take))
+            for j in np.flatnonzero(hit):
+                _trade(j, Side.SELL, qty[j], p[j], ts, "exit")
+            stop[hit] = take[hit] = np.nan
+            s = sig[t]
+            flips = (s < 0) & (qty > 0) & valid
+            for j in np.flatnonzero(flips):
+                _trade(j, Side.SELL, qty[j], p[j], ts, "flip/flat")
+            stop[flips] = take[flips] = np.nan
+            entries = np.flatnonzero((s > 0) & (qty <= 0) & valid)
+            if len(entries):
+                budget = (self.cash + np.nansum(qty * mark[t])) / N
+                for j in entries:
+                    q = self.risk.position_size(budget, float(p[j]), float(vol[t, j]))
+                    if q > 0:
+                        fill = _trade(j, Side.BUY, q, p[j], ts, "entry")
+                        stop[j], take[j] = self.risk.stop_levels(fill.fill_price)
+            value = np.where(qty != 0, qty * mark[t], 0.0)
+            attribution[t] = flows + value
+            positions[t] = qty
+            equity[t] = self.cash + value.sum()
+
+        eq = pd.Series(equity, index=index, dtype=float)
+        metrics = Backtester._metrics(eq, benchmark)
+        return PortfolioResult(trades, eq, metrics,
+                               pd.DataFrame(attribution, index=index, columns=self.symbols),
+                               pd.DataFrame(positions, index=index, columns=self.symbols))
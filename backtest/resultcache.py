@@ -0,0 +1,137 @@
+from __future__ import annotations
+import contextlib, dataclasses, hashlib, json, os, pickle, tempfile, threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from core.instrument import CACHE
+
+def _scalars(obj) -> dict:
+    """Plain-valued attributes of a strategy/broker; skips caches, positions and streaming state."""
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    return {k: v for k, v in vars(obj).items() if not k.startswith("_") and isinstance(v, (int, float, str, bool, type(None)))}
+
+def data_hash(df: pd.DataFrame | pd.Series | None) -> str:
+    """Digest of the index and values, so a revised or extended download is a different key."""
+    if df is None:
+        return ""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.DatetimeIndex(df.index).as_unit("ns").asi8.tobytes() if isinstance(df.index, pd.DatetimeIndex)
+             else np.asarray(df.index).tobytes())
+    h.update(np.ascontiguousarray(df.to_numpy(dtype=float)).tobytes())
+    return h.hexdigest()
+
+def result_key(bt, symbol: str, mode: str = "loop", benchmark: pd.Series | None = None) -> str:
+    """Cache key for bt.run(symbol, benchmark, mode): symbol, date range, strategy
+    parameters, RiskConfig, broker costs, exit rule, starting cash and a hash of the bars.
+    """
+    df = bt.df
+    spec = {
+        "symbol": symbol, "mode": mode,
+        "start": str(df.index[0]) if len(df) else None, "end": str(df.index[-1]) if len(df) else None,
+        "strategy": [type(bt.strategy).__name__, _scalars(bt.strategy)],
+        "risk": _scalars(bt.risk.cfg), "broker": [type(bt.broker).__name__, _scalars(bt.broker)],
+        "cash": bt.cash, "position": bt.broker.position(symbol).qty, "exits": [bt.exits, bt.both],
+        "data": data_hash(df), "benchmark": data_hash(benchmark),
+    }
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+class ResultCache:
+    """Memoized BacktestResults: an in-memory LRU of `max_items` results and,
+    with a cache_dir, an on-disk tier of pickles trimmed to `max_bytes` by
+    evicting the least recently used files. Disk hits are promoted to memory.
+    """
+    def __init__(self, max_items: int = 128, cache_dir: str | None = None, max_bytes: int = 512 << 20):
+        self.max_items = max_items
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._mem: OrderedDict[str, object] = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def _remember(self, key: str, result):
+        self._mem[key] = result
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            res = self._mem.get(key)
+            if res is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                CACHE.inc(cache="backtest", result="hit")
+                return res
+            if self.cache_dir:
+                try:
+                    with open(self._path(key), "rb") as f:
+                        res = pickle.load(f)
+                    os.utime(self._path(key))   # mtime doubles as last use for eviction
+                except (OSError, pickle.UnpicklingError, EOFError):
+                    res = None
+                if res is not None:
+                    self._remember(key, res)
+                    self.hits += 1; self.disk_hits += 1
+                    CACHE.inc(cache="backtest", result="hit")
+                    return res
+            self.misses += 1
+            CACHE.inc(cache="backtest", result="miss")
+            return None
+
+    def put(self, key: str, result):
+        with self._lock:
+            self._remember(key, result)
+            if not self.cache_dir:
+                return
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+            self._evict()
+
+    def _evict(self):
+        # Other processes may share the directory, so files can vanish under us
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                with contextlib.suppress(FileNotFoundError):
+                    st = os.stat(os.path.join(self.cache_dir, name))
+                    files.append((st.st_mtime, st.st_size, name))
+        total = sum(s for _, s, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+
+    def run(self, bt, symbol: str, benchmark: pd.Series | None = None, mode: str = "loop"):
+        """bt.run(symbol, benchmark, mode), or the stored result of an identical earlier
+        run. A hit never touches the engine, so bt's broker positions are left as they were.
+        """
+        key = result_key(bt, symbol, mode, benchmark)
+        res = self.get(key)
+        if res is None:
+            res = bt.run(symbol, benchmark, mode=mode)
+            self.put(key, res)
+        return res
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "items": len(self._mem)}
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self.cache_dir:
+                for name in os.listdir(self.cache_dir):
+                    if name.endswith(".pkl"):
+                        with contextlib.suppress(FileNotFoundError):
+                            os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,102 @@
+from __future__ import annotations
+import itertools, os
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtest.engine import Backtester, _as_series
+from brokers.paper import PaperBroker
+from risk.manager import RiskManager, RiskConfig
+from strategy.sma_cross import MovingAverageCross
+
+COLUMNS = ["open","high","low","close","volume"]
+
+# Per-worker state, filled once by _init_worker
+_WORKER: dict = {}
+
+def _frame_to_block(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, str | None, str]:
+    df = df.sort_index()
+    block = np.column_stack([_as_series(df[c]).to_numpy(dtype=float) for c in COLUMNS])
+    idx = pd.DatetimeIndex(df.index)
+    tz = str(idx.tz) if idx.tz is not None else None
+    return block, idx.as_unit("ns").asi8.copy(), tz, idx.unit
+
+@contextmanager
+def shared_frame(df: pd.DataFrame):
+    """Copy the OHLCV columns and index of df into one SharedMemory block.
+    Yields (name, rows, tz, unit) for attach_frame(); the block is unlinked on exit.
+    """
+    block, ts, tz, unit = _frame_to_block(df)
+    n = len(block)
+    shm = shared_memory.SharedMemory(create=True, size=max(n * (len(COLUMNS) + 1) * 8, 1))
+    try:
+        buf = np.ndarray((n, len(COLUMNS) + 1), dtype=np.float64, buffer=shm.buf)
+        buf[:, 0] = ts.view(np.float64)
+        buf[:, 1:] = block
+        del buf
+        yield shm.name, n, tz, unit
+    finally:
+        shm.close(); shm.unlink()
+
+def attach_frame(name: str, n: int, tz: str | None, unit: str = "ns") -> tuple[shared_memory.SharedMemory, pd.DataFrame]:
+    """Map a shared_frame() block as a DataFrame; keep the returned shm alive while the frame is used."""
+    # Workers share the parent's resource tracker, so only the parent's unlink() releases the segment
+    shm = shared_memory.SharedMemory(name=name)
+    buf = np.ndarray((n, len(COLUMNS) + 1), dtype=np.float64, buffer=shm.buf)
+    idx = pd.DatetimeIndex(buf[:, 0].view(np.int64), tz="UTC" if tz else None).as_unit(unit)
+    if tz:
+        idx = idx.tz_convert(tz)
+    return shm, pd.DataFrame(buf[:, 1:], index=idx, columns=COLUMNS, copy=False)
+
+def _init_worker(frame: tuple, symbol: str, initial_cash: float, broker_kw: dict):
+    shm, df = attach_frame(*frame)
+    _WORKER.update(shm=shm, df=df, symbol=symbol, initial_cash=initial_cash, broker_kw=broker_kw)
+
+def _run_one(params: dict) -> dict:
+    params = dict(params)
+    strat = MovingAverageCross(params.pop("fast"), params.pop("slow"))
+    bt = Backtester(_WORKER["df"], strat, _WORKER["initial_cash"], PaperBroker(**_WORKER["broker_kw"]),
+                    RiskManager(RiskConfig(**params)))
+    res = bt.run(_WORKER["symbol"], mode="vectorized")
+    return {**res.metrics, "Trades": len(res.trades)}
+
+def param_grid(fast, slow, **risk_grid) -> list[dict]:
+    """Cartesian product of fast/slow windows and RiskConfig fields, skipping fast >= slow."""
+    valid = {f.name for f in fields(RiskConfig)}
+    unknown = set(risk_grid) - valid
+    if unknown:
+        raise ValueError(f"Unknown RiskConfig fields: {sorted(unknown)}")
+    keys = list(risk_grid)
+    grid = []
+    for f, s, *rest in itertools.product(fast, slow, *(risk_grid[k] for k in keys)):
+        if 1 < f < s:
+            grid.append({"fast": int(f), "slow": int(s), **dict(zip(keys, rest))})
+    return grid
+
+def sweep(df: pd.DataFrame, symbol: str, fast, slow, *, initial_cash: float = 100000,
+          slippage_bps: float = 1.0, commission: float = 0.0, processes: int | None = None,
+          rank_by: str = "Sharpe", chunksize: int | None = None, **risk_grid) -> pd.DataFrame:
+    """Backtest every parameter combination and return metrics ranked by `rank_by`.
+    The OHLCV block is copied into shared memory once; workers attach to it
+    instead of receiving a pickled DataFrame per task.
+    """
+    grid = param_grid(fast, slow, **risk_grid)
+    if not grid:
+        raise ValueError("Parameter grid is empty (need 1 < fast < slow)")
+    broker_kw = {"slippage_bps": slippage_bps, "commission_per_share": commission}
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        _WORKER.update(df=df, symbol=symbol, initial_cash=float(initial_cash), broker_kw=broker_kw)
+        try:
+            rows = [_run_one(p) for p in grid]
+        finally:
+            _WORKER.clear()
+    else:
+        chunksize = chunksize or max(1, len(grid) // (processes * 4))
+        with shared_frame(df) as frame, ProcessPoolExecutor(
+                processes, initializer=_init_worker, initargs=(frame, symbol, float(initial_cash), broker_kw)) as ex:
+            rows = list(ex.map(_run_one, grid, chunksize=chunksize))
+    out = pd.concat([pd.DataFrame(grid), pd.DataFrame(rows)], axis=1)
+    return out.sort_values(rank_by, ascending=False, na_position="last", kind="stable").reset_index(drop=True)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from backtest.engine import BacktestResult, Backtester, _as_series
+from backtest.sweep import attach_frame, param_grid, shared_frame
+from brokers.paper import PaperBroker
+from core.tradelog import TradeLog
+from risk.manager import RiskManager, RiskConfig
+from strategy.sma_cross import MovingAverageCross, RollingMeanCache
+
+# Per-worker state, filled once by _init_worker
+_WORKER: dict = {}
+
+class WalkForwardResult(BacktestResult):
+    def __init__(self, trades, equity_curve: pd.Series, metrics: dict, windows: pd.DataFrame):
+        super().__init__(trades, equity_curve, metrics)
+        # One row per window: date bounds, chosen parameters, in-sample score and OOS metrics
+        self.windows = windows
+
+def windows(n: int, train: int, test: int, step: int | None = None, anchored: bool = False) -> list[tuple[int,int,int,int]]:
+    """(train_start, train_end, test_start, test_end) bar positions, ends exclusive.
+    Rolling windows keep `train` bars; anchored windows always start at bar 0.
+    """
+    if train <= 0 or test <= 0:
+        raise ValueError("train and test must be positive")
+    step = step or test
+    out = []
+    b = train
+    while b + test <= n:
+        out.append((0 if anchored else b - train, b, b, b + test))
+        b += step
+    return out
+
+def _setup(df: pd.DataFrame, symbol: str, initial_cash: float, broker_kw: dict, grid: list[dict], rank_by: str):
+    _WORKER.update(df=df, cache=RollingMeanCache(_as_series(df["close"])), symbol=symbol,
+                   initial_cash=initial_cash, broker_kw=broker_kw, grid=grid, rank_by=rank_by)
+
+def _init_worker(frame: tuple, *args):
+    shm, df = attach_frame(*frame)
+    _WORKER["shm"] = shm
+    _setup(df, *args)
+
+def _backtest(df: pd.DataFrame, params: dict) -> BacktestResult:
+    params = dict(params)
+    strat = MovingAverageCross(params.pop("fast"), params.pop("slow"), cache=_WORKER["cache"])
+    bt = Backtester(df, strat, _WORKER["initial_cash"], PaperBroker(**_WORKER["broker_kw"]),
+                    RiskManager(RiskConfig(**params)))
+    return bt.run(_WORKER["symbol"], mode="vectorized")
+
+def _run_window(win: tuple[int,int,int,int]) -> dict:
+    a, b, c, d = win
+    df, rank_by = _WORKER["df"], _WORKER["rank_by"]
+    train, test = df.iloc[a:b], df.iloc[c:d]
+    best, best_score = _WORKER["grid"][0], float("nan")
+    for params in _WORKER["grid"]:
+        score = _backtest(train, params).metrics[rank_by]
+        # NaN scores rank last, as in sweep()
+        if score > best_score or (np.isnan(best_score) and not np.isnan(score)):
+            best, best_score = params, score
+    oos = _backtest(test, best)
+    return {"params": best, "score": best_score, "equity": oos.equity_curve, "metrics": oos.metrics, "trades": oos.trades}
+
+def walk_forward(df: pd.DataFrame, symbol: str, fast, slow, *, train: int, test: int, step: int | None = None,
+                 anchored: bool = False, initial_cash: float = 100000, slippage_bps: float = 1.0,
+                 commission: float = 0.0, rank_by: str = "Sharpe", processes: int | None = None,
+                 **risk_grid) -> WalkForwardResult:
+    """Optimize on each train window, trade the best parameters on the following
+    test window, and chain the out-of-sample equity curves into one.
+    Windows run in parallel; each worker computes every SMA length once over the
+    full series and reuses it for all windows and parameter sets it handles.
+    """
+    known = Backtester._metrics(pd.Series([1.0, 1.0]))
+    if rank_by not in known:
+        raise ValueError(f"Unknown rank_by {rank_by!r}, expected one of {sorted(known)}")
+    df = df.sort_index()
+    grid = param_grid(fast, slow, **risk_grid)
+    if not grid:
+        raise ValueError("Parameter grid is empty (need 1 < fast < slow)")
+    wins = windows(len(df), train, test, step, anchored)
+    if not wins:
+        raise ValueError(f"Not enough bars ({len(df)}) for a {train}+{test} window")
+    setup = (symbol, float(initial_cash), {"slippage_bps": slippage_bps, "commission_per_share": commission}, grid, rank_by)
+    processes = min(processes or os.cpu_count() or 1, len(wins))
+    if processes == 1:
+        _setup(df, *setup)
+        try:
+            results = [_run_window(w) for w in wins]
+        finally:
+            _WORKER.clear()
+    else:
+        with shared_frame(df) as frame, ProcessPoolExecutor(processes, initializer=_init_worker,
+                                                            initargs=(frame, *setup)) as ex:
+            results = list(ex.map(_run_window, wins))
+
+    # Each OOS run starts from initial_cash; compound them onto the running capital
+    parts, capital, trades, rows = [], float(initial_cash), TradeLog(), []
+    for (a, b, c, d), r in zip(wins, results):
+        eq = r["equity"] / float(initial_cash) * capital
+        parts.append(eq); capital = float(eq.iloc[-1])
+        trades.extend(r["trades"])
+        rows.append({"train_start": df.index[a], "train_end": df.index[b-1], "test_start": df.index[c],
+                     "test_end": df.index[d-1], **r["params"], f"IS_{rank_by}": r["score"], **r["metrics"]})
+    eq = pd.concat(parts)
+    return WalkForwardResult(trades, eq, Backtester._metrics(eq), pd.DataFrame(rows))
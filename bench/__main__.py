@@ -0,0 +1,180 @@
+"""Offline benchmarks for the hot paths, on seeded synthetic data.
+
+    python -m bench                                   # default sizes, writes bench_output.json
+    python -m bench --preset full --out new.json      # up to 10M bars / 1,000 symbols
+    python -m bench --baseline base.json --threshold 0.25
+
+With --baseline, every case that is slower than baseline * (1 + threshold)
+is flagged and the exit status is 1.
+"""
+from __future__ import annotations
+import argparse, contextlib, io, json, platform, statistics, sys, time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from backtest.engine import Backtester
+from backtest.portfolio import PortfolioBacktester
+from brokers.paper import PaperBroker
+from data.bars import TimeBarAggregator
+from data.synthetic import gbm_bars, gbm_ticks
+from live.replay import replay
+from live.runner import LiveTrader
+from risk.manager import RiskManager, RiskConfig
+from risk.metrics import Risk
+from strategy.sma_cross import MovingAverageCross
+
+PRESETS = {
+    "quick": {"bars": [1_000, 10_000], "symbols": [1, 10]},
+    "default": {"bars": [1_000, 10_000, 100_000, 1_000_000], "symbols": [1, 10, 100]},
+    "full": {"bars": [1_000, 10_000, 100_000, 1_000_000, 10_000_000], "symbols": [1, 10, 100, 1_000]},
+}
+
+def _backtest(mode):
+    def prepare(n, k, seed):
+        df = gbm_bars(n, seed=seed)
+        return lambda: Backtester(df, MovingAverageCross(20, 50), 100_000.0, PaperBroker(),
+                                  RiskManager(RiskConfig())).run("SYM0000", mode=mode)
+    return prepare
+
+def _signals(n, k, seed):
+    df = gbm_bars(n, seed=seed)
+    return lambda: MovingAverageCross(20, 50).generate_signals(df)
+
+def _risk_summary(n, k, seed):
+    eq = gbm_bars(n, seed=seed)["close"] * 1000
+    return lambda: Risk.summary(eq)
+
+def _risk_batch(n, k, seed):
+    curves = np.stack([df["close"].to_numpy() for df in _as_dict(gbm_bars(n, k, seed=seed)).values()])
+    return lambda: Risk.batch(curves)
+
+def _portfolio(n, k, seed):
+    frames = _as_dict(gbm_bars(n, k, seed=seed))
+    return lambda: PortfolioBacktester(frames, MovingAverageCross(20, 50), 100_000.0, PaperBroker(),
+                                       RiskManager(RiskConfig())).run()
+
+def _live_ticks(n, k, seed):
+    t = gbm_ticks(n, seed=seed)
+    ticks = list(zip(t["price"].tolist(), t["ts"].dt.to_pydatetime()))
+    def run():
+        trader = LiveTrader(None, PaperBroker(), MovingAverageCross(20, 50), RiskManager(RiskConfig()))
+        st = trader.state
+        st.pos = trader.broker.position("SYM0000")
+        with contextlib.redirect_stdout(io.StringIO()):   # fills print a line each
+            for price, ts in ticks:
+                trader._handle_tick(st, "SYM0000", price, ts)
+    return run
+
+def _live_replay(n, k, seed):
+    # The same path, fed through run_websocket by the replay source
+    t = gbm_ticks(n, seed=seed)
+    return lambda: replay(LiveTrader(None, PaperBroker(), MovingAverageCross(20, 50), RiskManager(RiskConfig())), t)
+
+def _tick_bars(n, k, seed):
+    t = gbm_ticks(n, k, seed=seed)
+    ts = pd.DatetimeIndex(t["ts"]).as_unit("ns").asi8
+    ticks = list(zip(t["symbol"].tolist(), t["price"].tolist(), t["size"].tolist(), ts.tolist()))
+    def run():
+        agg = TimeBarAggregator("1m")
+        for sym, price, size, ts in ticks:
+            agg.update(sym, price, size, ts)
+        agg.flush()
+    return run
+
+def _as_dict(frames):
+    return frames if isinstance(frames, dict) else {"SYM0000": frames}
+
+# name -> (prepare(n, symbols, seed) -> callable, dimension it scales over, max size for that dimension)
+# Per-bar Python paths are capped so the default preset finishes in minutes.
+CASES = {
+    "backtest_loop": (_backtest("loop"), "bars", 100_000),
+    "backtest_vectorized": (_backtest("vectorized"), "bars", None),
+    "signals": (_signals, "bars", None),
+    "risk_summary": (_risk_summary, "bars", None),
+    "live_ticks": (_live_ticks, "bars", 100_000),
+    "live_replay": (_live_replay, "bars", 100_000),
+    "tick_to_bars": (_tick_bars, "bars", 1_000_000),
+    "risk_batch": (_risk_batch, "symbols", None),
+    "portfolio_backtest": (_portfolio, "symbols", None),
+}
+
+def _time(fn, repeat: int, budget: float) -> list[float]:
+    """Wall times of up to `repeat` calls, stopping early once `budget` seconds are spent."""
+    times, spent = [], 0.0
+    while len(times) < repeat and (not times or spent < budget):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+        spent += times[-1]
+    return times
+
+def run(cases: list[str], bars: list[int], symbols: list[int], *, symbol_bars: int = 2520, seed: int = 7,
+        repeat: int = 5, budget: float = 5.0, log=print) -> dict:
+    results = []
+    for name in cases:
+        prepare, dim, cap = CASES[name]
+        sizes = [(n, 1) for n in bars] if dim == "bars" else [(symbol_bars, k) for k in symbols]
+        for n, k in sizes:
+            if cap is not None and (n if dim == "bars" else k) > cap:
+                continue
+            fn = prepare(n, k, seed)
+            times = _time(fn, repeat, budget)
+            best = min(times)
+            row = {"name": name, "bars": n, "symbols": k, "repeats": len(times), "best_s": best,
+                   "median_s": statistics.median(times), "per_s": n * k / best if best > 0 else float("inf")}
+            results.append(row)
+            log(f"{name:<20} bars={n:<10,} symbols={k:<6,} best={best*1e3:10.2f} ms  {row['per_s']:14,.0f} bars|ticks/s")
+    return {"meta": {"created": datetime.now(timezone.utc).isoformat(timespec="seconds"), "seed": seed,
+                     "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+                     "machine": platform.machine(), "platform": platform.platform()},
+            "results": results}
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25) -> list[dict]:
+    """Match cases by (name, bars, symbols) and flag those slower than baseline by more than `threshold`."""
+    base = {(r["name"], r["bars"], r["symbols"]): r for r in baseline.get("results", [])}
+    out = []
+    for r in current["results"]:
+        b = base.get((r["name"], r["bars"], r["symbols"]))
+        if b is None:
+            continue
+        ratio = r["best_s"] / b["best_s"] if b["best_s"] > 0 else float("inf")
+        out.append({"name": r["name"], "bars": r["bars"], "symbols": r["symbols"], "baseline_s": b["best_s"],
+                    "best_s": r["best_s"], "ratio": ratio, "regression": ratio > 1 + threshold})
+    return out
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(prog="python -m bench", description="Offline benchmark suite")
+    p.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    p.add_argument("--cases", nargs="+", choices=sorted(CASES), help="Subset of benchmarks to run")
+    p.add_argument("--bars", type=int, nargs="+", help="Bar counts (overrides the preset)")
+    p.add_argument("--symbols", type=int, nargs="+", help="Symbol counts (overrides the preset)")
+    p.add_argument("--symbol-bars", type=int, default=2520, help="Bars per symbol for the multi-symbol cases")
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--repeat", type=int, default=5, help="Max timed runs per case (best is reported)")
+    p.add_argument("--budget", type=float, default=5.0, help="Stop repeating a case after this many seconds")
+    p.add_argument("--out", default="bench_output.json")
+    p.add_argument("--baseline", help="Earlier results JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging, 0.25 = 25%%")
+    args = p.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    res = run(args.cases or list(CASES), args.bars or preset["bars"], args.symbols or preset["symbols"],
+              symbol_bars=args.symbol_bars, seed=args.seed, repeat=args.repeat, budget=args.budget)
+    with open(args.out, "w") as f:
+        json.dump(res, f, indent=2)
+    print("Results saved:", args.out)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        rows = compare(res, json.load(f), args.threshold)
+    print(f"\nAgainst {args.baseline} (threshold {args.threshold:.0%}):")
+    for r in rows:
+        flag = "REGRESSION" if r["regression"] else ""
+        print(f"{r['name']:<20} bars={r['bars']:<10,} symbols={r['symbols']:<6,} {r['ratio']:6.2f}x  {flag}")
+    bad = sum(r["regression"] for r in rows)
+    print(f"{bad} regression(s) in {len(rows)} compared case(s)")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,48 @@
 from __future__ import annotations
-import os, requests
+import asyncio, os, requests, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict
+import numpy as np
+from requests.adapters import HTTPAdapter
+from core.instrument import ORDERS, STAGE_SECONDS, timed
 from core.types import Order, Fill, Position, Side
 
+class RequestStats:
+    """Latency samples per endpoint, safe to record from pool threads."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, list[float]] = {}
+        self._errors: Dict[str, int] = {}
+    def record(self, endpoint: str, seconds: float, ok: bool = True):
+        with self._lock:
+            self._samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+    def summary(self) -> dict:
+        with self._lock:
+            out = {}
+            for ep, xs in self._samples.items():
+                ms = np.asarray(xs) * 1e3
+                out[ep] = {"count": len(xs), "errors": self._errors.get(ep, 0), "mean_ms": float(ms.mean()),
+                           "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+                           "max_ms": float(ms.max())}
+            return out
+
+def _order_payload(order: Order) -> dict:
+    side = "buy" if order.side == Side.BUY else "sell"
+    typ = "market" if order.price is None else "limit"
+    payload = {"symbol": order.symbol, "qty": order.qty, "side": side, "type": typ, "time_in_force": "day"}
+    if order.price is not None:
+        payload["limit_price"] = order.price
+    return payload
+
+def _trade_price(data: dict) -> float:
+    for k in ("p","price"):
+        if k in data.get("trade", {}):
+            return float(data["trade"][k])
+    raise RuntimeError("No price field in latest trade")
+
 class AlpacaBroker:
     def __init__(self):
         self.base = os.getenv("ALPACA_BASE_URL", "https://paper-api.alpaca.markets")
@@ -12,28 +51,98 @@ class AlpacaBroker:
         if not (self.key and self.secret):
             raise RuntimeError("Set ALPACA_API_KEY and ALPACA_API_SECRET")
         self._positions: Dict[str, Position] = {}
+        # One keep-alive session instead of a new TLS handshake per call
+        self.session = requests.Session()
+        self.session.headers.update(self._headers())
     def _headers(self):
         return {"APCA-API-KEY-ID": self.key, "APCA-API-SECRET-KEY": self.secret}
+    @timed("submit")
     def submit(self, order: Order, *, ref_price: float | None = None) -> Fill:
-        side = "buy" if order.side == Side.BUY else "sell"
-        typ = "market" if order.price is None else "limit"
-        payload = {"symbol": order.symbol, "qty": order.qty, "side": side, "type": typ, "time_in_force": "day"}
-        if order.price is not None:
-            payload["limit_price"] = order.price
-        r = requests.post(f"{self.base}/v2/orders", headers=self._headers(), json=payload, timeout=15)
+        r = self.session.post(f"{self.base}/v2/orders", json=_order_payload(order), timeout=15)
         r.raise_for_status()
         px = ref_price if ref_price is not None else self.latest_price(order.symbol)
         fill = Fill(order=order, fill_price=float(px), commission=0.0, ts=datetime.now(timezone.utc))
         pos = self._positions.setdefault(order.symbol, Position(order.symbol))
         pos.update(fill)
+        ORDERS.inc(broker="alpaca", side=Side(order.side).value)
         return fill
     def latest_price(self, symbol: str) -> float:
-        r = requests.get(f"{self.base}/v2/stocks/{symbol}/trades/latest", headers=self._headers(), timeout=10)
+        r = self.session.get(f"{self.base}/v2/stocks/{symbol}/trades/latest", timeout=10)
         r.raise_for_status()
-        data = r.json()
-        for k in ("p","price"):
-            if k in data.get("trade", {}):
-                return float(data["trade"][k])
-        raise RuntimeError("No price field in latest trade")
+        return _trade_price(r.json())
     def position(self, symbol: str) -> Position:
-        return self._positions.get(symbol, Position(symbol))
\ No newline at end of file
+        return self._positions.get(symbol, Position(symbol))
+
+class AsyncAlpacaBroker(AlpacaBroker):
+    """Alpaca broker for asyncio callers. The *_async methods, latest_prices and
+    submit_many are coroutines; the inherited submit and latest_price stay blocking.
+    Requests go through one pooled keep-alive session on a bounded thread pool,
+    so orders for many symbols run concurrently, and a batch of quotes is one
+    multi-symbol request. Per-endpoint latency is kept in self.stats.
+    """
+    def __init__(self, max_connections: int = 16):
+        super().__init__()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+        self.session.mount("http://", adapter); self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_connections, thread_name_prefix="alpaca")
+        self.stats = RequestStats()
+
+    def _timed(self, endpoint: str, method: str, url: str, **kw) -> dict:
+        t0 = time.perf_counter(); ok = False
+        try:
+            r = self.session.request(method, url, **kw)
+            r.raise_for_status()
+            ok = True
+            return r.json()
+        finally:
+            self.stats.record(endpoint, time.perf_counter() - t0, ok)
+
+    async def _call(self, endpoint: str, method: str, url: str, **kw) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, lambda: self._timed(endpoint, method, url, **kw))
+
+    async def latest_price_async(self, symbol: str) -> float:
+        return _trade_price(await self._call("latest_trade", "GET", f"{self.base}/v2/stocks/{symbol}/trades/latest", timeout=10))
+
+    async def latest_prices(self, symbols: list[str]) -> Dict[str, float]:
+        """Latest trade price of every symbol from one multi-symbol request."""
+        uniq = list(dict.fromkeys(symbols))
+        data = await self._call("latest_trades", "GET", f"{self.base}/v2/stocks/trades/latest",
+                                params={"symbols": ",".join(uniq)}, timeout=10)
+        trades = data.get("trades", {})
+        missing = [s for s in uniq if s not in trades]
+        if missing:
+            raise RuntimeError(f"No latest trade for {', '.join(missing)}")
+        return {s: _trade_price({"trade": trades[s]}) for s in uniq}
+
+    async def submit_async(self, order: Order, *, ref_price: float | None = None) -> Fill:
+        with STAGE_SECONDS.time(stage="submit"):
+            if ref_price is None:
+                # Quote lookup overlaps with the order round trip instead of following it
+                _, px = await asyncio.gather(self._call("orders", "POST", f"{self.base}/v2/orders", json=_order_payload(order), timeout=15),
+                                             self.latest_price_async(order.symbol))
+            else:
+                await self._call("orders", "POST", f"{self.base}/v2/orders", json=_order_payload(order), timeout=15)
+                px = ref_price
+        fill = Fill(order=order, fill_price=float(px), commission=0.0, ts=datetime.now(timezone.utc))
+        pos = self._positions.setdefault(order.symbol, Position(order.symbol))
+        pos.update(fill)
+        ORDERS.inc(broker="alpaca", side=Side(order.side).value)
+        return fill
+
+    async def submit_many(self, orders: list[Order], ref_prices: Dict[str, float] | None = None) -> list[Fill]:
+        """Submit orders concurrently; symbols without a ref price are quoted in one batch first."""
+        ref_prices = dict(ref_prices or {})
+        missing = [o.symbol for o in orders if o.symbol not in ref_prices]
+        if missing:
+            ref_prices.update(await self.latest_prices(missing))
+        return list(await asyncio.gather(*(self.submit_async(o, ref_price=ref_prices[o.symbol]) for o in orders)))
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.session.close()
+
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc):
+        self.close()
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Dict
+from core.instrument import ORDERS, timed
 from core.types import Order, Fill, Position, Side
 
 class PaperBroker:
@@ -13,6 +14,7 @@ class PaperBroker:
         slip = px * (self.slippage_bps / 1e4)
         return px + slip if side == Side.BUY else px - slip
 
+    @timed("submit")
     def submit(self, order: Order, *, ref_price: float | None = None) -> Fill:
         # Market orders need ref_price, limit orders use order.price
         px = order.price if order.price is not None else ref_price
@@ -21,8 +23,10 @@ class PaperBroker:
         fill_px = self._apply_slippage(float(px), order.side)
         comm = self.commission_per_share * order.qty
         pos = self.positions.setdefault(order.symbol, Position(order.symbol))
-        fill = Fill(order=order, fill_price=fill_px, commission=comm, ts=datetime.now(timezone.utc))
+        # Fill on the order's clock so backtests don't stamp every trade with wall time
+        fill = Fill(order=order, fill_price=fill_px, commission=comm, ts=order.ts or datetime.now(timezone.utc))
         pos.update(fill)
+        ORDERS.inc(broker="paper", side=Side(order.side).value)
         return fill
 
     def position(self, symbol: str) -> Position:
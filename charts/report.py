@@ -1,33 +1,133 @@
 from __future__ import annotations
+import io, os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 
+MAX_POINTS = 2000
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: indices of `n` points that keep the visual shape of y(x)."""
+    m = len(y)
+    if n >= m or n < 3:
+        return np.arange(m)
+    x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, m - 1, n - 1).astype(np.int64)   # n-2 buckets between the fixed end points
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the triangle's third corner
+        nlo, nhi = hi, edges[i + 2] if i + 2 < n - 1 else m
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def minmax(y: np.ndarray, n: int) -> np.ndarray:
+    """Indices of each bucket's min and max (in time order), about `n` points in all; keeps every spike."""
+    m = len(y)
+    if n >= m or n < 4:
+        return np.arange(m)
+    size = -(-m // (n // 2))
+    pad = np.full(-(-m // size) * size, np.nan)
+    pad[:m] = y
+    blocks = pad.reshape(-1, size)
+    base = np.arange(len(blocks)) * size
+    lo = base + np.nanargmin(blocks, axis=1)
+    hi = base + np.nanargmax(blocks, axis=1)
+    return np.unique(np.concatenate([[0, m - 1], lo, hi]))
+
+def downsample(s: pd.Series, n: int = MAX_POINTS, method: str = "lttb") -> pd.Series:
+    """At most about `n` points of s. "lttb" suits smooth curves such as equity;
+    "minmax" keeps every bucket's extremes, so drawdown troughs survive.
+    """
+    s = s.dropna()
+    if len(s) <= n:
+        return s
+    if method == "lttb":
+        x = s.index.as_unit("ns").asi8 if isinstance(s.index, pd.DatetimeIndex) else np.arange(len(s))
+        idx = lttb(x, s.to_numpy(dtype=float), n)
+    elif method == "minmax":
+        idx = minmax(s.to_numpy(dtype=float), n)
+    else:
+        raise ValueError(f"Unknown method {method!r}, expected 'lttb' or 'minmax'")
+    return s.iloc[idx]
+
+def drawdown(equity: pd.Series) -> pd.Series:
+    return equity / equity.cummax() - 1.0
+
+def render_png(series: pd.Series, title: str, fill: bool = False, size=(8, 4), dpi: int = 100) -> bytes:
+    """One line chart as PNG bytes; plots every point it is given, so downsample first."""
+    # Figure + Agg canvas: no pyplot state, no GUI backend, safe in threads and workers
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(series.index, series.to_numpy(), linewidth=1)
+    if fill:
+        ax.fill_between(series.index, series.to_numpy(), 0, alpha=0.3)
+    ax.set_title(title)
+    ax.grid(alpha=0.3)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+def _render_pair(equity: pd.Series, dd: pd.Series) -> dict[str, bytes]:
+    return {"equity": render_png(equity, "Equity Curve"), "drawdown": render_png(dd, "Drawdown", fill=True)}
+
+def curves(equity: pd.Series, max_points: int = MAX_POINTS) -> tuple[pd.Series, pd.Series]:
+    """Downsampled equity (LTTB) and drawdown (min/max); drawdown is taken on the full curve first."""
+    return downsample(equity, max_points, "lttb"), downsample(drawdown(equity), max_points, "minmax")
+
 class Report:
     @staticmethod
-    def equity_and_drawdown(equity: pd.Series, outpath: str) -> list[str]:
+    def render(equity: pd.Series, max_points: int = MAX_POINTS) -> dict[str, bytes]:
+        """PNG bytes of the equity and drawdown charts, from at most ~max_points points each.
+        Raises RuntimeError if matplotlib is not installed.
+        """
+        try:
+            import matplotlib  # noqa: F401
+        except ModuleNotFoundError:
+            raise RuntimeError("matplotlib is not installed (pip install matplotlib)")
+        return _render_pair(*curves(equity, max_points))
+
+    @staticmethod
+    def render_many(equities: dict[str, pd.Series], max_points: int = MAX_POINTS,
+                    processes: int | None = None) -> dict[str, dict[str, bytes]]:
+        """Report.render for many curves (e.g. every run of a sweep) across processes.
+        Curves are downsampled here, so workers only receive a few thousand points each.
+        """
+        pairs = {name: curves(eq, max_points) for name, eq in equities.items()}
+        processes = min(processes or os.cpu_count() or 1, len(pairs) or 1)
+        if processes == 1:
+            return {name: _render_pair(*p) for name, p in pairs.items()}
+        with ProcessPoolExecutor(processes) as ex:
+            futs = {name: ex.submit(_render_pair, *p) for name, p in pairs.items()}
+            return {name: f.result() for name, f in futs.items()}
+
+    @staticmethod
+    def equity_and_drawdown(equity: pd.Series, outpath: str, max_points: int = MAX_POINTS) -> list[str]:
         """Save equity and drawdown charts.
         Returns a list of saved file paths. If matplotlib is not installed,
         prints a friendly message and returns an empty list.
         """
         try:
-            import matplotlib.pyplot as plt  # import here to avoid dependency issues
-        except ModuleNotFoundError:
+            charts = Report.render(equity, max_points)
+        except RuntimeError:
             print("[Charts] matplotlib is not installed. Skipping chart generation.\n"
                   "Install with: pip install matplotlib")
             return []
         paths: list[str] = []
-        # Plot equity curve
-        plt.figure()
-        equity.plot(title="Equity Curve")
-        plt.tight_layout()
-        eq_path = outpath.replace(".png","_equity.png")
-        plt.savefig(eq_path)
-        plt.close(); paths.append(eq_path)
-        # Plot drawdown
-        plt.figure()
-        dd = equity / equity.cummax() - 1.0
-        dd.plot(title="Drawdown")
-        plt.tight_layout()
-        dd_path = outpath.replace(".png","_drawdown.png")
-        plt.savefig(dd_path)
-        plt.close(); paths.append(dd_path)
-        return paths
\ No newline at end of file
+        for kind, png in charts.items():
+            path = outpath.replace(".png", f"_{kind}.png")
+            with open(path, "wb") as f:
+                f.write(png)
+            paths.append(path)
+        return paths
@@ -1,6 +1,8 @@
 from __future__ import annotations
 import argparse, os, asyncio
 from data.providers import YFinanceProvider, AlpacaRealtime
+from data.barstore import BarStore, BarStoreProvider
+from data.cache import CachingProvider
 from brokers.paper import PaperBroker
 from brokers.alpaca import AlpacaBroker
 from strategy.sma_cross import MovingAverageCross
@@ -23,28 +25,111 @@ def _parser():
     bt.add_argument("--commission", type=float, default=0.0)
     bt.add_argument("--slippage-bps", type=float, default=1.0)
     bt.add_argument("--no-charts", action="store_true", help="Skip chart generation")
+    bt.add_argument("--mode", choices=["loop","vectorized"], default="loop", help="Backtest engine")
+    bt.add_argument("--exits", choices=["close","intrabar"], default="close",
+                    help="Check stops/takes against the close, or the bar's low/high with first-touch fills")
+    bt.add_argument("--both", choices=["stop","take","open"], default="stop",
+                    help="With --exits intrabar, which level a bar touching both hits first")
+    bt.add_argument("--no-cache", action="store_true", help="Always download and rerun, bypassing the bar and result caches")
+    bt.add_argument("--offline", action="store_true", help="Read bars from the local cache only")
+    bt.add_argument("--store", help="Serve bars from a memory-mapped BarStore in this directory, filling it on first use")
+    bt.add_argument("--trades-out", help="Write the trade log to a .csv or .parquet file")
+
+    sw = sub.add_parser("sweep", help="Backtest a grid of strategy/risk parameters in parallel")
+    sw.add_argument("--symbol", required=True)
+    sw.add_argument("--start", required=True)
+    sw.add_argument("--end", required=True)
+    sw.add_argument("--fast", type=int, nargs="+", required=True)
+    sw.add_argument("--slow", type=int, nargs="+", required=True)
+    sw.add_argument("--vol-target", type=float, nargs="+")
+    sw.add_argument("--stop-loss-pct", type=float, nargs="+")
+    sw.add_argument("--take-profit-pct", type=float, nargs="+")
+    sw.add_argument("--initial-cash", type=float, default=100000)
+    sw.add_argument("--commission", type=float, default=0.0)
+    sw.add_argument("--slippage-bps", type=float, default=1.0)
+    sw.add_argument("--processes", type=int, default=None, help="Worker processes (default: all cores)")
+    sw.add_argument("--rank-by", default="Sharpe")
+    sw.add_argument("--top", type=int, default=20, help="Rows to print")
+    sw.add_argument("--out", help="Write the full ranked table to this CSV")
+    sw.add_argument("--charts", type=int, default=0, help="Render equity/drawdown charts for the top N runs")
+    sw.add_argument("--charts-dir", default="sweep_charts")
+    sw.add_argument("--no-cache", action="store_true", help="Always download, bypassing the local bar cache")
+    sw.add_argument("--offline", action="store_true", help="Read bars from the local cache only")
+    sw.add_argument("--store", help="Serve bars from a memory-mapped BarStore in this directory, filling it on first use")
+
+    wf = sub.add_parser("walkforward", help="Walk-forward optimization with out-of-sample stitching")
+    wf.add_argument("--symbol", required=True)
+    wf.add_argument("--start", required=True)
+    wf.add_argument("--end", required=True)
+    wf.add_argument("--fast", type=int, nargs="+", required=True)
+    wf.add_argument("--slow", type=int, nargs="+", required=True)
+    wf.add_argument("--train-bars", type=int, default=504)
+    wf.add_argument("--test-bars", type=int, default=126)
+    wf.add_argument("--anchored", action="store_true", help="Grow the train window from the first bar")
+    wf.add_argument("--initial-cash", type=float, default=100000)
+    wf.add_argument("--processes", type=int, default=None, help="Worker processes (default: all cores)")
+    wf.add_argument("--rank-by", default="Sharpe")
+    wf.add_argument("--no-cache", action="store_true", help="Always download, bypassing the local bar cache")
+    wf.add_argument("--offline", action="store_true", help="Read bars from the local cache only")
+    wf.add_argument("--store", help="Serve bars from a memory-mapped BarStore in this directory, filling it on first use")
+
+    pf = sub.add_parser("portfolio", help="Backtest one strategy across many symbols with shared cash")
+    pf.add_argument("--symbols", nargs="+", required=True)
+    pf.add_argument("--start", required=True)
+    pf.add_argument("--end", required=True)
+    pf.add_argument("--fast", type=int, default=20)
+    pf.add_argument("--slow", type=int, default=50)
+    pf.add_argument("--initial-cash", type=float, default=100000)
+    pf.add_argument("--commission", type=float, default=0.0)
+    pf.add_argument("--slippage-bps", type=float, default=1.0)
+    pf.add_argument("--no-cache", action="store_true", help="Always download, bypassing the local bar cache")
+    pf.add_argument("--offline", action="store_true", help="Read bars from the local cache only")
+    pf.add_argument("--store", help="Serve bars from a memory-mapped BarStore in this directory, filling it on first use")
 
     lv = sub.add_parser("live", help="Run live trading")
-    lv.add_argument("--symbol", required=True)
+    lv.add_argument("--symbol", required=True, nargs="+", help="One or more symbols (several need --broker alpaca)")
     lv.add_argument("--fast", type=int, default=20)
     lv.add_argument("--slow", type=int, default=50)
     lv.add_argument("--broker", choices=["paper","alpaca"], default="paper")
     lv.add_argument("--poll-secs", type=int, default=10)
+    lv.add_argument("--queue-size", type=int, default=1000, help="Per-symbol tick queue size")
+    lv.add_argument("--backpressure", choices=["drop_oldest","conflate"], default="drop_oldest")
+    lv.add_argument("--bars", help="Aggregate websocket trades into bars first: 1s/1m/5m, volume:N or ticks:N")
+
+    rp = sub.add_parser("replay", help="Replay recorded trades through the live trader offline")
+    rp.add_argument("--file", required=True, help="Recorded trades: .csv, .parquet or .ndjson")
+    rp.add_argument("--symbol", nargs="+", help="Symbols to trade (default: every symbol in the file)")
+    rp.add_argument("--fast", type=int, default=20)
+    rp.add_argument("--slow", type=int, default=50)
+    rp.add_argument("--speed", type=float, help="1 = recorded pace, N = N times faster (default: as fast as possible)")
+    rp.add_argument("--runs", type=int, default=1, help="Replay several times and check the fills are identical")
 
     return p
 
 
+def _history_provider(args):
+    provider = YFinanceProvider() if args.no_cache else CachingProvider(YFinanceProvider(), offline=True if args.offline else None)
+    return BarStoreProvider(BarStore(args.store), provider) if args.store else provider
+
+
 def main(argv=None):
     args = _parser().parse_args(argv)
 
     if args.cmd == "backtest":
-        provider = YFinanceProvider()
+        provider = _history_provider(args)
         df = provider.history(args.symbol, args.start, args.end)
         strat = MovingAverageCross(args.fast, args.slow)
         risk = RiskManager(RiskConfig())
         broker = PaperBroker(slippage_bps=args.slippage_bps, commission_per_share=args.commission)
-        bt = Backtester(df, strat, args.initial_cash, broker, risk)
-        res = bt.run(args.symbol)
+        bt = Backtester(df, strat, args.initial_cash, broker, risk, exits=args.exits, both=args.both)
+        if args.no_cache:
+            res = bt.run(args.symbol, mode=args.mode)
+        else:
+            from backtest.resultcache import ResultCache
+            results = ResultCache(cache_dir=os.getenv("BACKTEST_CACHE_DIR", ".backtest_cache"))
+            res = results.run(bt, args.symbol, mode=args.mode)
+            if results.hits:
+                print("(cached result, identical to an earlier run; --no-cache to rerun)")
         print("\nBacktest metrics:")
         width = max(len(k) for k in res.metrics)
         for k,v in res.metrics.items():
@@ -52,6 +137,15 @@ def main(argv=None):
                 print(f"{k:<{width}} : {v:.4f}")
             except Exception:
                 print(f"{k:<{width}} : {v}")
+        print("\nTrade stats:")
+        for k,v in res.trades.stats(capital=args.initial_cash).items():
+            print(f"{k:<{width}} : {v:.4f}" if isinstance(v, float) else f"{k:<{width}} : {v}")
+        if args.trades_out:
+            if args.trades_out.endswith(".parquet"):
+                res.trades.to_parquet(args.trades_out)
+            else:
+                res.trades.to_frame().to_csv(args.trades_out, index=False)
+            print("Trades saved:", args.trades_out)
         # Generate charts
         if not args.no_charts:
             out = f"report_{args.symbol}_{args.start}_{args.end}.png"
@@ -61,6 +155,81 @@ def main(argv=None):
                 for pth in paths:
                     print(" -", pth)
 
+    elif args.cmd == "sweep":
+        from backtest.sweep import sweep
+        provider = _history_provider(args)
+        df = provider.history(args.symbol, args.start, args.end)
+        risk_grid = {k: v for k, v in (("vol_target", args.vol_target), ("stop_loss_pct", args.stop_loss_pct),
+                                       ("take_profit_pct", args.take_profit_pct)) if v}
+        table = sweep(df, args.symbol, args.fast, args.slow, initial_cash=args.initial_cash,
+                      slippage_bps=args.slippage_bps, commission=args.commission,
+                      processes=args.processes, rank_by=args.rank_by, **risk_grid)
+        print(f"\nTop {min(args.top, len(table))} of {len(table)} runs by {args.rank_by}:")
+        print(table.head(args.top).to_string(float_format=lambda v: f"{v:.4f}"))
+        if args.out:
+            table.to_csv(args.out, index=False)
+            print("Results saved:", args.out)
+        if args.charts:
+            equities = {}
+            for _, row in table.head(args.charts).iterrows():
+                bt = Backtester(df, MovingAverageCross(int(row["fast"]), int(row["slow"])), args.initial_cash,
+                                PaperBroker(slippage_bps=args.slippage_bps, commission_per_share=args.commission),
+                                RiskManager(RiskConfig(**{k: float(row[k]) for k in risk_grid})))
+                name = "_".join(f"{k}{row[k]:g}" for k in ["fast", "slow", *risk_grid])
+                equities[name] = bt.run(args.symbol, mode="vectorized").equity_curve
+            os.makedirs(args.charts_dir, exist_ok=True)
+            for name, pngs in Report.render_many(equities, processes=args.processes).items():
+                for kind, png in pngs.items():
+                    with open(os.path.join(args.charts_dir, f"{args.symbol}_{name}_{kind}.png"), "wb") as f:
+                        f.write(png)
+            print(f"Charts for the top {len(equities)} runs saved to {args.charts_dir}/")
+
+    elif args.cmd == "walkforward":
+        from backtest.walkforward import walk_forward
+        provider = _history_provider(args)
+        df = provider.history(args.symbol, args.start, args.end)
+        res = walk_forward(df, args.symbol, args.fast, args.slow, train=args.train_bars, test=args.test_bars,
+                           anchored=args.anchored, initial_cash=args.initial_cash,
+                           processes=args.processes, rank_by=args.rank_by)
+        cols = ["test_start","test_end","fast","slow",f"IS_{args.rank_by}",args.rank_by]
+        print(res.windows[cols].to_string(float_format=lambda v: f"{v:.4f}"))
+        print("\nOut-of-sample metrics:")
+        width = max(len(k) for k in res.metrics)
+        for k,v in res.metrics.items():
+            print(f"{k:<{width}} : {v:.4f}")
+
+    elif args.cmd == "portfolio":
+        from backtest.portfolio import PortfolioBacktester
+        provider = _history_provider(args)
+        frames = provider.history_many(args.symbols, args.start, args.end)
+        broker = PaperBroker(slippage_bps=args.slippage_bps, commission_per_share=args.commission)
+        pbt = PortfolioBacktester(frames, MovingAverageCross(args.fast, args.slow), args.initial_cash,
+                                  broker, RiskManager(RiskConfig()))
+        res = pbt.run()
+        print("\nPortfolio metrics:")
+        width = max(len(k) for k in res.metrics)
+        for k,v in res.metrics.items():
+            print(f"{k:<{width}} : {v:.4f}")
+        print("\nP&L by symbol:")
+        print(res.attribution.iloc[-1].sort_values(ascending=False).to_string(float_format=lambda v: f"{v:.2f}"))
+
+    elif args.cmd == "replay":
+        from live.replay import load_ticks, replay
+        from live.runner import LiveTrader
+        ticks = load_ticks(args.file)
+        digests = set()
+        for i in range(args.runs):
+            trader = LiveTrader(None, PaperBroker(), MovingAverageCross(args.fast, args.slow), RiskManager(RiskConfig()))
+            r = replay(trader, ticks, args.symbol, args.speed)
+            lat = r["latency_us"]
+            print(f"Run {i + 1}: {r['ticks']} ticks in {r['seconds']:.2f}s ({r['ticks_per_s']:,.0f}/s), {r['fills']} fills, "
+                  f"latency us p50 {lat['p50']:.1f} p90 {lat['p90']:.1f} p99 {lat['p99']:.1f} max {lat['max']:.1f}")
+            digests.add(r["fills_digest"])
+        if args.runs > 1:
+            print("Fills identical across runs" if len(digests) == 1 else "Fills DIFFER between runs")
+            if len(digests) > 1:
+                raise SystemExit(1)
+
     elif args.cmd == "live":
         from live.runner import LiveTrader
         provider = YFinanceProvider()  # fallback for demo
@@ -70,14 +239,23 @@ def main(argv=None):
         if args.broker == "alpaca":
             # Try websocket first
             try:
-                rt = AlpacaRealtime([args.symbol])
+                rt = AlpacaRealtime(args.symbol)
                 trader = LiveTrader(provider, broker, strat, risk)
-                asyncio.run(trader.run_websocket(args.symbol, rt.stream_trades()))
+                stream = rt.stream_trades()
+                if args.bars:
+                    from data.bars import aggregate, make_aggregator
+                    stream = aggregate(stream, make_aggregator(args.bars))
+                if len(args.symbol) == 1:
+                    asyncio.run(trader.run_websocket(args.symbol[0], stream))
+                else:
+                    asyncio.run(trader.run_multi(args.symbol, stream, args.queue_size, args.backpressure))
                 return
             except Exception as e:
                 print(f"Websocket failed ({e}), using polling instead.")
+        if len(args.symbol) > 1:
+            raise SystemExit("Polling trades a single symbol; use --broker alpaca for several")
         trader = LiveTrader(provider, broker, strat, risk)
-        trader.run_polling(args.symbol, args.poll_secs)
+        trader.run_polling(args.symbol[0], args.poll_secs)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,192 @@
+from __future__ import annotations
+import bisect, functools, os, threading, time
+
+# Off unless INSTRUMENT=1 or enable() is called. Disabled, a timer is one flag
+# check returning a shared no-op and counters return immediately.
+_enabled = os.environ.get("INSTRUMENT", "0") == "1"
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = bool(on)
+
+def enabled() -> bool:
+    return _enabled
+
+# Seconds; spans a cached bar lookup up to a slow download
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items())) if labels else ()
+
+def _fmt_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in key) + "}"
+
+def _num(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+class Counter:
+    kind = "counter"
+    def __init__(self, name: str, help: str = ""):
+        self.name, self.help = name, help
+        self.values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1.0, **labels):
+        if not _enabled:
+            return
+        k = _key(labels)
+        with self._lock:
+            self.values[k] = self.values.get(k, 0.0) + n
+
+    def value(self, **labels) -> float:
+        return self.values.get(_key(labels), 0.0)
+
+    def samples(self):
+        for k, v in list(self.values.items()):
+            yield self.name + "_total", k, v
+
+class Gauge:
+    """Value read at scrape time from a callable returning {labels tuple: value}."""
+    kind = "gauge"
+    def __init__(self, name: str, help: str, fn):
+        self.name, self.help, self.fn = name, help, fn
+
+    def samples(self):
+        for k, v in self.fn().items():
+            yield self.name, k, v
+
+class Histogram:
+    kind = "histogram"
+    def __init__(self, name: str, help: str = "", buckets=LATENCY_BUCKETS):
+        self.name, self.help = name, help
+        self.bounds = tuple(sorted(buckets))
+        self.series: dict[tuple, list] = {}   # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        k = _key(labels)
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            s = self.series.get(k)
+            if s is None:
+                s = self.series[k] = [0] * (len(self.bounds) + 1) + [0.0]
+            s[i] += 1
+            s[-1] += value
+
+    def time(self, **labels):
+        """Context manager timing its block into this histogram."""
+        return _Timer(self, labels) if _enabled else _NULL_TIMER
+
+    def count(self, **labels) -> int:
+        s = self.series.get(_key(labels))
+        return sum(s[:-1]) if s else 0
+
+    def samples(self):
+        for k, s in list(self.series.items()):
+            cum = 0
+            for bound, c in zip(self.bounds + (float("inf"),), s[:-1]):
+                cum += c
+                yield self.name + "_bucket", k + (("le", _num(bound)),), cum
+            yield self.name + "_sum", k, s[-1]
+            yield self.name + "_count", k, cum
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+    def __init__(self, hist: Histogram, labels: dict):
+        self.hist, self.labels = hist, labels
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, **self.labels)
+
+class _NullTimer:
+    __slots__ = ()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return None
+
+_NULL_TIMER = _NullTimer()
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, *args):
+        with self._lock:
+            m = self.metrics.get(name)
+            if m is None:
+                m = self.metrics[name] = cls(name, *args)
+            elif not isinstance(m, cls):
+                raise ValueError(f"Metric {name!r} already registered as a {m.kind}")
+            return m
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets)
+
+    def gauge(self, name: str, help: str, fn) -> Gauge:
+        with self._lock:
+            g = self.metrics[name] = Gauge(name, help, fn)
+            return g
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name in sorted(self.metrics):
+            m = self.metrics[name]
+            if m.help:
+                lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            for sample, labels, v in m.samples():
+                lines.append(f"{sample}{_fmt_labels(labels)} {_num(v)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for m in self.metrics.values():
+            if hasattr(m, "values"): m.values.clear()
+            if hasattr(m, "series"): m.series.clear()
+
+REGISTRY = Registry()
+
+# Shared metrics the data, strategy, backtest, broker and live modules report to
+STAGE_SECONDS = REGISTRY.histogram("stage_seconds", "Latency of each pipeline stage in seconds")
+TICKS = REGISTRY.counter("ticks_processed", "Ticks handled by the live loop")
+ORDERS = REGISTRY.counter("orders_submitted", "Orders sent to a broker")
+BARS = REGISTRY.counter("bars_processed", "Bars run through a backtest")
+CACHE = REGISTRY.counter("cache_requests", "Cache lookups by cache and result (hit/miss)")
+
+def _hit_ratios() -> dict:
+    totals: dict[str, list] = {}
+    for k, v in list(CACHE.values.items()):
+        labels = dict(k)
+        t = totals.setdefault(labels.get("cache", ""), [0.0, 0.0])
+        t[0] += v if labels.get("result") == "hit" else 0.0
+        t[1] += v
+    return {(("cache", c),): h / n for c, (h, n) in totals.items() if n}
+
+REGISTRY.gauge("cache_hit_ratio", "Share of cache lookups served without recomputing or downloading", _hit_ratios)
+
+def timed(stage: str):
+    """Decorator recording each call's latency into STAGE_SECONDS{stage=...}."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - t0, stage=stage)
+        return inner
+    return wrap
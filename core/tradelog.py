@@ -0,0 +1,153 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from core.types import Order, Fill, Side
+
+TRADE_DTYPE = np.dtype([
+    ("ts", "i8"),          # fill time, UTC ns
+    ("order_ts", "i8"),    # order time, UTC ns
+    ("symbol", "i4"),      # index into TradeLog.symbols
+    ("side", "i1"),        # +1 buy, -1 sell
+    ("qty", "i8"),
+    ("price", "f8"),       # order price, NaN for market orders
+    ("fill_price", "f8"),
+    ("commission", "f8"),
+    ("tag", "i2"),         # index into TradeLog.tags
+])
+
+def _ns(ts) -> int:
+    t = pd.Timestamp(ts)
+    return (t.tz_localize("UTC") if t.tzinfo is None else t).value
+
+class TradeLog:
+    """Append-only columnar record of fills backed by a NumPy structured array.
+    Iterating or indexing gives Fill objects as before; to_frame(), stats() and
+    round_trips() work on the columns directly.
+    """
+    def __init__(self, capacity: int = 64):
+        self._rows = np.zeros(max(int(capacity), 1), dtype=TRADE_DTYPE)
+        self._n = 0
+        self.symbols: list[str] = []
+        self.tags: list[str] = []
+        self._sym_ids: dict[str, int] = {}
+        self._tag_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Read-only view of the recorded rows."""
+        v = self._rows[:self._n]
+        v.flags.writeable = False
+        return v
+
+    def _intern(self, table: list[str], ids: dict[str, int], value: str) -> int:
+        i = ids.get(value)
+        if i is None:
+            i = ids[value] = len(table); table.append(value)
+        return i
+
+    def append(self, fill: Fill):
+        if self._n == len(self._rows):
+            self._rows = np.resize(self._rows, 2 * len(self._rows))
+        o = fill.order
+        self._rows[self._n] = (_ns(fill.ts), _ns(o.ts), self._intern(self.symbols, self._sym_ids, o.symbol),
+                               1 if o.side == Side.BUY else -1, o.qty, np.nan if o.price is None else o.price,
+                               fill.fill_price, fill.commission, self._intern(self.tags, self._tag_ids, o.tag))
+        self._n += 1
+
+    def extend(self, fills):
+        if not isinstance(fills, TradeLog):
+            for f in fills:
+                self.append(f)
+            return
+        # Same columns, only the symbol/tag codes need remapping onto this log's tables
+        rows = fills.rows.copy()
+        sym_map = np.array([self._intern(self.symbols, self._sym_ids, s) for s in fills.symbols] or [0], dtype="i4")
+        tag_map = np.array([self._intern(self.tags, self._tag_ids, t) for t in fills.tags] or [0], dtype="i2")
+        rows["symbol"] = sym_map[rows["symbol"]]
+        rows["tag"] = tag_map[rows["tag"]]
+        need = self._n + len(rows)
+        if need > len(self._rows):
+            self._rows = np.resize(self._rows, max(need, 2 * len(self._rows)))
+        self._rows[self._n:need] = rows
+        self._n = need
+
+    def _fill(self, r) -> Fill:
+        order = Order(self.symbols[r["symbol"]], Side.BUY if r["side"] > 0 else Side.SELL, int(r["qty"]),
+                      None if np.isnan(r["price"]) else float(r["price"]), pd.Timestamp(int(r["order_ts"]), tz="UTC"),
+                      tag=self.tags[r["tag"]])
+        return Fill(order=order, fill_price=float(r["fill_price"]), commission=float(r["commission"]),
+                    ts=pd.Timestamp(int(r["ts"]), tz="UTC"))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._fill(r) for r in self.rows[i]]
+        return self._fill(self.rows[i])
+
+    def __iter__(self):
+        for r in self.rows:
+            yield self._fill(r)
+
+    def to_frame(self) -> pd.DataFrame:
+        r = self.rows
+        return pd.DataFrame({
+            "ts": pd.to_datetime(r["ts"], utc=True),
+            "order_ts": pd.to_datetime(r["order_ts"], utc=True),
+            "symbol": pd.Categorical.from_codes(r["symbol"], self.symbols),
+            "side": np.where(r["side"] > 0, "BUY", "SELL"),
+            "qty": r["qty"], "price": r["price"], "fill_price": r["fill_price"], "commission": r["commission"],
+            "tag": pd.Categorical.from_codes(r["tag"], self.tags),
+        })
+
+    def to_parquet(self, path: str):
+        # pandas needs pyarrow (or fastparquet) installed for this
+        self.to_frame().to_parquet(path, index=False)
+
+    def round_trips(self) -> pd.DataFrame:
+        """One row per closed flat -> position -> flat cycle, per symbol."""
+        r = self.rows
+        cols = ["symbol","entry_ts","exit_ts","pnl","return","hold"]
+        if not len(r):
+            return pd.DataFrame(columns=cols)
+        order = np.lexsort((np.arange(len(r)), r["symbol"]))   # by symbol, then arrival
+        r = r[order]
+        sym = r["symbol"]
+        signed = r["side"].astype(np.int64) * r["qty"]
+        csum = np.cumsum(signed)
+        first = np.r_[True, sym[1:] != sym[:-1]]
+        # Position after each fill, restarting the running sum at each symbol's first row
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(r)), 0))
+        flat = csum - (csum - signed)[group_start] == 0
+        # A trip starts after each flat row (or on a new symbol); one that never goes flat is still open
+        trip = np.cumsum(np.r_[True, flat[:-1] | first[1:]]) - 1
+        keep = np.bincount(trip, weights=flat.astype(float)) > 0
+        flow = -signed * r["fill_price"] - r["commission"]
+        pnl = np.bincount(trip, weights=flow)
+        outlay = np.bincount(trip, weights=np.where(signed > 0, signed * r["fill_price"] + r["commission"], 0.0))
+        start = np.flatnonzero(np.r_[True, trip[1:] != trip[:-1]])
+        end = np.r_[start[1:], len(r)] - 1
+        entry, exit_ = r["ts"][start][keep], r["ts"][end][keep]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = np.where(outlay > 0, pnl / outlay, np.nan)
+        return pd.DataFrame({
+            "symbol": np.asarray(self.symbols, dtype=object)[sym[start][keep]],
+            "entry_ts": pd.to_datetime(entry, utc=True), "exit_ts": pd.to_datetime(exit_, utc=True),
+            "pnl": pnl[keep], "return": ret[keep], "hold": pd.to_timedelta(exit_ - entry, unit="ns"),
+        }, columns=cols)
+
+    def stats(self, capital: float | None = None) -> dict:
+        """Aggregate trade statistics; turnover is traded notional, or a multiple of `capital` if given."""
+        r = self.rows
+        trips = self.round_trips()
+        notional = float((r["qty"] * r["fill_price"]).sum())
+        return {
+            "Fills": int(len(r)),
+            "RoundTrips": int(len(trips)),
+            "WinRate": float((trips["pnl"] > 0).mean()) if len(trips) else float("nan"),
+            "AvgReturn": float(trips["return"].mean()) if len(trips) else float("nan"),
+            "AvgHold": trips["hold"].mean() if len(trips) else pd.NaT,
+            "Turnover": notional / capital if capital else notional,
+            "Commission": float(r["commission"].sum()),
+        }
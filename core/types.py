@@ -8,7 +8,7 @@ class Side(str, enum.Enum):
     BUY = "BUY"
     SELL = "SELL"
 
-@dataclass
+@dataclass(slots=True)
 class Order:
     symbol: str
     side: Side
@@ -18,14 +18,14 @@ class Order:
     ts: datetime
     tag: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class Fill:
     order: Order
     fill_price: float
     commission: float
     ts: datetime
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     symbol: str
     qty: int = 0
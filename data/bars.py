@@ -0,0 +1,160 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+import pandas as pd
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _ns(ts) -> int:
+    """Trade timestamp (int ns, aware datetime or anything pandas parses) as int UTC nanoseconds."""
+    if isinstance(ts, int):
+        return ts
+    if isinstance(ts, datetime) and not isinstance(ts, pd.Timestamp) and ts.tzinfo is not None:
+        d = ts - EPOCH
+        return (d.days * 86_400 + d.seconds) * 1_000_000_000 + d.microseconds * 1_000
+    t = pd.Timestamp(ts)
+    return (t.tz_localize("UTC") if t.tzinfo is None else t).value
+
+def _freq_ns(freq: str) -> int:
+    f = freq.strip()
+    if f.endswith("m") and not f.endswith("ms"):
+        f = f[:-1] + "min"   # "1m"/"5m" mean minutes here, as in yfinance intervals
+    ns = pd.Timedelta(f).value
+    if ns <= 0:
+        raise ValueError(f"Bar frequency must be positive, got {freq!r}")
+    return ns
+
+def _emit(symbol: str, b: list, start: int, end: int | None) -> dict:
+    # b = [open, high, low, close, volume, trades, first_ts, last_ts]
+    return {"symbol": symbol, "ts": pd.Timestamp(start, tz="UTC"), "end": None if end is None else pd.Timestamp(end, tz="UTC"),
+            "open": b[0], "high": b[1], "low": b[2], "close": b[3], "price": b[3], "volume": b[4], "trades": b[5]}
+
+class BarAggregator:
+    """Turns trades into OHLCV bars as they arrive. update() returns the bars
+    that closed because of that trade (usually none); flush() closes the rest.
+    Emitted bars are dicts with symbol, ts (bar start), end, open, high, low,
+    close, price (= close, so bars can stand in for ticks), volume and trades.
+    """
+    def update(self, symbol: str, price: float, size: float, ts) -> list[dict]:
+        raise NotImplementedError
+    def flush(self) -> list[dict]:
+        raise NotImplementedError
+    def update_tick(self, tick: dict) -> list[dict]:
+        size = tick.get("size")
+        return self.update(tick["symbol"], float(tick["price"]), 0.0 if size is None else float(size), tick["ts"])
+
+class TimeBarAggregator(BarAggregator):
+    """Fixed-interval bars ("1s", "1m", "5m", ...) per symbol.
+    Bars close on a watermark, the latest trade time seen on any symbol minus
+    `lateness`, so quiet symbols still close on time and trades up to
+    `lateness` late or out of order land in the right bar. Trades for a bar
+    that has already been emitted are counted in self.late and dropped.
+    """
+    def __init__(self, freq: str = "1m", lateness: str | None = None):
+        self.step = _freq_ns(freq)
+        self.lateness = _freq_ns(lateness) if lateness else 0
+        self.open: dict[str, dict[int, list]] = {}
+        self.closed_upto: dict[str, int] = {}
+        self.watermark = -1 << 62
+        self._next_close = 1 << 62
+        self.late = 0
+
+    def update(self, symbol: str, price: float, size: float, ts) -> list[dict]:
+        t = _ns(ts)
+        start = t - t % self.step
+        if start < self.closed_upto.get(symbol, -1 << 62):
+            self.late += 1
+            return []
+        bars = self.open.get(symbol)
+        if bars is None:
+            bars = self.open[symbol] = {}
+        b = bars.get(start)
+        if b is None:
+            bars[start] = [price, price, price, price, size, 1, t, t]
+            if start + self.step < self._next_close:
+                self._next_close = start + self.step
+        else:
+            if price > b[1]: b[1] = price
+            if price < b[2]: b[2] = price
+            if t < b[6]: b[0] = price; b[6] = t
+            if t >= b[7]: b[3] = price; b[7] = t
+            b[4] += size; b[5] += 1
+        wm = t - self.lateness
+        if wm > self.watermark:
+            self.watermark = wm
+            if wm >= self._next_close:
+                return self._close(wm)
+        return []
+
+    def _close(self, upto: int | None) -> list[dict]:
+        out, nxt = [], 1 << 62
+        for sym, bars in self.open.items():
+            for start in sorted(bars):
+                end = start + self.step
+                if upto is not None and end > upto:
+                    nxt = min(nxt, end)
+                    break
+                out.append(_emit(sym, bars.pop(start), start, end))
+                self.closed_upto[sym] = end
+        self._next_close = nxt
+        out.sort(key=lambda b: b["ts"])
+        return out
+
+    def flush(self) -> list[dict]:
+        return self._close(None)
+
+class _ThresholdAggregator(BarAggregator):
+    def __init__(self, threshold: float):
+        if threshold <= 0:
+            raise ValueError("Bar threshold must be positive")
+        self.threshold = threshold
+        self.open: dict[str, list] = {}
+
+    def _filled(self, b: list) -> bool:
+        raise NotImplementedError
+
+    def update(self, symbol: str, price: float, size: float, ts) -> list[dict]:
+        t = _ns(ts)
+        b = self.open.get(symbol)
+        if b is None:
+            b = self.open[symbol] = [price, price, price, price, size, 1, t, t]
+        else:
+            if price > b[1]: b[1] = price
+            if price < b[2]: b[2] = price
+            b[3] = price; b[4] += size; b[5] += 1
+            if t > b[7]: b[7] = t
+        if self._filled(b):
+            del self.open[symbol]
+            return [_emit(symbol, b, b[6], b[7])]
+        return []
+
+    def flush(self) -> list[dict]:
+        out = [_emit(sym, b, b[6], b[7]) for sym, b in self.open.items()]
+        self.open.clear()
+        return out
+
+class VolumeBarAggregator(_ThresholdAggregator):
+    """Closes a symbol's bar once it has traded at least `volume` shares."""
+    def _filled(self, b: list) -> bool:
+        return b[4] >= self.threshold
+
+class TickBarAggregator(_ThresholdAggregator):
+    """Closes a symbol's bar every `ticks` trades."""
+    def _filled(self, b: list) -> bool:
+        return b[5] >= self.threshold
+
+def make_aggregator(spec: str) -> BarAggregator:
+    """"1m"/"5s"-style time bars, "volume:N" or "ticks:N"."""
+    kind, _, n = spec.partition(":")
+    if kind == "volume":
+        return VolumeBarAggregator(float(n))
+    if kind == "ticks":
+        return TickBarAggregator(int(n))
+    return TimeBarAggregator(spec)
+
+async def aggregate(trade_async_iter, aggregator: BarAggregator):
+    """Async iterator of closed bars from an async iterator of trade ticks."""
+    async for tick in trade_async_iter:
+        for bar in aggregator.update_tick(tick):
+            yield bar
+    for bar in aggregator.flush():
+        yield bar
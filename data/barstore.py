@@ -0,0 +1,225 @@
+from __future__ import annotations
+import os, re, shutil, tempfile
+import numpy as np
+import pandas as pd
+from data.providers import DataProvider
+
+COLUMNS = ["open","high","low","close","volume"]
+
+def _utc_ns(x) -> int:
+    t = pd.Timestamp(x)
+    return (t.tz_localize("UTC") if t.tzinfo is None else t).value
+
+def _day(ns: int) -> str:
+    return pd.Timestamp(ns, tz="UTC").strftime("%Y-%m-%d")
+
+class BarStore:
+    """On-disk bars, one directory per (symbol, interval) holding fixed-width
+    column files (ts.i8 plus one float64 .f8 file per OHLCV column).
+    Reads are read-only np.memmap views, so every process that opens the same
+    store shares one copy of the bars through the OS page cache, and a date
+    range is two binary searches on the timestamp file. covered.i8 records the
+    [start, end) range already fetched, so a range with no bars (a weekend) is
+    not fetched again. Bars newer than the stored ones are appended; older ones
+    rewrite the series into a new directory that is swapped in. There is one
+    writer per series.
+    """
+    def __init__(self, root: str | None = None):
+        self.root = root or os.getenv("OHLCV_STORE_DIR", ".bar_store")
+        self._maps: dict[str, tuple[tuple[int, int] | None, dict[str, np.ndarray]]] = {}
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", f"{symbol}_{interval}"))
+
+    def __len__(self) -> int:
+        if not os.path.isdir(self.root):
+            return 0
+        return sum(1 for e in os.scandir(self.root) if not e.name.endswith((".new", ".old")))
+
+    def _stat(self, d: str) -> os.stat_result | None:
+        try:
+            return os.stat(os.path.join(d, "ts.i8"))
+        except FileNotFoundError:
+            # A writer died between the two renames of a rewrite: bring the old series back
+            if not os.path.isdir(d) and os.path.isdir(d + ".old"):
+                os.rename(d + ".old", d)
+                return self._stat(d)
+            return None
+
+    def rows(self, symbol: str, interval: str = "1d") -> int:
+        st = self._stat(self._dir(symbol, interval))
+        return st.st_size // 8 if st else 0
+
+    def coverage(self, symbol: str, interval: str = "1d") -> tuple[int, int] | None:
+        """[start, end) in UTC ns that the stored bars are complete for, or None for an empty series."""
+        try:
+            lo, hi = np.fromfile(os.path.join(self._dir(symbol, interval), "covered.i8"), dtype="<i8")
+            return int(lo), int(hi)
+        except (FileNotFoundError, ValueError):
+            ts = self.columns(symbol, interval)["ts"]
+            return (int(ts[0]), int(ts[-1]) + 1) if len(ts) else None
+
+    def _set_coverage(self, d: str, lo: int, hi: int):
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(np.array([lo, hi], dtype="<i8").tobytes())
+        os.replace(tmp, os.path.join(d, "covered.i8"))
+
+    def columns(self, symbol: str, interval: str = "1d") -> dict[str, np.ndarray]:
+        """Memory-mapped "ts" (int64 UTC ns) and OHLCV arrays for the whole series, read-only."""
+        d = self._dir(symbol, interval)
+        st = self._stat(d)
+        n = st.st_size // 8 if st else 0
+        key = (st.st_ino, n) if st else None   # a rewrite swaps in new files of a new size
+        cached = self._maps.get(d)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if n == 0:
+            cols = {"ts": np.empty(0, dtype=np.int64), **{c: np.empty(0) for c in COLUMNS}}
+        else:
+            # ts is written last, so every column file holds at least n rows
+            cols = {"ts": np.memmap(os.path.join(d, "ts.i8"), dtype="<i8", mode="r", shape=(n,))}
+            for c in COLUMNS:
+                cols[c] = np.memmap(os.path.join(d, f"{c}.f8"), dtype="<f8", mode="r", shape=(n,))
+        self._maps[d] = (key, cols)
+        return cols
+
+    def span(self, symbol: str, interval: str = "1d", start=None, end=None) -> tuple[int, int]:
+        """Row bounds [lo, hi) of bars with start <= ts < end, by binary search."""
+        ts = self.columns(symbol, interval)["ts"]
+        lo = 0 if start is None else int(np.searchsorted(ts, _utc_ns(start), "left"))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _utc_ns(end), "left"))
+        return lo, max(lo, hi)
+
+    def window(self, symbol: str, interval: str = "1d", start=None, end=None) -> dict[str, np.ndarray]:
+        """Zero-copy views of the columns between start and end."""
+        lo, hi = self.span(symbol, interval, start, end)
+        return {k: v[lo:hi] for k, v in self.columns(symbol, interval).items()}
+
+    def frame(self, symbol: str, interval: str = "1d", start=None, end=None) -> pd.DataFrame:
+        """OHLCV DataFrame over the memory-mapped columns; only the index is materialized."""
+        w = self.window(symbol, interval, start, end)
+        index = pd.DatetimeIndex(w["ts"].astype("datetime64[ns]", copy=False)).tz_localize("UTC")
+        return pd.DataFrame({c: w[c] for c in COLUMNS}, index=index, copy=False)
+
+    @staticmethod
+    def _sorted(df: pd.DataFrame) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """Timestamps and OHLCV columns of df in time order, one bar per timestamp (first wins)."""
+        ts = pd.DatetimeIndex(pd.to_datetime(df.index, utc=True)).as_unit("ns").asi8
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[1:] = ts[1:] != ts[:-1]
+        cols = {}
+        for c in COLUMNS:
+            col = df[c]
+            col = col.iloc[:, 0] if isinstance(col, pd.DataFrame) else col
+            cols[c] = col.to_numpy(dtype="<f8")[order][keep]
+        return ts[keep], cols
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Append the bars of df that are newer than the stored ones; returns how many were written."""
+        if not len(df):
+            return 0
+        ts, cols = self._sorted(df)
+        d = self._dir(symbol, interval)
+        n = self.rows(symbol, interval)
+        stored = self.columns(symbol, interval)["ts"]
+        keep = ts > (stored[-1] if n else np.iinfo(np.int64).min)
+        if not keep.any():
+            return 0
+        os.makedirs(d, exist_ok=True)
+        for c in COLUMNS:
+            path = os.path.join(d, f"{c}.f8")
+            # Drop rows a crashed append wrote past ts.i8, so the columns stay aligned
+            if os.path.exists(path) and os.path.getsize(path) > n * 8:
+                os.truncate(path, n * 8)
+            with open(path, "ab") as f:
+                f.write(cols[c][keep].tobytes())
+        with open(os.path.join(d, "ts.i8"), "ab") as f:
+            f.write(ts[keep].astype("<i8").tobytes())
+        return int(keep.sum())
+
+    def prepend(self, symbol: str, interval: str, df: pd.DataFrame) -> int:
+        """Insert the bars of df that are older than the stored ones; returns how many were written.
+        The series is rewritten into a new directory and swapped in with two renames,
+        so readers and a crash see either the old series or the new one.
+        """
+        stored = self.columns(symbol, interval)
+        if not len(stored["ts"]):
+            return self.append(symbol, interval, df)
+        if not len(df):
+            return 0
+        ts, cols = self._sorted(df)
+        keep = ts < stored["ts"][0]
+        if not keep.any():
+            return 0
+        d = self._dir(symbol, interval)
+        new, old = d + ".new", d + ".old"
+        shutil.rmtree(new, ignore_errors=True)
+        shutil.rmtree(old, ignore_errors=True)
+        os.makedirs(new)
+        for c in COLUMNS:
+            with open(os.path.join(new, f"{c}.f8"), "wb") as f:
+                f.write(cols[c][keep].tobytes())
+                f.write(np.asarray(stored[c]).tobytes())
+        with open(os.path.join(new, "ts.i8"), "wb") as f:
+            f.write(ts[keep].astype("<i8").tobytes())
+            f.write(np.asarray(stored["ts"]).tobytes())
+        cov = self.coverage(symbol, interval)
+        self._set_coverage(new, *cov)
+        os.rename(d, old)
+        os.rename(new, d)
+        shutil.rmtree(old, ignore_errors=True)
+        return int(keep.sum())
+
+    def ingest(self, provider: DataProvider, symbol: str, start: str, end: str, interval: str = "1d") -> int:
+        """Fetch whole UTC days of bars from another provider and add them to the series.
+        The fetch is widened to meet the range already stored, so coverage stays one
+        contiguous range. Returns how many bars were written.
+        """
+        lo = pd.Timestamp(_utc_ns(start), tz="UTC").floor("D").value
+        hi = pd.Timestamp(_utc_ns(end), tz="UTC").ceil("D").value
+        cov = self.coverage(symbol, interval)
+        if cov is not None:
+            lo, hi = min(lo, cov[1]), max(hi, cov[0])
+        df = provider.history(symbol, _day(lo), _day(hi), interval)
+        n = self.prepend(symbol, interval, df) + self.append(symbol, interval, df)
+        d = self._dir(symbol, interval)
+        if os.path.isdir(d):
+            # Today's bars may still change, so coverage stops at the start of the current UTC day
+            today = pd.Timestamp.now(tz="UTC").floor("D").value
+            cov = (lo, hi) if cov is None else (min(lo, cov[0]), max(hi, cov[1]))
+            self._set_coverage(d, cov[0], max(cov[0], min(cov[1], today)))
+        return n
+
+class BarStoreProvider(DataProvider):
+    """DataProvider over a BarStore; history() returns frames backed by the shared
+    memory-mapped columns. With an inner provider, the days before and after the
+    stored range are fetched and added first, so this must be the only writer to
+    the store. Without one, a range the store does not fully cover raises.
+    """
+    def __init__(self, store: BarStore, inner: DataProvider | None = None):
+        self.store = store
+        self.inner = inner
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+        lo, hi = _utc_ns(start), _utc_ns(end)
+        cov = self.store.coverage(symbol, interval)
+        if cov is None or lo < cov[0] or hi > cov[1]:
+            if self.inner is None:
+                have = "nothing" if cov is None else f"{_day(cov[0])}..{_day(cov[1])}"
+                raise RuntimeError(f"Stored bars for {symbol} {interval} cover {have}, not {start}..{end}")
+            if cov is None:
+                self.store.ingest(self.inner, symbol, start, end, interval)
+            else:
+                if lo < cov[0]:
+                    self.store.ingest(self.inner, symbol, start, _day(cov[0]), interval)
+                if hi > cov[1]:
+                    self.store.ingest(self.inner, symbol, _day(cov[1]), end, interval)
+        return self.store.frame(symbol, interval, start, end)
+
+    def latest(self, symbol: str) -> dict:
+        if self.inner is None:
+            raise RuntimeError("BarStoreProvider has no live provider for latest()")
+        return self.inner.latest(symbol)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+import os, re, tempfile, threading, time
+import numpy as np
+import pandas as pd
+from core.instrument import CACHE
+from data.providers import DataProvider
+
+COLUMNS = ["open","high","low","close","volume"]
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Flat float OHLCV columns on a UTC index, whatever column layout the provider returned."""
+    cols = {}
+    for c in COLUMNS:
+        col = df[c]
+        cols[c] = (col.iloc[:, 0] if isinstance(col, pd.DataFrame) else col).astype(float)
+    out = pd.DataFrame(cols, index=pd.to_datetime(df.index, utc=True).as_unit("ns"))
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+def _utc(x) -> pd.Timestamp:
+    t = pd.Timestamp(x)
+    return t.tz_localize("UTC") if t.tzinfo is None else t.tz_convert("UTC")
+
+def _empty() -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=float) for c in COLUMNS}, index=pd.DatetimeIndex([], tz="UTC"))
+
+def _merge_ranges(ranges: list[tuple[int,int]]) -> list[tuple[int,int]]:
+    out: list[list[int]] = []
+    for a, b in sorted(ranges):
+        if out and a <= out[-1][1]:
+            out[-1][1] = max(out[-1][1], b)
+        else:
+            out.append([a, b])
+    return [(a, b) for a, b in out]
+
+def _gaps(covered: list[tuple[int,int]], lo: int, hi: int) -> list[tuple[int,int]]:
+    gaps, cur = [], lo
+    for a, b in covered:
+        if b <= cur or a >= hi:
+            continue
+        if a > cur:
+            gaps.append((cur, a))
+        cur = max(cur, b)
+    if cur < hi:
+        gaps.append((cur, hi))
+    return gaps
+
+class CachingProvider(DataProvider):
+    """Wraps another DataProvider and keeps its bars on disk, one .npz file of
+    column arrays per (symbol, interval). history() only asks the wrapped
+    provider for the days the cache has not covered yet. With offline=True
+    the wrapped provider is never called for history.
+    """
+    def __init__(self, inner: DataProvider, cache_dir: str | None = None, offline: bool | None = None):
+        self.inner = inner
+        self.cache_dir = cache_dir or os.getenv("OHLCV_CACHE_DIR", ".ohlcv_cache")
+        self.offline = offline if offline is not None else os.getenv("OHLCV_CACHE_OFFLINE") == "1"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()   # guards _locks
+        self._locks: dict[str, threading.Lock] = {}   # one per cache file
+
+    def _file_lock(self, path: str) -> threading.Lock:
+        # Requests for one (symbol, interval) queue behind its download; other series go ahead
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r"[^A-Za-z0-9._^=-]", "_", f"{symbol}_{interval}") + ".npz")
+
+    def _load(self, path: str) -> tuple[pd.DataFrame, list[tuple[int,int]]]:
+        if not os.path.exists(path):
+            return _empty(), []
+        with np.load(path) as z:
+            df = pd.DataFrame({c: z[c] for c in COLUMNS}, index=pd.DatetimeIndex(z["ts"], tz="UTC"))
+            covered = [(int(a), int(b)) for a, b in z["covered"]]
+        return df, covered
+
+    def _save(self, path: str, df: pd.DataFrame, covered: list[tuple[int,int]]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, ts=df.index.as_unit("ns").asi8, covered=np.asarray(covered, dtype=np.int64).reshape(-1, 2),
+                         **{c: df[c].to_numpy(dtype=float) for c in COLUMNS})
+            os.replace(tmp, path)  # readers never see a half-written file
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+        lo, hi = _utc(start).floor("D"), _utc(end).ceil("D")
+        path = self._path(symbol, interval)
+        with self._file_lock(path):
+            df, covered = self._load(path)
+            gaps = [] if self.offline else _gaps(covered, lo.value, hi.value)
+            if gaps:
+                self.misses += 1
+                CACHE.inc(cache="ohlcv", result="miss")
+                parts = [df]
+                for a, b in gaps:
+                    part = self.inner.history(symbol, pd.Timestamp(a, tz="UTC").strftime("%Y-%m-%d"),
+                                              pd.Timestamp(b, tz="UTC").strftime("%Y-%m-%d"), interval)
+                    if len(part):
+                        parts.append(_normalize(part))
+                df = pd.concat(parts)
+                df = df[~df.index.duplicated(keep="last")].sort_index()
+                # Today's bars may still change, so coverage stops at the start of the current UTC day
+                today = pd.Timestamp.now(tz="UTC").floor("D").value
+                covered = _merge_ranges(covered + [(a, min(b, today)) for a, b in gaps if a < today])
+                self._save(path, df, covered)
+            else:
+                self.hits += 1
+                CACHE.inc(cache="ohlcv", result="hit")
+        if self.offline and not len(df):
+            raise RuntimeError(f"No cached bars for {symbol} {interval} (offline mode)")
+        return df[(df.index >= _utc(start)) & (df.index < _utc(end))]
+
+    def latest(self, symbol: str) -> dict:
+        return self.inner.latest(symbol)
+
+class _Flight:
+    """One in-progress inner.latest_many() call that other callers can wait on."""
+    __slots__ = ("done", "quotes", "error")
+    def __init__(self):
+        self.done = threading.Event()
+        self.quotes: dict = {}
+        self.error: BaseException | None = None
+
+class QuoteCache(DataProvider):
+    """Wraps another DataProvider's latest quotes. A quote younger than `ttl`
+    seconds is served from memory; a symbol already being fetched for another
+    caller waits for that fetch instead of starting its own; everything else is
+    fetched in one inner.latest_many() call. Counts hits, misses and coalesced
+    requests, also reported as cache="quote" in core.instrument.CACHE.
+    """
+    def __init__(self, inner: DataProvider, ttl: float = 2.0, clock=time.monotonic):
+        self.inner = inner
+        self.ttl = ttl
+        self.clock = clock
+        self._quotes: dict[str, tuple[float, dict]] = {}   # symbol -> (expires, tick)
+        self._inflight: dict[str, _Flight] = {}
+        self._sweep_at = clock() + ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+        return self.inner.history(symbol, start, end, interval)
+
+    def history_many(self, symbols: list[str], start: str, end: str, interval: str = "1d") -> dict[str, pd.DataFrame]:
+        return self.inner.history_many(symbols, start, end, interval)
+
+    def latest(self, symbol: str) -> dict:
+        tick = self.latest_many([symbol]).get(symbol)
+        if tick is None:
+            raise RuntimeError(f"No quote for {symbol}")
+        return tick
+
+    def latest_many(self, symbols: list[str]) -> dict[str, dict]:
+        out, waits, fetch = {}, {}, []
+        with self._lock:
+            now = self.clock()
+            if now >= self._sweep_at:
+                # Drop expired quotes at most once per ttl, so symbols nobody asks for again do not pile up
+                self._quotes = {s: q for s, q in self._quotes.items() if q[0] > now}
+                self._sweep_at = now + self.ttl
+            for sym in dict.fromkeys(symbols):
+                cached = self._quotes.get(sym)
+                if cached is not None and cached[0] > now:
+                    out[sym] = cached[1]; self.hits += 1
+                    CACHE.inc(cache="quote", result="hit")
+                elif sym in self._inflight:
+                    waits[sym] = self._inflight[sym]; self.coalesced += 1
+                    CACHE.inc(cache="quote", result="coalesced")
+                else:
+                    fetch.append(sym); self.misses += 1
+                    CACHE.inc(cache="quote", result="miss")
+            if fetch:
+                flight = _Flight()
+                for sym in fetch:
+                    self._inflight[sym] = flight
+        if fetch:
+            try:
+                flight.quotes = self.inner.latest_many(fetch)
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    expires = self.clock() + self.ttl
+                    for sym in fetch:
+                        del self._inflight[sym]
+                        if sym in flight.quotes:
+                            self._quotes[sym] = (expires, flight.quotes[sym])
+                flight.done.set()
+            out.update((s, flight.quotes[s]) for s in fetch if s in flight.quotes)
+        for sym, other in waits.items():
+            other.done.wait()
+            if other.error is not None:
+                raise other.error
+            if sym in other.quotes:
+                out[sym] = other.quotes[sym]
+        return out
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced,
+                "cached": len(self._quotes), "inflight": len(self._inflight)}
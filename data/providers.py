@@ -1,8 +1,10 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-import os
+import os, random, time
 import pandas as pd
 import numpy as np
+from core.instrument import timed
 
 try:
     import yfinance as yf
@@ -14,20 +16,109 @@ class DataProvider:
         raise NotImplementedError
     def latest(self, symbol: str) -> dict:
         raise NotImplementedError
+    def latest_many(self, symbols: list[str]) -> dict[str, dict]:
+        """Latest tick per symbol; symbols without a quote are left out."""
+        out = {}
+        for s in symbols:
+            try:
+                out[s] = self.latest(s)
+            except Exception:
+                continue
+        return out
+    def history_many(self, symbols: list[str], start: str, end: str, interval: str = "1d") -> dict[str, pd.DataFrame]:
+        return {s: self.history(s, start, end, interval) for s in symbols}
+
+# Longest range Yahoo serves per request for each intraday interval, in days
+INTRADAY_LIMIT_DAYS = {"1m": 7, "2m": 59, "5m": 59, "15m": 59, "30m": 59, "60m": 729, "90m": 59, "1h": 729}
+
+def chunk_range(start: str, end: str, interval: str) -> list[tuple[str, str]]:
+    """Split [start, end) into consecutive pieces within the interval's per-request limit."""
+    days = INTRADAY_LIMIT_DAYS.get(interval)
+    if days is None:
+        return [(start, end)]
+    a, b = pd.Timestamp(start), pd.Timestamp(end)
+    out = []
+    while a < b:
+        c = min(a + pd.Timedelta(days=days), b)
+        out.append((a.strftime("%Y-%m-%d %H:%M:%S"), c.strftime("%Y-%m-%d %H:%M:%S")))
+        a = c
+    return out or [(start, end)]
 
 class YFinanceProvider(DataProvider):
-    def history(self, symbol: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
-        if yf is None:
+    """Yahoo Finance bars. Intraday ranges longer than Yahoo's per-request limit
+    are split into chunks, downloaded `max_workers` at a time with up to
+    `retries` retries (exponential backoff from `backoff` seconds, with
+    jitter), then stitched and de-duplicated. `download` replaces yf.download,
+    e.g. with a local stand-in in tests.
+    """
+    def __init__(self, max_workers: int = 4, retries: int = 3, backoff: float = 1.0, download=None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._download = download
+
+    def _fetch(self, tickers, start: str, end: str, interval: str, **kw) -> pd.DataFrame:
+        download = self._download or yf.download
+        for attempt in range(self.retries + 1):
+            try:
+                return download(tickers, start=start, end=end, interval=interval, auto_adjust=True, progress=False, **kw)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt * (0.5 + random.random()))
+
+    def _download_range(self, tickers, start: str, end: str, interval: str, **kw) -> pd.DataFrame:
+        if self._download is None and yf is None:
             raise RuntimeError("yfinance not installed")
-        df = yf.download(symbol, start=start, end=end, interval=interval, auto_adjust=True, progress=False)
-        df = df.rename(columns={"Open":"open","High":"high","Low":"low","Close":"close","Adj Close":"adj_close","Volume":"volume"})
+        chunks = chunk_range(start, end, interval)
+        if len(chunks) == 1:
+            parts = [self._fetch(tickers, start, end, interval, **kw)]
+        else:
+            with ThreadPoolExecutor(min(self.max_workers, len(chunks))) as ex:
+                parts = list(ex.map(lambda c: self._fetch(tickers, *c, interval, **kw), chunks))
+        filled = [p for p in parts if len(p)]
+        df = pd.concat(filled) if len(filled) > 1 else (filled or parts)[0]
         df.index = pd.to_datetime(df.index, utc=True)
+        # Chunks meet at their boundaries, so a bar can appear in two of them
+        return df[~df.index.duplicated(keep="last")].sort_index()
+
+    @timed("fetch")
+    def history(self, symbol: str, start: str, end: str, interval: str = "1d") -> pd.DataFrame:
+        df = self._download_range(symbol, start, end, interval)
+        df = df.rename(columns={"Open":"open","High":"high","Low":"low","Close":"close","Adj Close":"adj_close","Volume":"volume"})
         return df[["open","high","low","close","volume"]]
+    @timed("fetch")
+    def history_many(self, symbols: list[str], start: str, end: str, interval: str = "1d") -> dict[str, pd.DataFrame]:
+        # One batched download (per chunk) for the whole universe instead of a request per symbol
+        df = self._download_range(list(symbols), start, end, interval, group_by="ticker", threads=True)
+        out = {}
+        for sym in symbols:
+            part = df[sym] if isinstance(df.columns, pd.MultiIndex) else df
+            part = part.rename(columns={"Open":"open","High":"high","Low":"low","Close":"close","Volume":"volume"})
+            out[sym] = part[["open","high","low","close","volume"]].dropna(how="all")
+        return out
+    @timed("quote")
     def latest(self, symbol: str) -> dict:
         if yf is None:
             raise RuntimeError("yfinance not installed")
         last = yf.Ticker(symbol).history(period="1d").tail(1)["Close"].iloc[0]
         return {"price": float(last), "ts": datetime.now(timezone.utc)}
+    @timed("quote")
+    def latest_many(self, symbols: list[str]) -> dict[str, dict]:
+        # One download of the last trading day's 1m bars for every symbol instead of a Ticker request each
+        if self._download is None and yf is None:
+            raise RuntimeError("yfinance not installed")
+        df = self._fetch(list(symbols), None, None, "1m", period="1d", group_by="column", threads=True)
+        close = df["Close"] if len(df) else pd.DataFrame()
+        if isinstance(close, pd.Series):
+            close = close.to_frame(symbols[0])
+        now = datetime.now(timezone.utc)
+        out = {}
+        for sym in symbols:
+            last = close[sym].dropna() if sym in close else ()
+            if len(last):
+                out[sym] = {"price": float(last.iloc[-1]), "ts": now}
+        return out
 
 # Alpaca websocket for real-time data
 # Need ALPACA_API_KEY and ALPACA_API_SECRET env vars
@@ -54,4 +145,4 @@ class AlpacaRealtime:
                 if isinstance(data, list):
                     for ev in data:
                         if ev.get("T") == "t":
-                            yield {"symbol": ev["S"], "price": float(ev["p"]), "ts": datetime.fromisoformat(ev["t"].replace("Z","+00:00"))}
\ No newline at end of file
+                            yield {"symbol": ev["S"], "price": float(ev["p"]), "size": float(ev.get("s", 0)), "ts": datetime.fromisoformat(ev["t"].replace("Z","+00:00"))}
\ No newline at end of file
@@ -0,0 +1,62 @@
+from __future__ import annotations
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["open","high","low","close","volume"]
+
+class OHLCVRingBuffer:
+    """Fixed-capacity OHLCV history backed by preallocated NumPy arrays.
+    Every row is written twice, at i and i+capacity, so the newest `capacity`
+    rows are always one contiguous slice and window() never copies.
+    """
+    def __init__(self, capacity: int = 5000):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = int(capacity)
+        self._ts = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._bars = np.full((2 * self.capacity, len(COLUMNS)), np.nan)
+        self._head = 0   # next write slot in [0, capacity)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts: datetime, open: float, high: float, low: float, close: float, volume: float = float("nan")):
+        t = pd.Timestamp(ts)
+        t = t.tz_localize("UTC") if t.tzinfo is None else t
+        row = (open, high, low, close, volume)
+        i = self._head
+        self._ts[i] = self._ts[i + self.capacity] = t.value
+        self._bars[i] = self._bars[i + self.capacity] = row
+        self._head = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def append_price(self, ts: datetime, price: float):
+        """Record a trade price as a flat bar (open=high=low=close, unknown volume)."""
+        self.append(ts, price, price, price, price)
+
+    def _slice(self, n: int | None) -> slice:
+        n = self._size if n is None else max(0, min(int(n), self._size))
+        end = self._head + self.capacity if self._size == self.capacity else self._head
+        return slice(end - n, end)
+
+    def window(self, n: int | None = None) -> np.ndarray:
+        """Read-only (n, 5) view of the newest n bars in OHLCV column order."""
+        v = self._bars[self._slice(n)]
+        v.flags.writeable = False
+        return v
+
+    def timestamps(self, n: int | None = None) -> np.ndarray:
+        """Read-only view of the newest n timestamps as int64 UTC nanoseconds."""
+        v = self._ts[self._slice(n)]
+        v.flags.writeable = False
+        return v
+
+    def column(self, name: str, n: int | None = None) -> np.ndarray:
+        return self.window(n)[:, COLUMNS.index(name)]
+
+    def to_frame(self, n: int | None = None) -> pd.DataFrame:
+        """Copy the newest n bars into a DataFrame with a UTC DatetimeIndex."""
+        idx = pd.DatetimeIndex(self.timestamps(n).copy(), tz="UTC")
+        return pd.DataFrame(self.window(n).copy(), index=idx, columns=COLUMNS)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+def _log_returns(rng: np.random.Generator, shape: tuple, dt: float, mu: float, sigma: float,
+                 jump_rate: float, jump_mean: float, jump_std: float) -> np.ndarray:
+    # Merton jump diffusion: GBM drift/diffusion plus Poisson(jump_rate*dt) normal jumps per step
+    r = rng.standard_normal(shape)
+    r *= sigma * np.sqrt(dt)
+    r += (mu - 0.5 * sigma * sigma) * dt
+    jumps = rng.poisson(jump_rate * dt, shape)
+    hit = jumps > 0
+    r[hit] += jump_mean * jumps[hit] + jump_std * np.sqrt(jumps[hit]) * rng.standard_normal(int(hit.sum()))
+    return r
+
+def gbm_bars(n: int, symbols: int | list[str] = 1, *, freq: str = "1min", start: str = "2020-01-01",
+             seed: int = 0, s0: float = 100.0, mu: float = 0.05, sigma: float = 0.2, jump_rate: float = 5.0,
+             jump_mean: float = -0.01, jump_std: float = 0.03, periods: float = 252 * 390):
+    """Seeded synthetic OHLCV bars from a GBM with jumps, for offline tests and benchmarks.
+    mu, sigma and jump_rate are annual; `periods` is bars per year (default: 1-minute
+    bars over 252 trading days). One symbol gives a DataFrame, several a dict of
+    DataFrames sharing the same UTC index, which PortfolioBacktester accepts as is.
+    """
+    names = [f"SYM{i:04d}" for i in range(symbols)] if isinstance(symbols, int) else list(symbols)
+    if n < 1 or not names:
+        raise ValueError("Need at least one bar and one symbol")
+    rng = np.random.default_rng(seed)
+    dt = 1.0 / periods
+    index = pd.date_range(start, periods=n, freq=freq, tz="UTC")
+    out = {}
+    for sym in names:
+        r = _log_returns(rng, (n,), dt, mu, sigma, jump_rate, jump_mean, jump_std)
+        close = s0 * np.exp(np.cumsum(r))
+        open_ = np.empty(n); open_[0] = s0; open_[1:] = close[:-1]
+        # Wicks scale with per-bar volatility so high >= max(open, close) and low <= min(open, close)
+        wick = sigma * np.sqrt(dt) * np.abs(rng.standard_normal((2, n)))
+        out[sym] = pd.DataFrame({
+            "open": open_,
+            "high": np.maximum(open_, close) * np.exp(wick[0]),
+            "low": np.minimum(open_, close) * np.exp(-wick[1]),
+            "close": close,
+            "volume": np.round(rng.lognormal(8.0, 1.0, n)),
+        }, index=index)
+    return out[names[0]] if isinstance(symbols, int) and symbols == 1 else out
+
+def gbm_ticks(n: int, symbols: int | list[str] = 1, *, start: str = "2020-01-01", seed: int = 0,
+              s0: float = 100.0, sigma: float = 0.2, mean_gap_ms: float = 50.0) -> pd.DataFrame:
+    """Seeded synthetic trade ticks (ts, symbol, price, size), interleaved across
+    symbols in time order, with exponential gaps between trades.
+    """
+    names = [f"SYM{i:04d}" for i in range(symbols)] if isinstance(symbols, int) else list(symbols)
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(mean_gap_ms * 1e6, n).astype(np.int64)
+    ts = pd.Timestamp(start, tz="UTC").value + np.cumsum(gaps)
+    sym = rng.integers(0, len(names), n)
+    # Per-symbol random walk: each tick moves only its own symbol's price
+    dt = mean_gap_ms * len(names) / 1000 / (252 * 6.5 * 3600)   # years per tick of one symbol
+    r = _log_returns(rng, (n,), dt, 0.0, sigma, 0.0, 0.0, 0.0)
+    order = np.argsort(sym, kind="stable")
+    cs = np.cumsum(r[order])
+    first = np.r_[True, sym[order][1:] != sym[order][:-1]]
+    group_start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+    price = np.empty(n)
+    price[order] = s0 * np.exp(cs - (cs - r[order])[group_start])
+    return pd.DataFrame({"ts": pd.to_datetime(ts, utc=True), "symbol": np.asarray(names, dtype=object)[sym],
+                         "price": price, "size": rng.integers(1, 500, n).astype(float)})
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import json, threading, time
+from collections import deque
+
+class EventLog:
+    """Sequence-numbered log of recent bot events for push updates.
+    Each client keeps its own cursor (the last id it saw); since() replays
+    everything after it from a bounded buffer, so reconnects only resend what
+    was missed. A cursor older than the buffer, or newer than the last id
+    (handed out before a restart), gets None, meaning "resync from a snapshot".
+    """
+    def __init__(self, maxlen: int = 1000):
+        self._events: deque = deque(maxlen=maxlen)   # (id, type, data)
+        self.last_id = 0
+        self._cond = threading.Condition()
+
+    def publish(self, type: str, data: dict) -> int:
+        with self._cond:
+            self.last_id += 1
+            self._events.append((self.last_id, type, data))
+            self._cond.notify_all()
+            return self.last_id
+
+    def since(self, cursor: int) -> list[tuple[int, str, dict]] | None:
+        with self._cond:
+            if cursor > self.last_id:
+                return None
+            if cursor == self.last_id:
+                return []
+            first = self._events[0][0] if self._events else self.last_id + 1
+            if cursor < first - 1:
+                return None
+            # ids are consecutive, so the cursor maps straight to a buffer offset
+            return list(self._events)[cursor - first + 1:]
+
+    def wait(self, cursor: int, timeout: float) -> list[tuple[int, str, dict]] | None:
+        """since(cursor), blocking up to `timeout` seconds for something new."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.last_id == cursor:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return []
+                self._cond.wait(left)
+        return self.since(cursor)
+
+def sse(id: int, type: str, data: dict) -> str:
+    return f"id: {id}\nevent: {type}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import threading, time, uuid
+
+class PricePoller:
+    """One background thread that fetches the latest price of every subscribed
+    symbol in a single provider.latest_many() call each `interval` seconds and
+    hands each tick to that symbol's callbacks. A symbol without a quote, or a
+    callback that raises, is reported and skipped, so one bot cannot stall the others.
+    """
+    def __init__(self, provider, interval: float = 5.0):
+        self.provider = provider
+        self.interval = interval
+        self._subs: dict[str, list] = {}   # symbol -> callbacks
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.polls = 0
+        self.errors = 0
+        self.last_poll = None
+
+    @property
+    def symbols(self) -> list[str]:
+        with self._lock:
+            return sorted(self._subs)
+
+    def subscribe(self, symbol: str, callback):
+        with self._lock:
+            self._subs.setdefault(symbol, []).append(callback)
+        self.start()
+
+    def unsubscribe(self, symbol: str, callback):
+        with self._lock:
+            subs = self._subs.get(symbol, [])
+            if callback in subs:
+                subs.remove(callback)
+            if not subs:
+                self._subs.pop(symbol, None)
+
+    def poll_once(self) -> dict[str, dict]:
+        """Fetch every subscribed symbol once and fan the ticks out; returns them."""
+        with self._lock:
+            subs = {s: list(cbs) for s, cbs in self._subs.items()}
+        if not subs:
+            return {}
+        try:
+            ticks = self.provider.latest_many(sorted(subs))
+        except Exception as e:
+            self.errors += 1
+            print(f"[Poller] Quote fetch failed: {e}")
+            return {}
+        missing = sorted(subs.keys() - ticks.keys())
+        if missing:
+            self.errors += len(missing)
+            print(f"[Poller] No quote for {', '.join(missing)}")
+        self.polls += 1
+        self.last_poll = time.time()
+        for symbol, tick in ticks.items():
+            for cb in subs.get(symbol, ()):
+                try:
+                    cb(tick)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"[Poller] {symbol} handler failed: {e}")
+        return ticks
+
+    def _run(self):
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - t0)))
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="price-poller", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"symbols": self.symbols, "interval": self.interval, "polls": self.polls, "errors": self.errors,
+                "last_poll": self.last_poll, "running": self._thread is not None and self._thread.is_alive()}
+
+class TooManyBots(RuntimeError):
+    pass
+
+class BotManager:
+    """Trading bots keyed by ID, all fed by one shared PricePoller.
+    A bot needs a `symbol`, `on_tick(tick)`, `start()`, `stop()` and `to_dict()`.
+    At most `max_bots` are kept: adding one past the limit drops the oldest
+    stopped bot, or raises TooManyBots if they are all running.
+    """
+    def __init__(self, poller: PricePoller, max_bots: int | None = None):
+        self.poller = poller
+        self.max_bots = max_bots
+        self.bots: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def add(self, bot, bot_id: str | None = None) -> str:
+        bot_id = bot_id or uuid.uuid4().hex[:8]
+        with self._lock:
+            if bot_id in self.bots:
+                raise ValueError(f"Bot {bot_id!r} already exists")
+            if self.max_bots is not None and len(self.bots) >= self.max_bots:
+                stopped = next((i for i, b in self.bots.items() if not b.running), None)
+                if stopped is None:
+                    raise TooManyBots(f"{self.max_bots} bots are already running")
+                del self.bots[stopped]
+            self.bots[bot_id] = bot
+        return bot_id
+
+    def get(self, bot_id: str):
+        return self.bots.get(bot_id)
+
+    def start(self, bot_id: str):
+        bot = self.bots[bot_id]
+        with self._lock:
+            if bot.running:
+                return
+            if self.max_bots is not None and sum(b.running for b in self.bots.values()) >= self.max_bots:
+                raise TooManyBots(f"{self.max_bots} bots are already running")
+            bot.start()
+        self.poller.subscribe(bot.symbol, bot.on_tick)
+
+    def stop(self, bot_id: str):
+        bot = self.bots[bot_id]
+        with self._lock:
+            if not bot.running:
+                return
+            bot.stop()
+        self.poller.unsubscribe(bot.symbol, bot.on_tick)
+
+    def remove(self, bot_id: str):
+        self.stop(bot_id)
+        with self._lock:
+            del self.bots[bot_id]
+
+    def running(self) -> list[str]:
+        return [i for i, b in list(self.bots.items()) if b.running]
+
+    def status(self) -> dict:
+        return {"bots": {i: b.to_dict() for i, b in list(self.bots.items())}, "poller": self.poller.stats()}
+
+    def shutdown(self):
+        for bot_id in list(self.bots):
+            self.stop(bot_id)
+        self.poller.stop()
@@ -0,0 +1,144 @@
+from __future__ import annotations
+import asyncio, contextlib, hashlib, io, time
+import numpy as np
+import pandas as pd
+from core.tradelog import TradeLog
+
+# Alpaca trade message keys, for files recorded straight off the websocket
+_ALPACA_KEYS = {"S": "symbol", "p": "price", "s": "size", "t": "ts"}
+CHUNK = 65_536
+
+def load_ticks(path: str) -> pd.DataFrame:
+    """Recorded trades from .csv, .parquet or .ndjson/.jsonl as (ts, symbol, price, size), in time order."""
+    if path.endswith(".parquet"):
+        try:
+            df = pd.read_parquet(path)
+        except ImportError:
+            raise RuntimeError("Reading Parquet needs pyarrow (pip install pyarrow)")
+    elif path.endswith((".ndjson", ".jsonl")):
+        df = pd.read_json(path, lines=True, convert_dates=False)
+    elif path.endswith(".csv"):
+        df = pd.read_csv(path, float_precision="round_trip")
+    else:
+        raise ValueError(f"Unknown tick file type {path!r}, expected .csv, .parquet, .ndjson or .jsonl")
+    df = df.rename(columns=_ALPACA_KEYS)
+    missing = [c for c in ("ts", "symbol", "price") if c not in df]
+    if missing:
+        raise ValueError(f"{path} is missing tick columns {missing}")
+    if "size" not in df:
+        df["size"] = 0.0
+    ts = df["ts"]
+    df["ts"] = (pd.to_datetime(ts, unit="ns", utc=True) if pd.api.types.is_integer_dtype(ts)
+                else pd.to_datetime(ts, utc=True, format="ISO8601"))
+    df = df[["ts", "symbol", "price", "size"]].astype({"symbol": str, "price": float, "size": float})
+    return df.sort_values("ts", kind="stable").reset_index(drop=True)
+
+def save_ticks(ticks: pd.DataFrame, path: str):
+    """Write ticks in the format load_ticks() reads, chosen by extension."""
+    if path.endswith(".parquet"):
+        ticks.to_parquet(path, index=False)
+    elif path.endswith((".ndjson", ".jsonl")):
+        # Timestamps as strings keep nanoseconds, which to_json's ISO dates drop
+        ticks.assign(ts=ticks["ts"].astype(str)).to_json(path, orient="records", lines=True, double_precision=15)
+    else:
+        ticks.to_csv(path, index=False)
+
+class TickReplay:
+    """Recorded ticks as the async iterator run_websocket/run_multi read from a live feed.
+    speed=None replays as fast as possible; speed=1 keeps the recorded gaps between
+    trades and speed=N plays N times faster. Each tick's latency, from being handed
+    out until the consumer asks for the next one, is kept in `latencies_ns`: for
+    run_websocket that is tick to decision; for run_multi only the enqueue.
+    cooperative=True yields to the event loop after every tick, which run_multi's
+    consumer tasks need to keep up with a replay that never sleeps.
+    """
+    def __init__(self, ticks: pd.DataFrame | str, speed: float | None = None, cooperative: bool = False):
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive, or None for as fast as possible")
+        self.ticks = load_ticks(ticks) if isinstance(ticks, str) else ticks
+        self.speed = speed
+        self.cooperative = cooperative
+        self.emitted = 0
+        self.latencies_ns = np.zeros(len(self.ticks), dtype=np.int64)
+        self.elapsed = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    async def __aiter__(self):
+        t = self.ticks
+        ts_ns = pd.DatetimeIndex(t["ts"]).as_unit("ns").asi8
+        lat, clock = self.latencies_ns, time.perf_counter_ns
+        self.emitted = 0
+        start = time.perf_counter()
+        t0 = ts_ns[0] if len(ts_ns) else 0
+        # Convert a chunk at a time so millions of ticks never exist as dicts at once
+        for lo in range(0, len(t), CHUNK):
+            hi = min(lo + CHUNK, len(t))
+            rows = zip(t["symbol"].iloc[lo:hi].tolist(), t["price"].iloc[lo:hi].tolist(),
+                       t["size"].iloc[lo:hi].tolist(), t["ts"].iloc[lo:hi].dt.to_pydatetime(), range(lo, hi))
+            for symbol, price, size, ts, i in rows:
+                if self.speed is not None:
+                    delay = (ts_ns[i] - t0) / 1e9 / self.speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                sent = clock()
+                yield {"symbol": symbol, "price": price, "size": size, "ts": ts}
+                lat[i] = clock() - sent
+                self.emitted += 1
+                if self.cooperative:
+                    await asyncio.sleep(0)
+        self.elapsed = time.perf_counter() - start
+
+    def stats(self) -> dict:
+        lat = self.latencies_ns[:self.emitted] / 1e3
+        pct = np.percentile(lat, [50, 90, 99]) if len(lat) else [float("nan")] * 3
+        return {"ticks": self.emitted, "seconds": self.elapsed,
+                "ticks_per_s": self.emitted / self.elapsed if self.elapsed else float("nan"),
+                "latency_us": {"p50": float(pct[0]), "p90": float(pct[1]), "p99": float(pct[2]),
+                               "max": float(lat.max()) if len(lat) else float("nan")}}
+
+class RecordingBroker:
+    """Wraps a broker and keeps every fill it returns in a TradeLog."""
+    def __init__(self, broker):
+        self.broker = broker
+        self.fills = TradeLog()
+
+    def submit(self, order, **kw):
+        fill = self.broker.submit(order, **kw)
+        self.fills.append(fill)
+        return fill
+
+    def __getattr__(self, name):
+        return getattr(self.broker, name)
+
+def fills_digest(fills: TradeLog) -> str:
+    """Hash of every fill's time, symbol, side, quantity and prices; equal digests mean identical fills."""
+    rows = fills.rows
+    h = hashlib.blake2b(digest_size=16)
+    for col in ("ts", "qty", "price", "fill_price", "commission"):
+        h.update(np.ascontiguousarray(rows[col]).tobytes())
+    h.update(np.ascontiguousarray(rows["side"]).tobytes())
+    h.update("\0".join(f.order.symbol for f in fills).encode())
+    return h.hexdigest()
+
+def replay(trader, ticks: pd.DataFrame | str, symbols: list[str] | None = None,
+           speed: float | None = None, quiet: bool = True) -> dict:
+    """Run a fresh LiveTrader over recorded ticks and report throughput, latency
+    percentiles and fills. The trader's broker is wrapped in a RecordingBroker, so
+    trader.broker.fills holds the fills afterwards. One symbol runs through
+    run_websocket, several through run_multi with queues large enough to drop nothing.
+    """
+    ticks = load_ticks(ticks) if isinstance(ticks, str) else ticks
+    if symbols:
+        ticks = ticks[ticks["symbol"].isin(symbols)].reset_index(drop=True)
+    symbols = symbols or sorted(ticks["symbol"].unique())
+    source = TickReplay(ticks, speed, cooperative=len(symbols) > 1)
+    if not isinstance(trader.broker, RecordingBroker):
+        trader.broker = RecordingBroker(trader.broker)
+    run = (trader.run_websocket(symbols[0], source) if len(symbols) == 1
+           else trader.run_multi(symbols, source, maxsize=max(1, len(source))))
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        asyncio.run(run)
+    fills = trader.broker.fills
+    return {**source.stats(), "fills": len(fills), "fills_digest": fills_digest(fills)}
@@ -1,8 +1,99 @@
 from __future__ import annotations
-import asyncio
-from datetime import datetime
+import asyncio, copy, time
+from collections import deque
+from datetime import datetime, timezone
 import pandas as pd
+from core.instrument import TICKS, timed
 from core.types import Order, Side
+from data.ringbuffer import OHLCVRingBuffer
+from strategy.streaming import StreamingStrategy, RollingVolatility
+
+class SymbolState:
+    """Everything the live loop tracks for one symbol."""
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.bars = OHLCVRingBuffer(5000)
+        self.vol = RollingVolatility(120)
+        self.pos = None
+        self.stop = None
+        self.take = None
+        if isinstance(self.strategy, StreamingStrategy):
+            self.strategy.reset()
+
+class BoundedTickQueue:
+    """Tick queue with a fixed size. "drop_oldest" discards the oldest queued
+    tick when full; "conflate" keeps at most one pending tick per symbol and
+    replaces it on each put, so the consumer only sees the latest price.
+    """
+    def __init__(self, maxsize: int = 1000, policy: str = "drop_oldest"):
+        if policy not in ("drop_oldest", "conflate"):
+            raise ValueError(f"Unknown backpressure policy {policy!r}")
+        self.maxsize = int(maxsize)
+        self.policy = policy
+        self._q: deque = deque()
+        self._pending: dict = {}   # conflate: symbol -> its one-item slot in _q
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.conflated = 0
+        self.processed = 0
+        self.lag = 0.0   # seconds from trade timestamp to dequeue, last tick
+
+    def __len__(self) -> int:
+        return len(self._q)
+
+    def put(self, tick):
+        item = tick
+        if tick is not None and self.policy == "conflate":
+            slot = self._pending.get(tick.get("symbol"))
+            if slot is not None:
+                slot[0] = tick; self.conflated += 1
+                return
+            item = self._pending[tick.get("symbol")] = [tick]
+        if tick is not None and len(self._q) >= self.maxsize:
+            old = self._q.popleft(); self.dropped += 1
+            if isinstance(old, list):
+                self._pending.pop(old[0].get("symbol"), None)
+        self._q.append(item)
+        self._ready.set()
+
+    async def get(self):
+        while not self._q:
+            self._ready.clear()
+            await self._ready.wait()
+        tick = self._q.popleft()
+        if isinstance(tick, list):
+            tick = tick[0]
+            self._pending.pop(tick.get("symbol"), None)
+        if tick is not None:
+            self.processed += 1
+            ts = tick.get("ts")
+            if isinstance(ts, datetime):
+                self.lag = (datetime.now(timezone.utc) - ts).total_seconds()
+        return tick
+
+class TickFanout:
+    """Reads one shared trade stream and hands each tick to its symbol's queue without blocking."""
+    def __init__(self, symbols: list[str], maxsize: int = 1000, policy: str = "drop_oldest"):
+        self.queues = {s: BoundedTickQueue(maxsize, policy) for s in symbols}
+        self.received = 0
+        self.ignored = 0
+
+    async def pump(self, trade_async_iter):
+        try:
+            async for tick in trade_async_iter:
+                q = self.queues.get(tick.get("symbol"))
+                if q is None:
+                    self.ignored += 1
+                    continue
+                self.received += 1
+                q.put(tick)
+        finally:
+            for q in self.queues.values():
+                q.put(None)   # end of stream
+
+    def stats(self) -> dict:
+        return {s: {"depth": len(q), "lag_s": q.lag, "processed": q.processed, "dropped": q.dropped,
+                    "conflated": q.conflated} for s, q in self.queues.items()}
 
 class LiveTrader:
     def __init__(self, data_provider, broker, strategy, risk_manager):
@@ -10,80 +101,93 @@ class LiveTrader:
         self.broker = broker
         self.strategy = strategy
         self.risk = risk_manager
-        self.hist = pd.DataFrame(columns=["open","high","low","close","volume"]).astype(float)
-        self.pos = None
-        self.stop = None
-        self.take = None
+        self.state = SymbolState(strategy)
+        self.states: dict[str, SymbolState] = {}
+        self.fanout: TickFanout | None = None
+
+    # Single-symbol state, kept as attributes for existing callers
+    bars = property(lambda self: self.state.bars)
+    vol = property(lambda self: self.state.vol)
+    pos = property(lambda self: self.state.pos)
+    stop = property(lambda self: self.state.stop)
+    take = property(lambda self: self.state.take)
+
+    @property
+    def hist(self) -> pd.DataFrame:
+        return self.state.bars.to_frame()
+
+    def _on_price(self, st: SymbolState, price: float, ts: datetime, bar: dict | None = None) -> tuple[int, float]:
+        """Record a price (or a full aggregated bar) and return (signal, rolling_vol),
+        O(1) for streaming strategies.
+        """
+        if bar is not None:
+            st.bars.append(ts, bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+        else:
+            st.bars.append_price(ts, price)
+        if isinstance(st.strategy, StreamingStrategy):
+            current = st.strategy.on_tick(price)
+        else:
+            sig = st.strategy.generate_signals(st.bars.to_frame())
+            current = int(sig.iloc[-1]) if len(sig) else 0
+        return current, st.vol.update(price)
 
-    def _update_hist(self, price: float, ts: datetime):
-        row = pd.DataFrame({"open":[price],"high":[price],"low":[price],"close":[price],"volume":[float("nan")]}, index=[pd.to_datetime(ts)])
-        self.hist = pd.concat([self.hist, row]).tail(5000)
+    @timed("tick")
+    def _handle_tick(self, st: SymbolState, symbol: str, price: float, ts: datetime, bar: dict | None = None):
+        TICKS.inc(symbol=symbol)
+        current, rolling_vol = self._on_price(st, price, ts, bar)
+
+        # Check stop levels
+        if st.pos.qty != 0 and st.stop is not None and st.take is not None:
+            if (price <= st.stop and st.pos.qty > 0) or (price >= st.take and st.pos.qty > 0):
+                qty = abs(st.pos.qty)
+                fill = self.broker.submit(Order(symbol, Side.SELL, qty, None, ts, tag="live-exit"), ref_price=price)
+                print(f"[Live] EXIT {qty} {symbol} @ {fill.fill_price}")
+                st.pos = self.broker.position(symbol)
+                st.stop = st.take = None
+
+        if current > 0 and st.pos.qty <= 0:
+            qty = max(1, self.risk.position_size(10000.0, price, rolling_vol))  # demo equity
+            fill = self.broker.submit(Order(symbol, Side.BUY, qty, None, ts, tag="live-entry"), ref_price=price)
+            print(f"[Live] BUY {qty} {symbol} @ {fill.fill_price}")
+            st.pos = self.broker.position(symbol)
+            st.stop, st.take = self.risk.stop_levels(fill.fill_price)
+        elif current < 0 and st.pos.qty > 0:
+            qty = abs(st.pos.qty)
+            fill = self.broker.submit(Order(symbol, Side.SELL, qty, None, ts, tag="live-flip"), ref_price=price)
+            print(f"[Live] SELL {qty} {symbol} @ {fill.fill_price}")
+            st.pos = self.broker.position(symbol)
+            st.stop = st.take = None
 
     async def run_websocket(self, symbol: str, trade_async_iter):
+        """Trade one symbol from a stream of ticks, or of bars from data.bars.aggregate()."""
         print(f"[Live] Websocket trading for {symbol}")
-        self.pos = self.broker.position(symbol)
+        self.state.pos = self.broker.position(symbol)
         async for tick in trade_async_iter:
             if tick.get("symbol") != symbol:
                 continue
-            price = float(tick["price"]); ts = tick["ts"]
-            self._update_hist(price, ts)
+            self._handle_tick(self.state, symbol, float(tick["price"]), tick["ts"], tick if "open" in tick else None)
 
-            sig = self.strategy.generate_signals(self.hist)
-            current = int(sig.iloc[-1]) if len(sig) else 0
-            rets = self.hist["close"].pct_change().dropna()
-            rolling_vol = rets.tail(120).std() if len(rets) > 10 else 0.0
-
-            # Check stop levels
-            if self.pos.qty != 0 and self.stop is not None and self.take is not None:
-                if (price <= self.stop and self.pos.qty > 0) or (price >= self.take and self.pos.qty > 0):
-                    qty = abs(self.pos.qty)
-                    fill = self.broker.submit(Order(symbol, Side.SELL, qty, None, ts, tag="live-exit"), ref_price=price)
-                    print(f"[Live] EXIT {qty} {symbol} @ {fill.fill_price}")
-                    self.pos = self.broker.position(symbol)
-                    self.stop = self.take = None
-
-            if current > 0 and self.pos.qty <= 0:
-                qty = max(1, self.risk.position_size(10000.0, price, rolling_vol))  # demo equity
-                fill = self.broker.submit(Order(symbol, Side.BUY, qty, None, ts, tag="live-entry"), ref_price=price)
-                print(f"[Live] BUY {qty} {symbol} @ {fill.fill_price}")
-                self.pos = self.broker.position(symbol)
-                self.stop, self.take = self.risk.stop_levels(fill.fill_price)
-            elif current < 0 and self.pos.qty > 0:
-                qty = abs(self.pos.qty)
-                fill = self.broker.submit(Order(symbol, Side.SELL, qty, None, ts, tag="live-flip"), ref_price=price)
-                print(f"[Live] SELL {qty} {symbol} @ {fill.fill_price}")
-                self.pos = self.broker.position(symbol)
-                self.stop = self.take = None
+    async def run_multi(self, symbols: list[str], trade_async_iter, maxsize: int = 1000, policy: str = "drop_oldest"):
+        """Trade many symbols from one shared stream. Each symbol gets its own
+        strategy copy and a bounded queue; see self.fanout.stats() for depth and lag.
+        """
+        print(f"[Live] Websocket trading for {', '.join(symbols)}")
+        self.fanout = TickFanout(symbols, maxsize, policy)
+        self.states = {s: SymbolState(copy.deepcopy(self.strategy)) for s in symbols}
+
+        async def consume(symbol: str):
+            st, q = self.states[symbol], self.fanout.queues[symbol]
+            st.pos = self.broker.position(symbol)
+            while (tick := await q.get()) is not None:
+                self._handle_tick(st, symbol, float(tick["price"]), tick["ts"], tick if "open" in tick else None)
+                await asyncio.sleep(0)   # let the pump and other symbols run
+
+        await asyncio.gather(self.fanout.pump(trade_async_iter), *(consume(s) for s in symbols))
 
     def run_polling(self, symbol: str, poll_secs: int = 10):
-        import time
         print(f"[Live] Polling {symbol} every {poll_secs}s")
-        self.pos = self.broker.position(symbol)
+        self.state.pos = self.broker.position(symbol)
         while True:
             tick = self.data.latest(symbol)
-            price = float(tick["price"]) ; ts = tick["ts"]
-            self._update_hist(price, ts)
-            sig = self.strategy.generate_signals(self.hist)
-            current = int(sig.iloc[-1]) if len(sig) else 0
-            rets = self.hist["close"].pct_change().dropna()
-            rolling_vol = rets.tail(120).std() if len(rets) > 10 else 0.0
-            if self.pos.qty != 0 and self.stop is not None and self.take is not None:
-                if (price <= self.stop and self.pos.qty > 0) or (price >= self.take and self.pos.qty > 0):
-                    qty = abs(self.pos.qty)
-                    fill = self.broker.submit(Order(symbol, Side.SELL, qty, None, ts, tag="live-exit"), ref_price=price)
-                    print(f"[Live] EXIT {qty} {symbol} @ {fill.fill_price}")
-                    self.pos = self.broker.position(symbol)
-                    self.stop = self.take = None
-            if current > 0 and self.pos.qty <= 0:
-                qty = max(1, self.risk.position_size(10000.0, price, rolling_vol))
-                fill = self.broker.submit(Order(symbol, Side.BUY, qty, None, ts, tag="live-entry"), ref_price=price)
-                print(f"[Live] BUY {qty} {symbol} @ {fill.fill_price}")
-                self.pos = self.broker.position(symbol)
-                self.stop, self.take = self.risk.stop_levels(fill.fill_price)
-            elif current < 0 and self.pos.qty > 0:
-                qty = abs(self.pos.qty)
-                fill = self.broker.submit(Order(symbol, Side.SELL, qty, None, ts, tag="live-flip"), ref_price=price)
-                print(f"[Live] SELL {qty} {symbol} @ {fill.fill_price}")
-                self.pos = self.broker.position(symbol)
-                self.stop = self.take = None
+            self._handle_tick(self.state, symbol, float(tick["price"]), tick["ts"])
             time.sleep(poll_secs)
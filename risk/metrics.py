@@ -49,4 +49,55 @@ class Risk:
         return float(cov / var_m)
     @staticmethod
     def historical_var(returns: pd.Series, level: float = 0.95) -> float:
-        return float(np.percentile(returns, (1-level)*100)) if len(returns) else float("nan")
\ No newline at end of file
+        return float(np.percentile(returns, (1-level)*100)) if len(returns) else float("nan")
+    @staticmethod
+    def batch(equity: np.ndarray, rf: float = 0.0, periods: int = 252, level: float = 0.95) -> dict[str, np.ndarray]:
+        """Every summary metric for a (runs x bars) array of equity curves in one pass.
+        Matches the per-Series functions above row by row; each value is an array of length runs.
+        """
+        eq = np.atleast_2d(np.asarray(equity, dtype=float))
+        runs, n = eq.shape
+        m = n - 1
+        var_key = f"VaR_{int(round(level*100))}"
+        if m < 1:
+            nan = np.full(runs, np.nan)
+            mdd = (eq / np.maximum.accumulate(eq, axis=1) - 1.0).min(axis=1) if n else nan
+            return {"CAGR": nan, "Sharpe": nan, "Sortino": nan, "Volatility": nan,
+                    "MaxDrawdown": mdd, "Calmar": nan.copy(), var_key: nan.copy()}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rets = eq[:, 1:] / eq[:, :-1] - 1.0
+            ex = rets - rf/periods
+            mean = ex.mean(axis=1)
+            std = ex.std(axis=1, ddof=1) if m > 1 else np.full(runs, np.nan)
+            sharpe = np.sqrt(periods) * mean / np.where(std == 0, 1e-12, std)
+            # Downside deviation: sample std of the negative excess returns only
+            neg = ex < 0
+            cnt = neg.sum(axis=1)
+            dmean = np.where(neg, ex, 0.0).sum(axis=1) / cnt
+            dvar = np.where(neg, (ex - dmean[:, None])**2, 0.0).sum(axis=1) / (cnt - 1)
+            dstd = np.where(cnt > 1, np.sqrt(dvar), np.nan)
+            sortino = np.sqrt(periods) * mean / np.where(dstd == 0, 1e-12, dstd)
+            vol = rets.std(axis=1, ddof=1) * np.sqrt(periods) if m > 1 else np.full(runs, np.nan)
+            mdd = (eq / np.maximum.accumulate(eq, axis=1) - 1.0).min(axis=1)
+            cagr = (eq[:, -1] / eq[:, 0]) ** (periods/m) - 1
+            calmar = cagr / (np.abs(mdd) + 1e-12)
+        var = np.percentile(rets, (1-level)*100, axis=1)
+        return {"CAGR": cagr, "Sharpe": sharpe, "Sortino": sortino, "Volatility": vol,
+                "MaxDrawdown": mdd, "Calmar": calmar, var_key: var}
+    @staticmethod
+    def summary(equity: pd.Series, rf: float = 0.0, periods: int = 252, level: float = 0.95) -> dict:
+        """Summary metrics of one equity curve as plain floats, via Risk.batch."""
+        return {k: float(v[0]) for k, v in Risk.batch(equity.to_numpy(dtype=float)[None, :], rf, periods, level).items()}
+    @staticmethod
+    def rolling_sharpe(returns: pd.Series | pd.DataFrame, window: int, rf: float = 0.0, periods: int = 252):
+        ex = returns - rf/periods
+        roll = ex.rolling(window, min_periods=window)
+        std = roll.std(ddof=1)
+        return np.sqrt(periods) * roll.mean() / std.where(std != 0, 1e-12)
+    @staticmethod
+    def rolling_drawdown(equity: pd.Series | pd.DataFrame, window: int):
+        """Drawdown from the highest equity of the trailing `window` bars."""
+        return equity / equity.rolling(window, min_periods=1).max() - 1.0
+    @staticmethod
+    def rolling_var(returns: pd.Series | pd.DataFrame, window: int, level: float = 0.95):
+        return returns.rolling(window, min_periods=window).quantile(1-level, interpolation="linear")
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from core.tradelog import TradeLog
+from core.types import Side
+from risk.metrics import Risk
+
+METRICS = ["Sharpe", "MaxDrawdown", "CAGR"]
+
+def _path_metrics(rets: np.ndarray, periods: float, cagr_power: float) -> np.ndarray:
+    """(paths x steps) returns -> (paths x 3) Sharpe, max drawdown, CAGR. Overwrites rets."""
+    m = rets.shape[1]
+    s1 = rets.sum(axis=1)
+    s2 = np.einsum("ij,ij->i", rets, rets)
+    std = np.sqrt(np.maximum(s2 - s1 * s1 / m, 0.0) / (m - 1))
+    sharpe = np.sqrt(periods) * (s1 / m) / np.where(std == 0, 1e-12, std)
+    eq = np.cumprod(np.add(rets, 1.0, out=rets), axis=1, out=rets)
+    peak = np.maximum.accumulate(eq, axis=1)
+    np.maximum(peak, 1.0, out=peak)   # starting capital counts as the first peak
+    mdd = np.minimum(np.divide(eq, peak, out=peak).min(axis=1) - 1.0, 0.0)
+    cagr = eq[:, -1] ** cagr_power - 1
+    return np.column_stack([sharpe, mdd, cagr])
+
+def trade_returns(trades) -> np.ndarray:
+    """Return of each round trip (flat -> long -> flat) in a list of fills, net of commission."""
+    if isinstance(trades, TradeLog):
+        return trades.round_trips()["return"].to_numpy(dtype=float)
+    out, cost, qty = [], {}, {}
+    for f in trades:
+        sym, q = f.order.symbol, f.order.qty
+        if f.order.side == Side.BUY:
+            cost[sym] = cost.get(sym, 0.0) + q * f.fill_price + f.commission
+            qty[sym] = qty.get(sym, 0) + q
+        elif qty.get(sym, 0) > 0:
+            frac = min(q, qty[sym]) / qty[sym]
+            basis = cost[sym] * frac
+            out.append((q * f.fill_price - f.commission) / basis - 1.0)
+            cost[sym] -= basis; qty[sym] -= min(q, qty[sym])
+    return np.asarray(out, dtype=float)
+
+class MonteCarloResult:
+    def __init__(self, samples: pd.DataFrame, point: dict, method: str):
+        self.samples = samples    # one row per simulated path
+        self.point = point        # the backtest's own metrics
+        self.method = method
+
+    def confidence_intervals(self, level: float = 0.95) -> pd.DataFrame:
+        lo, hi = (1 - level) / 2, 1 - (1 - level) / 2
+        q = self.samples.quantile([lo, 0.5, hi])
+        return pd.DataFrame({"point": [self.point.get(k, float("nan")) for k in self.samples.columns],
+                             "lower": q.iloc[0].values, "median": q.iloc[1].values, "upper": q.iloc[2].values},
+                            index=self.samples.columns)
+
+class MonteCarlo:
+    """Resampling robustness check for a BacktestResult.
+    iid: draw bar returns with replacement; block: circular block bootstrap that
+    keeps short-range autocorrelation; trades: reshuffle the order of round-trip
+    trade returns (CAGR and Sharpe are order-free, drawdown is not).
+    Paths are generated in chunks of about `chunk_elems` values so 100k x 2,500
+    bar runs fit in a few hundred MB.
+    """
+    def __init__(self, result, periods: int = 252, seed: int | None = None, chunk_elems: int = 1 << 20):
+        self.result = result
+        self.periods = periods
+        self.rng = np.random.default_rng(seed)
+        self.chunk_elems = int(chunk_elems)
+        self.returns = Risk.daily_returns(result.equity_curve).to_numpy(dtype=float)
+
+    def _indices(self, method: str, rows: int, m: int, block: int) -> np.ndarray:
+        if method == "iid":
+            return self.rng.integers(0, m, size=(rows, m), dtype=np.int32)
+        k = -(-m // block)
+        starts = self.rng.integers(0, m, size=(rows, k, 1), dtype=np.int32)
+        return ((starts + np.arange(block)) % m).reshape(rows, k * block)[:, :m]
+
+    def run(self, n_paths: int = 10_000, method: str = "iid", block: int = 20) -> MonteCarloResult:
+        if method == "trades":
+            base = trade_returns(self.result.trades)
+            # Trades per year, so per-trade Sharpe is annualised on the backtest's own clock
+            periods = len(base) * self.periods / max(len(self.returns), 1)
+        elif method in ("iid", "block"):
+            base = self.returns
+            periods = self.periods
+        else:
+            raise ValueError(f"Unknown method {method!r}, expected 'iid', 'block' or 'trades'")
+        m = len(base)
+        if m < 2:
+            raise ValueError(f"Need at least 2 {'trades' if method == 'trades' else 'returns'} to resample")
+        out = np.empty((n_paths, len(METRICS)))
+        rows = max(1, self.chunk_elems // m)
+        for a in range(0, n_paths, rows):
+            r = min(rows, n_paths - a)
+            if method == "trades":
+                paths = self.rng.permuted(np.broadcast_to(base, (r, m)), axis=1)
+            else:
+                paths = base[self._indices(method, r, m, block)]
+            out[a:a+r] = _path_metrics(paths, periods, self.periods / max(len(self.returns), 1))
+        return MonteCarloResult(pd.DataFrame(out, columns=METRICS), dict(self.result.metrics), method)
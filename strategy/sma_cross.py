@@ -1,15 +1,47 @@
 from __future__ import annotations
 import pandas as pd
+from core.instrument import timed
+from strategy.streaming import StreamingStrategy, RollingMean
 
-class MovingAverageCross:
-    def __init__(self, fast: int = 20, slow: int = 50):
+class RollingMeanCache:
+    """Rolling means of one close series, computed once per window length.
+    Strategies built on slices of that series (walk-forward windows, sweeps)
+    read their indicators from here instead of recomputing them.
+    """
+    def __init__(self, close: pd.Series):
+        self.close = close.astype(float)
+        self._means: dict[int, pd.Series] = {}
+    def mean(self, window: int) -> pd.Series:
+        if window not in self._means:
+            self._means[window] = self.close.rolling(window, min_periods=window).mean()
+        return self._means[window]
+
+class MovingAverageCross(StreamingStrategy):
+    def __init__(self, fast: int = 20, slow: int = 50, cache: RollingMeanCache | None = None):
         self.fast = int(fast); self.slow = int(slow)
         if self.fast <= 1 or self.slow <= 2 or self.fast >= self.slow:
             raise ValueError("Require 1 < fast < slow")
+        self.cache = cache
+        self.reset()
+    @timed("signals")
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
-        px = df["close"].astype(float)
-        fast = px.rolling(self.fast, min_periods=self.fast).mean()
-        slow = px.rolling(self.slow, min_periods=self.slow).mean()
+        if self.cache is not None:
+            # Means over the full cached series, so a slice starts with warmed-up values
+            fast = self.cache.mean(self.fast).reindex(df.index)
+            slow = self.cache.mean(self.slow).reindex(df.index)
+        else:
+            px = df["close"].astype(float)
+            fast = px.rolling(self.fast, min_periods=self.fast).mean()
+            slow = px.rolling(self.slow, min_periods=self.slow).mean()
         raw = (fast > slow).astype(int) - (fast < slow).astype(int)
         sig = raw.ffill().fillna(0)
-        return sig
\ No newline at end of file
+        return sig
+    def on_tick(self, price: float) -> int:
+        fast = self._fast_ma.update(float(price))
+        slow = self._slow_ma.update(float(price))
+        if not self._slow_ma.ready:
+            return 0
+        return int(fast > slow) - int(fast < slow)
+    def reset(self) -> None:
+        self._fast_ma = RollingMean(self.fast)
+        self._slow_ma = RollingMean(self.slow)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import math
+from collections import deque
+
+class StreamingStrategy:
+    """Strategy fed one price at a time. on_tick returns the signal in {-1,0,1}
+    that generate_signals would give for the last row of the same price history.
+    """
+    def on_tick(self, price: float) -> int:
+        raise NotImplementedError
+    def reset(self) -> None:
+        raise NotImplementedError
+
+class RollingMean:
+    """Mean of the last `window` values, O(1) per update via a running sum."""
+    def __init__(self, window: int):
+        self.window = int(window)
+        self.values: deque[float] = deque(maxlen=self.window)
+        self.total = 0.0
+        self._since_resum = 0
+
+    def update(self, x: float) -> float:
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        self._since_resum += 1
+        # Re-add the window exactly now and then so add/subtract rounding cannot drift
+        if self._since_resum >= self.window:
+            self.total = math.fsum(self.values); self._since_resum = 0
+        return self.mean
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.ready else float("nan")
+
+class RollingVolatility:
+    """Sample std (ddof=1) of the last `window` simple returns of a price stream.
+    Matches close.pct_change().tail(window).std() once more than `min_periods`
+    returns have been seen, and gives 0.0 before that like the live loop.
+    """
+    def __init__(self, window: int = 120, min_periods: int = 11):
+        self.window = int(window)
+        self.min_periods = int(min_periods)
+        self.rets: deque[float] = deque(maxlen=self.window)
+        self.count = 0
+        self.last_price: float | None = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, price: float) -> float:
+        price = float(price)
+        if self.last_price is not None and self.last_price != 0:
+            r = price / self.last_price - 1.0
+            if len(self.rets) == self.window:
+                # Welford removal of the oldest return
+                y = self.rets[0]; n = len(self.rets) - 1
+                d = y - self._mean
+                self._mean = self._mean - d / n if n else 0.0
+                self._m2 -= d * (y - self._mean)
+            self.rets.append(r); self.count += 1
+            n = len(self.rets)
+            d = r - self._mean
+            self._mean += d / n
+            self._m2 += d * (r - self._mean)
+        self.last_price = price
+        return self.value
+
+    @property
+    def value(self) -> float:
+        n = len(self.rets)
+        if self.count < self.min_periods or n < 2:
+            return 0.0
+        return math.sqrt(max(self._m2, 0.0) / (n - 1))
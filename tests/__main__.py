@@ -1,5 +1,5 @@
 from __future__ import annotations
-import math
+import math, time
 from datetime import datetime, timedelta, timezone
 import pandas as pd
 import numpy as np
@@ -10,13 +10,21 @@ from ..backtest.engine import Backtester
 from ..risk.manager import RiskManager, RiskConfig
 from ..brokers.paper import PaperBroker
 from ..charts.report import Report
+from ..backtest.sweep import sweep
+from ..strategy.streaming import RollingVolatility
+from ..data.ringbuffer import OHLCVRingBuffer
+from ..data.cache import CachingProvider
+from ..data.providers import DataProvider
+from ..backtest.portfolio import PortfolioBacktester
+from ..backtest.walkforward import walk_forward, windows
+from ..strategy.sma_cross import RollingMeanCache
 
 OK = "\x1b[92mOK\x1b[0m"; FAIL = "\x1b[91mFAIL\x1b[0m"
 
 def _fake_price_series(n=200, seed=42):
     rng = np.random.default_rng(seed)
     rets = rng.normal(0, 0.01, size=n)
-    px = 100 * (1 + pd.Series(rets)).cumprod()
+    px = 100 * (1 + pd.Series(rets)).cumprod().to_numpy()
     idx = pd.date_range(datetime.now(timezone.utc) - timedelta(days=n), periods=n, freq="D", tz=timezone.utc)
     df = pd.DataFrame({"open":px, "high":px*1.01, "low":px*0.99, "close":px, "volume":1_000}, index=idx)
     return df
@@ -52,11 +60,855 @@ def test_risk_metrics_sanity():
     _ = Risk.max_drawdown(eq); _ = Risk.calmar(eq); _ = Risk.historical_var(rets)
     print("test_risk_metrics_sanity:", OK)
 
+
+def test_vectorized_engine_matches_loop():
+    df = _fake_price_series(n=1500, seed=7)
+    df["close"] = df["close"] * (1 + np.random.default_rng(3).normal(0, 0.02, len(df)))
+    results = {}
+    for mode in ("loop", "vectorized"):
+        bt = Backtester(df, MovingAverageCross(5, 20), 10_000.0, PaperBroker(commission_per_share=0.01), RiskManager(RiskConfig()))
+        results[mode] = bt.run("TEST", mode=mode)
+    ref, fast = results["loop"], results["vectorized"]
+    key = lambda f: (f.order.side, f.order.qty, f.order.price, f.order.ts, f.order.tag, f.fill_price, f.commission)
+    assert [key(f) for f in ref.trades] == [key(f) for f in fast.trades], "Vectorized trades differ from loop"
+    assert any(f.order.tag == "exit" for f in ref.trades), "Fixture should exercise stop/take exits"
+    pd.testing.assert_series_equal(ref.equity_curve, fast.equity_curve, check_freq=False)
+    assert ref.metrics == fast.metrics or all(
+        np.isclose(ref.metrics[k], fast.metrics[k], equal_nan=True) for k in ref.metrics), "Vectorized metrics differ"
+    print("test_vectorized_engine_matches_loop:", OK)
+
+def test_parallel_sweep_matches_serial():
+    df = _fake_price_series(n=400)
+    kw = dict(fast=[5, 10], slow=[10, 30], stop_loss_pct=[0.03, 0.05])
+    par = sweep(df, "TEST", processes=2, **kw)
+    ser = sweep(df, "TEST", processes=1, **kw)
+    assert len(par) == 6, "fast >= slow pairs should be skipped"
+    pd.testing.assert_frame_equal(par, ser)
+    assert par["Sharpe"].is_monotonic_decreasing, "Sweep should be ranked by Sharpe"
+    print("test_parallel_sweep_matches_serial:", OK)
+
+def test_streaming_signals_match_batch():
+    df = _fake_price_series(n=600, seed=11)
+    strat = MovingAverageCross(5, 20)
+    batch = strat.generate_signals(df)
+    stream = [strat.on_tick(p) for p in df["close"]]
+    assert stream == [int(v) for v in batch], "on_tick must agree with generate_signals"
+    vol = RollingVolatility(120)
+    got = [vol.update(p) for p in df["close"]]
+    rets = df["close"].pct_change()
+    for i in (5, 11, 12, 119, 121, 599):
+        r = rets.iloc[:i+1].dropna()
+        want = r.tail(120).std() if len(r) > 10 else 0.0
+        assert math.isclose(got[i], want, rel_tol=1e-9, abs_tol=1e-12), f"Rolling vol mismatch at {i}"
+    print("test_streaming_signals_match_batch:", OK)
+
+def test_ring_buffer_history():
+    df = _fake_price_series(n=50)
+    buf = OHLCVRingBuffer(capacity=16)
+    for ts, price in df["close"].items():
+        buf.append_price(ts, price)
+    assert len(buf) == 16, "Ring buffer should cap at capacity"
+    assert np.array_equal(buf.column("close"), df["close"].to_numpy()[-16:]), "Window should hold the newest bars in order"
+    assert np.shares_memory(buf.window(4), buf.window()), "window() should be a view, not a copy"
+    frame = buf.to_frame(5)
+    assert list(frame.index) == list(df.index[-5:]) and np.isnan(frame["volume"]).all(), "to_frame export mismatch"
+    print("test_ring_buffer_history:", OK)
+
+class _FakeProvider(DataProvider):
+    def __init__(self):
+        self.calls = []
+    def history(self, symbol, start, end, interval="1d"):
+        self.calls.append((start, end))
+        idx = pd.date_range(start, end, freq="D", tz="UTC", inclusive="left")
+        px = np.arange(len(idx), dtype=float) + idx.day
+        return pd.DataFrame({"open":px, "high":px, "low":px, "close":px, "volume":1.0}, index=idx)
+
+
+def test_caching_provider_fills_gaps():
+    import os, tempfile
+    with tempfile.TemporaryDirectory() as d:
+        inner = _FakeProvider()
+        cache = CachingProvider(inner, cache_dir=d, offline=False)
+        a = cache.history("TEST", "2023-01-10", "2023-02-01")
+        b = cache.history("TEST", "2023-01-01", "2023-02-15")
+        assert inner.calls == [("2023-01-10","2023-02-01"), ("2023-01-01","2023-01-10"), ("2023-02-01","2023-02-15")], \
+            "Only missing ranges should be downloaded"
+        assert len(a) == 22 and len(b) == 45 and b.index.is_monotonic_increasing, "Cached slice mismatch"
+        pd.testing.assert_frame_equal(b.loc[a.index], a)
+        offline = CachingProvider(None, cache_dir=d, offline=True)
+        pd.testing.assert_frame_equal(offline.history("TEST", "2023-01-05", "2023-01-20"), b.loc["2023-01-05":"2023-01-19"])
+        assert (cache.hits, cache.misses) == (0, 2), "Hit/miss counters wrong"
+        # A slow download blocks only its own series
+        import threading
+        gate = threading.Event()
+        class Slow(_FakeProvider):
+            def history(self, symbol, start, end, interval="1d"):
+                if symbol == "SLOW":
+                    gate.wait(5)
+                return super().history(symbol, start, end, interval)
+        slow = CachingProvider(Slow(), cache_dir=d, offline=False)
+        t = threading.Thread(target=slow.history, args=("SLOW", "2023-01-01", "2023-01-05"))
+        t.start()
+        time.sleep(0.05)
+        assert len(slow.history("FAST", "2023-01-01", "2023-01-05")) == 4 and t.is_alive(), "Other series should not wait"
+        gate.set(); t.join(5)
+        def fail(*a, **k):
+            raise OSError("disk full")
+        real, np.savez = np.savez, fail
+        try:
+            slow.history("FAIL", "2023-01-01", "2023-01-05")
+            raise AssertionError("Save errors should propagate")
+        except OSError:
+            pass
+        finally:
+            np.savez = real
+        assert sorted(os.listdir(d)) == ["FAST_1d.npz", "SLOW_1d.npz", "TEST_1d.npz"], "Temp file left behind"
+    print("test_caching_provider_fills_gaps:", OK)
+
+def test_portfolio_backtester():
+    one = _fake_price_series(n=500, seed=1)
+    single = Backtester(one, MovingAverageCross(5, 20), 10_000.0, PaperBroker(), RiskManager(RiskConfig())).run("A")
+    solo = PortfolioBacktester({"A": one}, MovingAverageCross(5, 20), 10_000.0, PaperBroker(), RiskManager(RiskConfig())).run()
+    pd.testing.assert_series_equal(single.equity_curve, solo.equity_curve, check_freq=False)
+    frames = {"A": one, "B": _fake_price_series(n=500, seed=2).set_axis(one.index).iloc[100:],
+              "C": _fake_price_series(n=500, seed=3).set_axis(one.index)}
+    res = PortfolioBacktester(frames, MovingAverageCross(5, 20), 30_000.0, PaperBroker(), RiskManager(RiskConfig())).run()
+    assert list(res.attribution.columns) == ["A", "B", "C"] and len(res.equity_curve) == 500, "Portfolio output shape mismatch"
+    assert (res.positions["B"].iloc[:100] == 0).all(), "No trades before a symbol has data"
+    assert np.allclose(30_000.0 + res.attribution.sum(axis=1), res.equity_curve), "Attribution must add up to equity"
+    print("test_portfolio_backtester:", OK)
+
+def test_walk_forward():
+    assert windows(10, 4, 2) == [(0,4,4,6), (2,6,6,8), (4,8,8,10)]
+    assert windows(10, 4, 3, anchored=True) == [(0,4,4,7), (0,7,7,10)]
+    df = _fake_price_series(n=600, seed=5)
+    cached = MovingAverageCross(5, 20, cache=RollingMeanCache(df["close"]))
+    pd.testing.assert_series_equal(cached.generate_signals(df), MovingAverageCross(5, 20).generate_signals(df))
+    kw = dict(fast=[5, 10], slow=[20, 40], train=200, test=100)
+    par = walk_forward(df, "TEST", processes=2, **kw)
+    ser = walk_forward(df, "TEST", processes=1, **kw)
+    assert len(par.windows) == 4 and len(par.equity_curve) == 400, "Walk-forward windows mismatch"
+    assert par.equity_curve.index.is_unique and par.equity_curve.index[0] == df.index[200], "OOS curves should tile the test span"
+    pd.testing.assert_series_equal(par.equity_curve, ser.equity_curve, check_freq=False)
+    try:
+        walk_forward(df, "TEST", processes=1, rank_by="sharpe", **kw)
+        raise AssertionError("Unknown rank_by should raise")
+    except ValueError:
+        pass
+    from ..backtest import walkforward as wf
+    from types import SimpleNamespace
+    scores = {5: float("nan"), 10: 0.5, 15: 0.2}
+    real, wf._backtest = wf._backtest, lambda d, p: SimpleNamespace(metrics={"Sharpe": scores[p["fast"]]}, equity_curve=None, trades=None)
+    try:
+        wf._setup(df, "TEST", 100000.0, {}, [{"fast": f, "slow": 40} for f in scores], "Sharpe")
+        r = wf._run_window((0, 200, 200, 300))
+        assert r["params"]["fast"] == 10 and r["score"] == 0.5, "A NaN score should never be picked over a real one"
+    finally:
+        wf._backtest = real
+        wf._WORKER.clear()
+    print("test_walk_forward:", OK)
+
+def test_batch_metrics_match_scalar():
+    from ..risk.metrics import Risk
+    rng = np.random.default_rng(9)
+    curves = 10_000 * np.cumprod(1 + rng.normal(0.0005, 0.01, size=(4, 300)), axis=1)
+    curves[3] = 10_000.0  # flat curve: zero volatility, no downside
+    got = Risk.batch(curves)
+    for i, row in enumerate(curves):
+        eq = pd.Series(row); rets = Risk.daily_returns(eq)
+        want = {"CAGR": (eq.iloc[-1] / eq.iloc[0]) ** (252/len(rets)) - 1, "Sharpe": Risk.sharpe(rets),
+                "Sortino": Risk.sortino(rets), "Volatility": Risk.volatility(rets), "MaxDrawdown": Risk.max_drawdown(eq),
+                "Calmar": Risk.calmar(eq), "VaR_95": Risk.historical_var(rets, 0.95)}
+        for k, v in want.items():
+            assert np.isclose(got[k][i], v, rtol=1e-9, atol=1e-12, equal_nan=True), f"{k} mismatch on run {i}"
+    rets = Risk.daily_returns(pd.Series(curves[0]))
+    roll = Risk.rolling_sharpe(rets, 60)
+    assert np.isclose(roll.iloc[-1], Risk.sharpe(rets.iloc[-60:])), "Rolling Sharpe mismatch"
+    assert np.isclose(Risk.rolling_var(rets, 60).iloc[-1], Risk.historical_var(rets.iloc[-60:])), "Rolling VaR mismatch"
+    eq = pd.Series(curves[0])
+    assert np.isclose(Risk.rolling_drawdown(eq, 50).iloc[-1], eq.iloc[-1] / eq.iloc[-50:].max() - 1), "Rolling drawdown mismatch"
+    print("test_batch_metrics_match_scalar:", OK)
+
+def test_monte_carlo_bootstrap():
+    from ..risk.montecarlo import MonteCarlo
+    df = _fake_price_series(n=800, seed=4)
+    res = Backtester(df, MovingAverageCross(5, 20), 10_000.0, PaperBroker(), RiskManager(RiskConfig())).run("TEST")
+    for method in ("iid", "block"):
+        mc = MonteCarlo(res, seed=1, chunk_elems=5_000).run(500, method)
+        ci = mc.confidence_intervals(0.9)
+        assert mc.samples.shape == (500, 3) and (ci["lower"] <= ci["upper"]).all(), f"{method} bootstrap shape/CI mismatch"
+        assert (mc.samples["MaxDrawdown"] <= 0).all(), "Drawdowns must be non-positive"
+    shuffled = MonteCarlo(res, seed=1).run(200, "trades").samples
+    assert np.allclose(shuffled["CAGR"], shuffled["CAGR"].iloc[0]), "Reordering trades must not change CAGR"
+    print("test_monte_carlo_bootstrap:", OK)
+
+def _serve(handler_cls):
+    import threading
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_async_alpaca_broker_against_stub():
+    import asyncio, json, os
+    from http.server import BaseHTTPRequestHandler
+    from ..brokers.alpaca import AsyncAlpacaBroker
+    from ..core.types import Order, Side
+    seen = {"orders": [], "peers": set()}
+
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def log_message(self, *args):
+            pass
+        def _reply(self, body):
+            raw = json.dumps(body).encode()
+            self.send_response(200); self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw))); self.end_headers(); self.wfile.write(raw)
+        def do_POST(self):
+            seen["peers"].add(self.client_address)
+            seen["orders"].append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self._reply({"id": str(len(seen["orders"])), "status": "accepted"})
+        def do_GET(self):
+            seen["peers"].add(self.client_address)
+            path, _, query = self.path.partition("?")
+            if path == "/v2/stocks/trades/latest":
+                syms = query.split("symbols=")[1].split("%2C")
+                self._reply({"trades": {s: {"p": 100.0 + len(s)} for s in syms}})
+            else:
+                sym = path.split("/")[3]
+                self._reply({"symbol": sym, "trade": {"p": 100.0 + len(sym)}})
+
+    server = _serve(Stub)
+    env = {"ALPACA_BASE_URL": f"http://127.0.0.1:{server.server_port}", "ALPACA_API_KEY": "k", "ALPACA_API_SECRET": "s"}
+    old = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    try:
+        async def scenario():
+            async with AsyncAlpacaBroker(max_connections=4) as broker:
+                syms = ["A", "BB", "CCC", "DDDD", "A"]
+                prices = await broker.latest_prices(syms)
+                orders = [Order(s, Side.BUY, 10, None, datetime.now(timezone.utc)) for s in syms]
+                fills = await broker.submit_many(orders)
+                single = await broker.submit_async(orders[0])
+                return prices, fills + [single], broker.position("A").qty, broker.stats.summary()
+        prices, fills, qty_a, stats = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+        for k, v in old.items():
+            if v is None:
+                os.environ.pop(k)
+            else:
+                os.environ[k] = v
+    assert prices == {"A": 101.0, "BB": 102.0, "CCC": 103.0, "DDDD": 104.0}, "Batched quote lookup mismatch"
+    assert [f.fill_price for f in fills] == [101.0, 102.0, 103.0, 104.0, 101.0, 101.0] and qty_a == 30, "Fills/positions mismatch"
+    assert len(seen["orders"]) == 6 and stats["orders"]["count"] == 6, "Request stats mismatch"
+    assert stats["latest_trades"]["count"] == 2 and stats["latest_trade"]["count"] == 1, "Quote batches should be one request each"
+    assert len(seen["peers"]) <= 4, "Requests should reuse pooled keep-alive connections"
+    print("test_async_alpaca_broker_against_stub:", OK)
+
+def test_multi_symbol_fanout_over_fake_websocket():
+    import asyncio, json, os
+    import websockets
+    from ..data.providers import AlpacaRealtime
+    from ..live.runner import LiveTrader, BoundedTickQueue
+    rng = np.random.default_rng(8)
+    start = datetime(2024, 1, 2, 14, 30, tzinfo=timezone.utc)
+    recorded = []
+    for i in range(400):
+        for sym, base in (("AAA", 50.0), ("BBB", 120.0), ("ZZZ", 10.0)):
+            recorded.append({"T": "t", "S": sym, "p": base * (1 + 0.05 * np.sin(i / 15)) + rng.normal(0, 0.05),
+                             "t": (start + timedelta(seconds=i)).isoformat().replace("+00:00", "Z")})
+
+    async def replay(ws, *_):
+        await ws.recv(); await ws.recv()   # auth + subscribe
+        for i in range(0, len(recorded), 50):
+            await ws.send(json.dumps(recorded[i:i+50]))
+
+    async def scenario():
+        async with websockets.serve(replay, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            env = {"ALPACA_DATA_WS": f"ws://127.0.0.1:{port}", "ALPACA_API_KEY": "k", "ALPACA_API_SECRET": "s"}
+            old = {k: os.environ.get(k) for k in env}
+            os.environ.update(env)
+            try:
+                rt = AlpacaRealtime(["AAA", "BBB"])
+            finally:
+                for k, v in old.items():
+                    if v is None:
+                        os.environ.pop(k)
+                    else:
+                        os.environ[k] = v
+            broker = PaperBroker()
+            trader = LiveTrader(None, broker, MovingAverageCross(5, 20), RiskManager(RiskConfig()))
+            await trader.run_multi(["AAA", "BBB"], rt.stream_trades(), maxsize=10_000)
+            return trader, broker
+
+    import contextlib, io
+    with contextlib.redirect_stdout(io.StringIO()):
+        trader, broker = asyncio.run(scenario())
+    stats = trader.fanout.stats()
+    assert stats["AAA"]["processed"] == 400 and stats["BBB"]["processed"] == 400, "Every tick should reach its symbol"
+    assert trader.fanout.ignored == 400 and stats["AAA"]["depth"] == 0, "Unsubscribed symbols are skipped"
+    assert len(trader.states["AAA"].bars) == 400 and broker.positions, "Per-symbol state should trade"
+    assert trader.states["AAA"].strategy is not trader.states["BBB"].strategy, "Symbols need independent strategies"
+
+    async def backpressure():
+        drop, conf = BoundedTickQueue(3, "drop_oldest"), BoundedTickQueue(3, "conflate")
+        for i in range(6):
+            drop.put({"price": i}); conf.put({"symbol": "AB"[i % 2], "price": i})
+        got = [(await drop.get())["price"] for _ in range(3)], [(await conf.get())["price"] for _ in range(2)], len(conf)
+        conf.put({"symbol": "A", "price": 6})
+        return (*got, (await conf.get())["price"], drop.dropped, conf.conflated)
+    assert asyncio.run(backpressure()) == ([3, 4, 5], [4, 5], 0, 6, 3, 4), "Backpressure policy mismatch"
+    print("test_multi_symbol_fanout_over_fake_websocket:", OK)
+
+def test_tick_to_bar_aggregation():
+    import asyncio
+    from ..data.bars import TimeBarAggregator, VolumeBarAggregator, TickBarAggregator, aggregate
+    rng = np.random.default_rng(12)
+    t0 = pd.Timestamp("2024-03-01 14:30", tz="UTC")
+    ts = t0 + pd.to_timedelta(np.sort(rng.integers(0, 600_000, 3_000)), unit="ms")
+    trades = pd.DataFrame({"price": 100 + rng.normal(0, 0.2, len(ts)).cumsum(), "size": rng.integers(1, 500, len(ts)).astype(float)}, index=ts)
+    agg = TimeBarAggregator("1m")
+    bars = [b for t, row in trades.iterrows() for b in agg.update("X", row["price"], row["size"], t)] + agg.flush()
+    want = trades["price"].resample("1min").ohlc().join(trades["size"].resample("1min").sum()).dropna()
+    got = pd.DataFrame(bars).set_index("ts")
+    assert np.allclose(got[["open","high","low","close","volume"]].to_numpy(), want.to_numpy()), "Time bars differ from resample"
+    late = TimeBarAggregator("1s", lateness="500ms")
+    assert late.update("X", 10.0, 1, t0 + pd.Timedelta("200ms")) == []
+    assert late.update("X", 9.0, 1, t0 + pd.Timedelta("100ms")) == []   # out of order, same bar
+    [closed] = late.update("X", 11.0, 1, t0 + pd.Timedelta("1600ms"))
+    assert (closed["open"], closed["close"], closed["trades"]) == (9.0, 10.0, 2), "Out-of-order trade misplaced"
+    late.update("X", 8.0, 1, t0 + pd.Timedelta("900ms"))
+    assert late.late == 1, "Trades for emitted bars should be counted as late"
+    vol = VolumeBarAggregator(1000)
+    vbars = [b for t, row in trades.iterrows() for b in vol.update("X", row["price"], row["size"], t)]
+    assert vbars and all(b["volume"] >= 1000 for b in vbars), "Volume bars must reach the threshold"
+    async def ticks():
+        for t, row in trades.head(95).iterrows():
+            yield {"symbol": "X", "price": row["price"], "size": row["size"], "ts": t}
+    async def collect():
+        return [b async for b in aggregate(ticks(), TickBarAggregator(10))]
+    assert [b["trades"] for b in asyncio.run(collect())] == [10] * 9 + [5], "Tick bars mismatch"
+    print("test_tick_to_bar_aggregation:", OK)
+
+def test_columnar_trade_log():
+    from ..core.tradelog import TradeLog
+    from ..core.types import Fill
+    from ..risk.montecarlo import trade_returns
+    assert "__slots__" in Fill.__dict__, "Core types should be slotted"
+    df = _fake_price_series(n=800, seed=4)
+    res = Backtester(df, MovingAverageCross(5, 20), 10_000.0, PaperBroker(commission_per_share=0.01),
+                     RiskManager(RiskConfig())).run("TEST")
+    log = res.trades
+    assert type(log).__name__ == "TradeLog" and len(log) == len(list(log)) > 2, "Backtest should record into a TradeLog"
+    fills = list(log)
+    assert np.allclose(trade_returns(log), trade_returns(fills)), "Vectorized round trips differ from loop"
+    copy = TradeLog(capacity=1); copy.extend(fills[:3]); copy.extend(log)
+    assert len(copy) == 3 + len(log) and copy[-1].order.side == fills[-1].order.side, "extend() mismatch"
+    frame = log.to_frame()
+    assert list(frame["side"][:2]) == [fills[0].order.side.value, fills[1].order.side.value], "to_frame() mismatch"
+    stats = log.stats(capital=10_000.0)
+    trips = log.round_trips()
+    assert stats["RoundTrips"] == len(trips) and 0 <= stats["WinRate"] <= 1 and stats["Turnover"] > 0, "Bad trade stats"
+    assert (trips["hold"] > pd.Timedelta(0)).all(), "Hold times should be positive"
+    print("test_columnar_trade_log:", OK)
+
+def test_synthetic_generator_is_seeded():
+    from ..data.synthetic import gbm_bars, gbm_ticks
+    a, b = gbm_bars(5_000, seed=3), gbm_bars(5_000, seed=3)
+    pd.testing.assert_frame_equal(a, b)
+    assert not a.equals(gbm_bars(5_000, seed=4)), "Different seeds should give different paths"
+    assert (a["high"] >= a[["open","close"]].max(axis=1)).all() and (a["low"] <= a[["open","close"]].min(axis=1)).all(), "Bad OHLC"
+    panel = gbm_bars(500, 3, seed=3)
+    assert sorted(panel) == ["SYM0000", "SYM0001", "SYM0002"] and all(len(df) == 500 for df in panel.values()), "Bad panel"
+    ticks = gbm_ticks(2_000, ["X", "Y"], seed=3)
+    assert ticks["ts"].is_monotonic_increasing and set(ticks["symbol"]) == {"X", "Y"} and (ticks["price"] > 0).all(), "Bad ticks"
+    print("test_synthetic_generator_is_seeded:", OK)
+
+def test_instrumentation_and_metrics_endpoint():
+    # Same module object the engine and brokers report to (they import it absolutely)
+    from core import instrument
+    from ..app import app
+    instrument.REGISTRY.reset()
+    instrument.enable(False)
+    df = _fake_price_series(n=300)
+    Backtester(df, MovingAverageCross(5, 20), 10_000.0, PaperBroker(), RiskManager(RiskConfig())).run("TEST")
+    assert instrument.STAGE_SECONDS.count(stage="backtest_loop") == 0 and not instrument.ORDERS.values, "Disabled must record nothing"
+    instrument.enable(True)
+    try:
+        res = Backtester(df, MovingAverageCross(5, 20), 10_000.0, PaperBroker(), RiskManager(RiskConfig())).run("TEST")
+        instrument.CACHE.inc(cache="ohlcv", result="hit"); instrument.CACHE.inc(cache="ohlcv", result="miss", n=3)
+        assert instrument.STAGE_SECONDS.count(stage="backtest_loop") == 1 and instrument.STAGE_SECONDS.count(stage="signals") == 1
+        buys = sum(f.order.side == "BUY" for f in res.trades)
+        assert instrument.ORDERS.value(broker="paper", side="BUY") == buys and instrument.BARS.value(mode="loop") == 300
+        body = app.test_client().get("/metrics").get_data(as_text=True)
+    finally:
+        instrument.enable(False)
+    assert '# TYPE stage_seconds histogram' in body and 'stage_seconds_bucket{stage="backtest_loop",le="+Inf"} 1.0' in body
+    assert f'orders_submitted_total{{broker="paper",side="BUY"}} {float(buys)}' in body, "Orders missing from /metrics"
+    assert 'cache_hit_ratio{cache="ohlcv"} 0.25' in body, "Cache hit ratio missing from /metrics"
+    print("test_instrumentation_and_metrics_endpoint:", OK)
+
+def test_backtest_job_queue():
+    import operator
+    from ..backtest.jobs import JobQueue, QueueFull
+    from .. import app as web
+    q = JobQueue(max_workers=2, max_pending=2)
+    try:
+        a = q.submit(time.sleep, 0.3)
+        assert q.submit(time.sleep, 0.3) == a and q.deduped == 1, "Identical in-flight jobs should be deduplicated"
+        b = q.submit(operator.add, 2, 3)
+        try:
+            q.submit(operator.add, 4, 5)
+            raise AssertionError("Queue should be bounded")
+        except QueueFull:
+            pass
+        assert q.wait(b, 10).to_dict()["result"] == 5 and q.wait(a, 10).status == "done", "Jobs did not finish"
+        assert q.submit(time.sleep, 0.3) != a, "Finished jobs must not be reused"
+        bad = q.wait(q.submit(operator.truediv, 1, 0), 10).to_dict()
+        assert bad["status"] == "failed" and "division" in bad["error"], "Failures should be reported"
+    finally:
+        q.shutdown()
+    client = web.app.test_client()
+    # The routes read web.backtest_jobs; give them a private queue so the app's stays usable
+    real, web.backtest_jobs = web.backtest_jobs, JobQueue(max_workers=1, max_pending=4, on_done=web._count_result_cache)
+    jid = web.backtest_jobs.submit(operator.mul, 6, 7)
+    try:
+        got = client.get(f"/backtest/{jid}?wait=10").get_json()
+        assert got["status"] == "done" and got["result"] == 42, "Long-poll should return the finished job"
+        stream = client.get(f"/backtest/{jid}/stream").get_data(as_text=True)
+        assert stream.startswith("event: status") and '"result": 42' in stream, "Stream should carry the result"
+        assert client.get("/backtest/nope").status_code == 404
+        assert client.get(f"/backtest/{jid}?wait=soon").status_code == 400, "A bad wait should be a client error"
+    finally:
+        web.backtest_jobs.shutdown()
+        web.backtest_jobs = real
+    print("test_backtest_job_queue:", OK)
+
+def test_backtest_result_cache():
+    import os, tempfile
+    from ..backtest.resultcache import ResultCache
+    df = _fake_price_series(n=400, seed=5)
+    make = lambda cfg=RiskConfig(), fast=5: Backtester(df, MovingAverageCross(fast, 20), 10_000.0, PaperBroker(), RiskManager(cfg))
+    with tempfile.TemporaryDirectory() as d:
+        cache = ResultCache(max_items=2, cache_dir=d)
+        first = cache.run(make(), "TEST")
+        bt = make()
+        bt.run = lambda *a, **k: (_ for _ in ()).throw(AssertionError("Cache hit must not run the engine"))
+        assert cache.run(bt, "TEST") is first and (cache.hits, cache.misses) == (1, 1), "Expected a memory hit"
+        cache.run(make(RiskConfig(stop_loss_pct=0.02)), "TEST"); cache.run(make(fast=7), "TEST")
+        assert cache.misses == 3 and len(cache._mem) == 2, "Changed config must miss; LRU keeps max_items"
+        disk = ResultCache(cache_dir=d)
+        again = disk.run(bt, "TEST")
+        assert disk.disk_hits == 1 and len(again.trades) == len(first.trades), "Expected a disk hit"
+        pd.testing.assert_series_equal(again.equity_curve, first.equity_curve)
+        tiny = ResultCache(cache_dir=d, max_bytes=1)
+        tiny.put("x" * 64, first)
+        assert len([f for f in os.listdir(d) if f.endswith(".pkl")]) == 0, "Disk tier should evict down to max_bytes"
+    print("test_backtest_result_cache:", OK)
+
+def test_dashboard_event_stream():
+    from ..live.events import EventLog
+    from .. import app as web
+    small = EventLog(maxlen=2)
+    for i in range(3):
+        small.publish("fill", {"n": i})
+    assert small.since(0) is None and [e[2]["n"] for e in small.since(1)] == [1, 2], "Replay should come from the buffer"
+    assert small.wait(3, 0.05) == [], "Waiting past the last id should time out empty"
+
+    log, client = web.bot_events, web.app.test_client()
+    base = log.last_id
+    log.publish("status", {"status": "running", "symbol": "TEST"})
+    log.publish("fill", {"timestamp": "t", "action": "BUY", "quantity": 3, "symbol": "TEST", "price": 10.0})
+    log.publish("position", {"symbol": "TEST", "qty": 3, "avg_price": 10.0})
+    got = client.get(f"/events?poll=1&since={base}").get_json()
+    assert [e["type"] for e in got["events"]] == ["status", "fill", "position"] and got["cursor"] == base + 3
+    assert "snapshot" in client.get("/events?poll=1").get_json(), "A client without a cursor starts from a snapshot"
+    assert small.since(small.last_id + 5) is None and small.wait(small.last_id + 5, 1) is None, "A cursor from before a restart should resync"
+    assert "snapshot" in client.get("/events?poll=1&since=abc").get_json(), "An unreadable cursor should resync"
+    resp = client.get("/events", headers={"Last-Event-ID": str(base + 1)}, buffered=False)
+    try:
+        chunks = iter(resp.response)
+        first, second = next(chunks), next(chunks)
+    finally:
+        resp.close()
+    first, second = (c.decode() if isinstance(c, bytes) else c for c in (first, second))
+    assert first.startswith(f"id: {base + 2}\nevent: fill") and second.startswith(f"id: {base + 3}\nevent: position"), \
+        "Reconnect should replay only the missed events"
+    print("test_dashboard_event_stream:", OK)
+
+def test_downsampled_chart_rendering():
+    from ..backtest.jobs import JobQueue
+    from ..charts.report import Report, downsample, drawdown, lttb, minmax
+    from .. import app as web
+    rng = np.random.default_rng(9)
+    idx = pd.date_range("2020-01-01", periods=200_000, freq="1min", tz="UTC")
+    eq = pd.Series(100_000 * np.exp(np.cumsum(rng.normal(0, 1e-4, len(idx)))), index=idx)
+    eq.iloc[123_457] *= 0.9   # one-bar crash the drawdown chart must keep
+    small = downsample(eq, 1_000)
+    assert len(small) == 1_000 and small.index[0] == idx[0] and small.index[-1] == idx[-1], "LTTB keeps endpoints"
+    assert small.index.is_monotonic_increasing and np.isclose(small.max(), eq.max(), rtol=1e-3), "LTTB lost the peak"
+    dd = downsample(drawdown(eq), 1_000, "minmax")
+    assert len(dd) <= 1_002 and dd.min() == drawdown(eq).min(), "Min/max decimation must keep the worst drawdown"
+    assert list(lttb(np.arange(5), np.arange(5.0), 10)) == list(range(5)) and len(minmax(np.arange(5.0), 10)) == 5
+    pngs = Report.render_many({"a": eq, "b": eq * 2}, max_points=500, processes=2)
+    assert set(pngs) == {"a", "b"} and all(p[:8] == b"\x89PNG\r\n\x1a\n" for c in pngs.values() for p in c.values())
+    pts = [[int(t.value // 1_000_000), float(v)] for t, v in small.items()]
+    real, web.backtest_jobs = web.backtest_jobs, JobQueue(max_workers=1, max_pending=4)
+    jid = web.backtest_jobs.submit(dict, {"curves": {"equity": pts, "drawdown": pts}}, key="chart-test")
+    try:
+        web.backtest_jobs.wait(jid, 10)
+        client = web.app.test_client()
+        r = client.get(f"/backtest/{jid}/chart/equity.png")
+        assert r.status_code == 200 and r.mimetype == "image/png", "Chart endpoint should serve a PNG"
+        assert client.get(f"/backtest/{jid}/chart/bogus.png").status_code == 404
+    finally:
+        web.backtest_jobs.shutdown()
+        web.backtest_jobs = real
+    print("test_downsampled_chart_rendering:", OK)
+
+def test_chunked_intraday_download():
+    import threading
+    from ..data.providers import YFinanceProvider, chunk_range
+    calls, failed, active, peak = [], set(), [0], [0]
+    lock = threading.Lock()
+    def fake_download(tickers, start, end, interval, **kw):
+        a, b = pd.Timestamp(start, tz="UTC"), pd.Timestamp(end, tz="UTC")
+        assert b - a <= pd.Timedelta(days=7), "Chunk exceeds Yahoo's 1m limit"
+        with lock:
+            calls.append((a, b)); active[0] += 1; peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.01)
+            if a not in failed:   # every chunk fails once, then succeeds on retry
+                failed.add(a)
+                raise ConnectionError("rate limited")
+            # Include the bar at `end` too, like an inclusive server, to exercise de-duplication
+            idx = pd.date_range(a, b, freq="1min")
+            px = np.arange(len(idx), dtype=float) + idx.asi8 / 6e10
+            return pd.DataFrame({"Open": px, "High": px, "Low": px, "Close": px, "Volume": 1.0}, index=idx)
+        finally:
+            with lock:
+                active[0] -= 1
+    assert len(chunk_range("2024-01-01", "2024-03-01", "1m")) == 9 and chunk_range("2024-01-01", "2024-03-01", "1d") == [("2024-01-01", "2024-03-01")]
+    prov = YFinanceProvider(max_workers=3, retries=2, backoff=0.0, download=fake_download)
+    df = prov.history("TEST", "2024-01-01", "2024-02-01", "1m")
+    want = pd.date_range("2024-01-01", "2024-02-01", freq="1min", tz="UTC")
+    assert df.index.equals(want) and list(df.columns) == ["open","high","low","close","volume"], "Chunks not stitched"
+    assert len(calls) == 2 * 5 and peak[0] <= 3, f"Expected 5 chunks each retried once with <=3 in flight, got {len(calls)}/{peak[0]}"
+    never = YFinanceProvider(retries=1, backoff=0.0, download=lambda *a, **k: (_ for _ in ()).throw(ConnectionError("down")))
+    try:
+        never.history("TEST", "2024-01-01", "2024-01-03", "1m")
+        raise AssertionError("Exhausted retries should raise")
+    except ConnectionError:
+        pass
+    print("test_chunked_intraday_download:", OK)
+
+def test_bar_store():
+    import os, tempfile
+    from ..data.barstore import BarStore, BarStoreProvider
+    from ..data.synthetic import gbm_bars
+    df = gbm_bars(2000, freq="1min", seed=5)
+    store = BarStore(tempfile.mkdtemp())
+    # Overlapping appends keep one bar per timestamp; out-of-order input is sorted
+    assert store.append("SYM", "1m", df.iloc[:1200].iloc[::-1]) == 1200
+    assert store.append("SYM", "1m", df.iloc[1000:]) == 800 and store.append("SYM", "1m", df.iloc[:10]) == 0
+    full = store.frame("SYM", "1m")
+    assert full.index.equals(df.index) and np.allclose(full.to_numpy(), df[full.columns].to_numpy()), "Store round trip differs"
+    start, end = df.index[300], df.index[450]
+    part = store.frame("SYM", "1m", start, end)
+    assert part.index.equals(df.loc[start:end].index[:-1]), "Range is not [start, end)"
+    cols = store.columns("SYM", "1m")
+    assert isinstance(cols["close"], np.memmap) and not cols["close"].flags.writeable
+    bt = Backtester(part, MovingAverageCross(5, 20), 10000, PaperBroker(), RiskManager(RiskConfig()))
+    assert np.shares_memory(bt.df["close"].to_numpy(), cols["close"]), "Backtester copied the mapped bars"
+    class Inner(DataProvider):
+        calls = 0
+        def history(self, symbol, start, end, interval="1d"):
+            Inner.calls += 1
+            return df.loc[pd.Timestamp(start, tz="UTC"):pd.Timestamp(end, tz="UTC")]
+        def latest(self, symbol):
+            return {}
+    prov = BarStoreProvider(store, Inner())
+    a = prov.history("NEW", "2020-01-01 00:00", "2020-01-01 01:00", "1m")
+    b = prov.history("NEW", "2020-01-01 00:10", "2020-01-01 00:20", "1m")
+    assert Inner.calls == 1 and len(a) == 60 and len(b) == 10, "Store misses should be filled once"
+    try:
+        BarStoreProvider(store).history("NONE", "2020-01-01", "2020-01-02")
+        raise AssertionError("Missing series should raise")
+    except RuntimeError:
+        pass
+    # Requests overlapping the stored days fetch only the missing head and tail
+    days = gbm_bars(400, freq="1D", seed=6)
+    Inner.calls, df = 0, days
+    day = lambda i: days.index[i].strftime("%Y-%m-%d")
+    assert len(prov.history("D", day(200), day(300))) == 100 and Inner.calls == 1
+    assert prov.history("D", day(100), day(350)).index.equals(days.index[100:350]) and Inner.calls == 3, "Head and tail not filled"
+    assert prov.history("D", day(0), day(50)).index.equals(days.index[:50]), "Older bars should be prepended"
+    # Inner includes the end bar, so the store holds day 350 as well
+    assert store.frame("D", "1d").index.equals(days.index[:351]) and store.coverage("D") == (days.index[0].value, days.index[350].value)
+    calls = Inner.calls
+    prov.history("D", day(20), day(340))
+    assert Inner.calls == calls, "Covered days should not be fetched again"
+    try:
+        BarStoreProvider(store).history("D", day(0), day(380))
+        raise AssertionError("Partly covered range should raise without an inner provider")
+    except RuntimeError:
+        pass
+    # A torn append (columns written, ts not) is cut off by the next append
+    with open(os.path.join(store._dir("D", "1d"), "close.f8"), "ab") as f:
+        f.write(np.zeros(3).tobytes())
+    store.append("D", "1d", days.iloc[351:])
+    assert np.allclose(store.frame("D", "1d")["close"].to_numpy(), days["close"].to_numpy()), "Columns misaligned"
+    print("test_bar_store:", OK)
+
+def test_intrabar_exits():
+    from ..backtest.exits import ExitResolver, settle, NONE, STOP, TAKE
+    rng = np.random.default_rng(11)
+    n = 3000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    res = ExitResolver(open_, high, low, block=16)
+    starts = rng.integers(0, n, 500)
+    stop, take = close[starts] * 0.96, close[starts] * 1.04
+    stop[::9] = np.nan
+    for both in ("stop", "take", "open"):
+        for k in range(0, 500, 7):
+            hits = np.flatnonzero((low[starts[k]:] <= stop[k]) | (high[starts[k]:] >= take[k]))
+            j = starts[k] + hits[0] if len(hits) else n
+            got = res.first(starts[k], stop[k], take[k], both=both)
+            if j == n:
+                assert got[:2] == (n, NONE) and np.isnan(got[2]), f"Untouched trade should not exit, got {got}"
+                continue
+            reason, price = settle(open_[j], low[j] <= stop[k], high[j] >= take[k], stop[k], take[k], both)
+            assert got == (j, int(reason), float(price)), f"First touch {got} != {(j, int(reason), float(price))}"
+            end = int(j) - 1
+            if end >= starts[k]:
+                assert res.first(starts[k], stop[k], take[k], end, both)[:2] == (n, NONE), "Bars after end must be ignored"
+    # Both levels on one bar, and gaps through a level
+    assert settle(100.0, True, True, 95.0, 110.0, "stop")[0] == STOP and settle(100.0, True, True, 95.0, 110.0, "take")[0] == TAKE
+    assert settle(108.0, True, True, 95.0, 110.0, "open")[0] == TAKE and settle(97.0, True, True, 95.0, 110.0, "open")[0] == STOP
+    assert float(settle(90.0, True, False, 95.0, 110.0)[1]) == 90.0 and float(settle(112.0, False, True, 95.0, 110.0)[1]) == 112.0
+    df = pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": 1.0},
+                      index=pd.date_range("2020-01-01", periods=n, freq="1min", tz="UTC"))
+    runs = {}
+    for exits in ("close", "intrabar"):
+        for mode in ("loop", "vectorized"):
+            bt = Backtester(df, MovingAverageCross(10, 40), 10_000.0, PaperBroker(), RiskManager(RiskConfig(stop_loss_pct=0.01, take_profit_pct=0.01)),
+                            exits=exits, both="open")
+            runs[exits, mode] = bt.run("TEST", mode=mode)
+        a, b = runs[exits, "loop"], runs[exits, "vectorized"]
+        assert a.trades.rows.tobytes() == b.trades.rows.tobytes(), f"{exits}: vectorized trades differ from loop"
+        pd.testing.assert_series_equal(a.equity_curve, b.equity_curve, check_freq=False)
+    intrabar = runs["intrabar", "loop"].trades
+    exit_px = np.array([f.order.price for f in intrabar if f.order.tag == "exit"])
+    assert len(exit_px) and len(intrabar) != len(runs["close", "loop"].trades), "Intrabar fixture should change the exits"
+    try:
+        Backtester(df[["close"]], MovingAverageCross(10, 40), 10_000.0, PaperBroker(), RiskManager(RiskConfig()), exits="intrabar").run("TEST")
+        raise AssertionError("Intrabar exits without high/low should raise")
+    except ValueError:
+        pass
+    print("test_intrabar_exits:", OK)
+
+def test_tick_replay():
+    import os, tempfile
+    from ..data.synthetic import gbm_ticks
+    from ..live.replay import TickReplay, load_ticks, replay, save_ticks
+    from ..live.runner import LiveTrader
+    make = lambda: LiveTrader(None, PaperBroker(), MovingAverageCross(5, 20), RiskManager(RiskConfig(stop_loss_pct=0.001, take_profit_pct=0.001)))
+    ticks = gbm_ticks(5000, 2, seed=4)
+    d = tempfile.mkdtemp()
+    for ext in ("csv", "ndjson"):
+        save_ticks(ticks, os.path.join(d, f"t.{ext}"))
+        back = load_ticks(os.path.join(d, f"t.{ext}"))
+        assert back["ts"].equals(ticks["ts"]) and np.array_equal(back["price"], ticks["price"]), f"{ext} round trip differs"
+    one = [replay(make(), os.path.join(d, "t.ndjson"), ["SYM0000"]) for _ in range(2)]
+    assert one[0]["ticks"] == (ticks["symbol"] == "SYM0000").sum() and one[0]["fills"] > 0
+    assert one[0]["fills_digest"] == one[1]["fills_digest"], "Replayed fills are not deterministic"
+    lat = one[0]["latency_us"]
+    assert 0 < lat["p50"] <= lat["p90"] <= lat["p99"] <= lat["max"] and one[0]["ticks_per_s"] > 0
+    both = replay(make(), ticks)
+    assert both["ticks"] == len(ticks) and both["fills"] >= one[0]["fills"], "run_multi replay lost ticks"
+    # Paced replay keeps the recorded gaps, scaled by speed
+    short = ticks.iloc[:20]
+    span = (short["ts"].iloc[-1] - short["ts"].iloc[0]).total_seconds()
+    paced = replay(make(), short, speed=10.0)
+    assert paced["seconds"] >= span / 10 * 0.9, "speed=10 replayed too fast"
+    try:
+        TickReplay(short, speed=0)
+        raise AssertionError("speed=0 should raise")
+    except ValueError:
+        pass
+    print("test_tick_replay:", OK)
+
+def test_shared_price_poller():
+    from ..live.manager import BotManager, PricePoller
+    from .. import app as web
+    calls = []
+    class Quotes(DataProvider):
+        def latest(self, symbol):
+            calls.append(symbol)
+            if symbol == "GONE":
+                raise RuntimeError("no quote")
+            return {"price": {"AAA": 12.0, "BBB": 13.0}[symbol], "ts": pd.Timestamp("2024-01-02 14:32", tz="UTC")}
+    prov = Quotes()
+    class Bot:
+        def __init__(self, symbol):
+            self.symbol, self.running, self.seen = symbol, False, []
+        def start(self): self.running = True
+        def stop(self): self.running = False
+        def on_tick(self, tick): self.seen.append(tick["price"])
+        def to_dict(self): return {"symbol": self.symbol, "running": self.running}
+    poller = PricePoller(prov, interval=60)
+    mgr = BotManager(poller)
+    a, b, c = (mgr.add(Bot(s)) for s in ("AAA", "AAA", "BBB"))
+    try:
+        for i in (a, b, c):
+            mgr.start(i)
+        poller.stop()   # poll by hand from here on
+        calls.clear()
+        poller.poll_once()
+        assert calls == ["AAA", "BBB"], "Every symbol should be fetched once per poll"
+        assert mgr.get(a).seen[-1] == mgr.get(b).seen[-1] == 12.0 and mgr.get(c).seen[-1] == 13.0, "Ticks not fanned out"
+        mgr.stop(c)
+        gone = mgr.add(Bot("GONE"))
+        mgr.start(gone); poller.stop()
+        calls.clear(); errors = poller.errors; poller.poll_once()
+        assert calls == ["AAA", "GONE"] and mgr.running() == [a, b, gone], "Stopped bots should leave the poll"
+        assert poller.errors == errors + 1 and mgr.get(a).seen[-1] == 12.0, "A failing quote should not stop the others"
+    finally:
+        mgr.shutdown()
+    from ..live.manager import TooManyBots
+    capped = BotManager(PricePoller(prov, interval=60), max_bots=2)
+    try:
+        x, y = capped.add(Bot("AAA")), capped.add(Bot("BBB"))
+        capped.start(x); capped.start(y)
+        try:
+            capped.add(Bot("CCC"))
+            raise AssertionError("Adding past max_bots with every bot running should raise")
+        except TooManyBots:
+            pass
+        capped.stop(x)
+        z = capped.add(Bot("CCC"))
+        assert list(capped.bots) == [y, z], "The oldest stopped bot should make room"
+        capped.max_bots = 1
+        try:
+            capped.start(z)
+            raise AssertionError("Starting past max_bots should raise")
+        except TooManyBots:
+            pass
+    finally:
+        capped.shutdown()
+
+    client = web.app.test_client()
+    web.bots.poller.stop()
+    web.bots.poller.provider, web.bots.poller.interval = prov, 60
+    try:
+        made = client.post("/bots", data={"symbol": "aaa", "poll_secs": 0})
+        bot_id = made.get_json()["bot_id"]
+        assert made.status_code == 201 and client.get(f"/bots/{bot_id}").get_json()["status"] == "running"
+        web.bots.poller.poll_once()
+        assert client.get(f"/bots/{bot_id}").get_json()["last_tick"] is not None, "Bot did not receive the shared tick"
+        stopped = client.post(f"/bots/{bot_id}/stop").get_json()
+        assert stopped["bot"]["status"] == "stopped" and bot_id in client.get("/bots").get_json()["bots"]
+        assert client.post("/bots/nope/stop").status_code == 404
+        assert client.delete(f"/bots/{bot_id}").status_code == 200 and client.get(f"/bots/{bot_id}").status_code == 404
+    finally:
+        web.bots.shutdown()
+    print("test_shared_price_poller:", OK)
+
+def test_coalescing_quote_cache():
+    import threading
+    from ..data.cache import QuoteCache
+    from ..data.providers import YFinanceProvider
+    from .. import app as web
+    downloads = []
+    def fake_download(tickers, start, end, interval, **kw):
+        downloads.append(list(tickers))
+        assert kw["period"] == "1d" and start is None, "Quotes only need the last day of bars"
+        idx = pd.date_range("2024-01-02 14:30", periods=3, freq="1min", tz="UTC")
+        # Yahoo returns an all-NaN column for a ticker it has no bars for
+        close = pd.DataFrame({t: [np.nan] * 3 if t == "GONE" else [10.0 + i, 11.0 + i, 12.0 + i]
+                              for i, t in enumerate(tickers)}, index=idx)
+        return pd.concat({"Close": close, "Open": close}, axis=1)
+    got = YFinanceProvider(download=fake_download).latest_many(["AAA", "BBB", "GONE"])
+    assert downloads == [["AAA", "BBB", "GONE"]] and got["BBB"]["price"] == 13.0 and "GONE" not in got, "Expected one batched request"
+    calls, gate = [], threading.Event()
+    class Slow(DataProvider):
+        def latest(self, symbol):
+            raise AssertionError("QuoteCache should batch through latest_many")
+        def latest_many(self, symbols):
+            calls.append(sorted(symbols))
+            gate.wait(5)
+            if "BAD" in symbols:
+                raise ConnectionError("rate limited")
+            return {s: {"price": 100.0 + len(calls), "ts": datetime.now(timezone.utc)} for s in symbols if s != "NONE"}
+    now = [0.0]
+    cache = QuoteCache(Slow(), ttl=2.0, clock=lambda: now[0])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.latest_many(["AAA", "BBB"]))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1); gate.set()
+    for t in threads:
+        t.join(5)
+    assert calls == [["AAA", "BBB"]] and len(results) == 8, f"Concurrent callers should share one fetch, got {calls}"
+    assert all(r == results[0] for r in results) and cache.misses == 2 and cache.coalesced == 14
+    assert cache.latest("AAA")["price"] == 101.0 and cache.hits == 1 and len(calls) == 1, "Fresh quote should be a hit"
+    now[0] = 2.5
+    assert cache.latest_many(["AAA", "NONE"]) == {"AAA": cache.latest("AAA")} and calls[-1] == ["AAA", "NONE"], "Expired quote should refetch"
+    try:
+        cache.latest("BAD")
+        raise AssertionError("Fetch errors should propagate")
+    except ConnectionError:
+        pass
+    assert cache.stats()["inflight"] == 0, "A failed fetch must not stay in flight"
+    now[0] = 10.0
+    cache.latest_many(["CCC"])
+    assert set(cache._quotes) == {"CCC"}, "Expired quotes should be dropped"
+    web.quotes.inner = Slow()
+    try:
+        client = web.app.test_client()
+        got = client.get("/quotes?symbols=aaa,bbb").get_json()
+        assert set(got) == {"AAA", "BBB"} and client.get("/quotes").status_code == 400
+        assert client.get("/quotes?symbols=bad").status_code == 502
+    finally:
+        web.quotes.inner = web.YFinanceProvider()
+    print("test_coalescing_quote_cache:", OK)
+
 if __name__ == "__main__":
     try:
         test_strategy_signals()
         test_backtester_runs_without_matplotlib()
         test_risk_metrics_sanity()
+        test_vectorized_engine_matches_loop()
+        test_parallel_sweep_matches_serial()
+        test_streaming_signals_match_batch()
+        test_ring_buffer_history()
+        test_caching_provider_fills_gaps()
+        test_portfolio_backtester()
+        test_walk_forward()
+        test_batch_metrics_match_scalar()
+        test_monte_carlo_bootstrap()
+        test_async_alpaca_broker_against_stub()
+        test_multi_symbol_fanout_over_fake_websocket()
+        test_tick_to_bar_aggregation()
+        test_columnar_trade_log()
+        test_synthetic_generator_is_seeded()
+        test_instrumentation_and_metrics_endpoint()
+        test_backtest_job_queue()
+        test_backtest_result_cache()
+        test_dashboard_event_stream()
+        test_downsampled_chart_rendering()
+        test_chunked_intraday_download()
+        test_bar_store()
+        test_intrabar_exits()
+        test_tick_replay()
+        test_shared_price_poller()
+        test_coalescing_quote_cache()
         print("\nAll tests:", OK)
     except AssertionError as e:
         print("\nTests:", FAIL, str(e))